@@ -1,10 +1,43 @@
 ################# The following Code just reads the RINEX 4.0 version data. ################
 
 
+import itertools
 import numpy as np
-from datetime import datetime
 import pandas as pd
 
+from processed_rinex_observation_file import iter_observation_epochs
+from rinex_compression import open_rinex
+from rinex_export import DEFAULT_MEMORY_BUDGET, ObservationWriter, chunk_rows
+from rinex_header import read_header
+from rinex_profiling import count, stage
+
+DEFAULT_EPOCH_CAPACITY = (
+    2880  # One day at 30 s, used when the header gives no time span
+)
+_OBS_ARRAY_FILL = {"value": np.nan, "lli": 0, "ssi": 0, "observed": False}
+_EPOCH_ARRAY_FILL = {
+    "epoch_times": np.datetime64("NaT"),
+    "epoch_flags": 0,
+    "clock_offsets": np.nan,
+    "epoch_deleted": False,
+}
+
+# Deleted epochs are tombstoned and dropped once they reach this share of the rows
+COMPACTION_FRACTION = 0.25
+COMPACTION_MIN_DELETED = 64
+
+
+def _grow_axis(array, axis, new_size, fill):
+    """Returns a copy of array enlarged to new_size along axis, padded with fill."""
+    shape = list(array.shape)
+    shape[axis] = new_size - array.shape[axis]
+    return np.concatenate([array, np.full(shape, fill, dtype=array.dtype)], axis=axis)
+
+
+def _epoch_key(epoch):
+    """Returns the int64 nanoseconds of an epoch, the key of the epoch-to-row map."""
+    return int(np.datetime64(epoch, "ns").astype(np.int64))
+
 
 class Receiver:
     def __init__(self):
@@ -16,8 +49,6 @@ class Receiver:
         self.receiver_number = ""  # Receiver Number
         self.receiver_type = ""  # Receiver Type
         self.receiver_version = ""  # Receiver Version
-        self.observations = np.array([])
-        self.epochs = []
         self.gnss_systems = []  # List of GNSS systems observed
         self.observation_codes = (
             {}
@@ -53,554 +84,512 @@ class Receiver:
         self.rcv_clock_offs_appl = 0  # Default set to "not applied"
         self.prn_obs_counts = {}  # Key: PRN, Value: dict of observation type counts
         self.glonass_code_phase_bias = {}  # Store GLONASS code/phase bias corrections
-        self.obs_data = {}  # Store Observation data for each GNSS system
-        self.observation_data = {}  # Store the complete observation data
+        self.obs_data = (
+            {}
+        )  # Dense value/lli/ssi arrays [epoch, satellite, obs code] per GNSS system
+        self.satellites = (
+            {}
+        )  # PRNs of each GNSS system, in obs_data satellite-axis order
+        self._satellite_columns = {}  # Per GNSS system: PRN -> satellite-axis index
+        self.epoch_times = np.empty(
+            0, dtype="datetime64[ns]"
+        )  # Epoch of each obs_data row
+        self.epoch_flags = np.empty(0, dtype=np.int8)
+        self.clock_offsets = np.empty(
+            0, dtype=np.float64
+        )  # Receiver clock offset per epoch
+        self.epoch_deleted = np.empty(0, dtype=bool)  # Tombstones of deleted epochs
+        self.num_epochs = 0  # Number of filled obs_data rows, tombstoned ones included
+        self.num_deleted = 0  # Number of tombstoned rows
+        self._epoch_rows = {}  # Epoch in int64 ns -> obs_data row of every live epoch
+        self._rows_sorted = True  # Whether the filled rows are in time order
+
+    @property
+    def epochs(self):
+        """Times of the epochs that have not been deleted, in row order."""
+        num_epochs = self.num_epochs
+        return self.epoch_times[:num_epochs][~self.epoch_deleted[:num_epochs]]
+
+    def _expected_num_epochs(self):
+        """Number of epochs announced by TIME OF FIRST/LAST OBS and INTERVAL, or None."""
+        if (
+            self.time_of_first_obs is None
+            or self.time_of_last_obs is None
+            or not self.interval
+        ):
+            return None
+        span = (self.time_of_last_obs - self.time_of_first_obs) / np.timedelta64(1, "s")
+        return int(round(span / self.interval)) + 1
 
     def _initialize_obs_data(self):
-        """Initializes empty DataFrames for each GNSS system based on parsed header info."""
+        """Preallocates dense observation arrays for each GNSS system based on parsed header info."""
+        self.gnss_systems = list(self.observation_codes)
+        num_epochs = self._expected_num_epochs() or DEFAULT_EPOCH_CAPACITY
+
+        self.epoch_times = np.empty(num_epochs, dtype="datetime64[ns]")
+        self.epoch_flags = np.zeros(num_epochs, dtype=np.int8)
+        self.clock_offsets = np.full(num_epochs, np.nan)
+        self.epoch_deleted = np.zeros(num_epochs, dtype=bool)
+        self.num_epochs = 0
+        self.num_deleted = 0
+        self._epoch_rows = {}
+        self._rows_sorted = True
 
         for system in self.gnss_systems:
-            obs_codes = self.observation_codes[system]
-
-            # Ensure prns is not empty to avoid creating an index with no levels.
-            prns = [prn for prn in self.prn_obs_counts if prn.startswith(system)]
-            if not prns:
-                # print(f"No PRNs found for system {system}. Skipping DataFrame initialization.")
-                continue
-
-            # Initialize columns ensuring 'rx_clk_off' is handled separately to avoid being treated as a level in MultiIndex.
-            columns = [("rx_clk_off", "")] + [
-                (obs_type, prn) for obs_type in obs_codes for prn in prns
-            ]
-
-            # Use MultiIndex for columns to enable grouping by observation type.
-            # Note: Including a dummy empty string for 'rx_clk_off' to match the two-level structure.
-            multi_index = pd.MultiIndex.from_tuples(
-                columns, names=["Observation", "Satellite"]
-            )
-
-            # Initialize DataFrame for the current GNSS system.
-            self.obs_data[f"{system}_obs"] = pd.DataFrame(columns=multi_index)
-
-    def _parse_rinex_version_type_line(self, line):
-        """Parses the 'RINEX VERSION / TYPE' line to extract version, observation type, and system type."""
-        self.rinex_version = float(
-            line[:9].strip()
-        )  # RINEX version as a floating-point number
-        self.observation_type = line[20:40].strip()  # Extract the observation data type
-
-        # Extract the system type character and map it to the full name or abbreviation for clarity
-        system_char = line[
-            40:41
-        ].strip()  # Extract the single character indicating the system type
-        system_map = {
-            "G": "GPS",
-            "R": "GLONASS",
-            "S": "SBAS",
-            "E": "Galileo",
-            "J": "QZSS",
-            "C": "BDS",
-            "I": "IRNSS",
-            "M": "Mixed",
-        }
-        self.system_type = system_map.get(
-            system_char, system_char
-        )  # Default to the char if not found
-
-    def _parse_time_line(self, time_str):
-        """Parses a datetime line from the RINEX header and returns a numpy datetime64 object."""
-        # Split the time string to separate the fractional seconds
-        parts = time_str.split(".")
-        base_time_str = parts[0]  # Base datetime string without fractional seconds
-        fractional_seconds_str = (
-            "0." + parts[1] if len(parts) > 1 else "0"
-        )  # Fractional seconds as a string
-
-        # Parse the base datetime string
-        dt = datetime.strptime(base_time_str, "%Y %m %d %H %M %S")
-
-        # Convert fractional seconds string to a float, then to nanoseconds for numpy timedelta64
-        fractional_seconds = float(fractional_seconds_str)
-        nanoseconds = int(fractional_seconds * 1e9)
-
-        # Combine and convert to numpy datetime64
-        np_dt = np.datetime64(dt) + np.timedelta64(nanoseconds, "ns")
-        return np_dt
-
-    def _parse_phase_shifts_line(self, line):
-        """Parses a 'SYS / PHASE SHIFTS' line."""
-        parts = line.split()
-        gnss_system = parts[0]
-        obs_code = parts[1]
-        # Safely parse the phase shift value, defaulting to 0.0 if not present or not a float
-        try:
-            phase_shift = (
-                float(parts[2])
-                if len(parts) > 2 and parts[2].replace(".", "", 1).isdigit()
-                else 0.0
-            )
-        except ValueError:
-            phase_shift = 0.0  # Default phase shift if conversion fails
-
-        # Determine if there are specified satellites (depends on the presence of a numeric value indicating their count)
-        num_satellites = 0
-        satellites = []
-        if len(parts) > 3 and parts[3].isdigit():
-            num_satellites = int(parts[3])
-            satellites = parts[4 : 4 + num_satellites]
-
-        # Initialize the dictionary structure for the GNSS system if not present
-        if gnss_system not in self.phase_shifts:
-            self.phase_shifts[gnss_system] = {}
-
-        # Store the phase shift information for the observation code
-        self.phase_shifts[gnss_system][obs_code] = {
-            "phase_shift": phase_shift,
-            "satellites": satellites,
+            self._initialize_system(system, num_epochs)
+
+    def _initialize_system(self, system, num_epochs):
+        """Allocates the observation arrays of one GNSS system."""
+        num_obs = max(len(self.observation_codes[system]), 1)
+        # Satellites listed in PRN / # OF OBS; more are added as they show up in the data
+        prns = [prn for prn in self.prn_obs_counts if prn.startswith(system)]
+        num_sats = max(len(prns), 1)
+
+        self.satellites[system] = prns
+        self._satellite_columns[system] = {prn: i for i, prn in enumerate(prns)}
+        self.obs_data[system] = {
+            "value": np.full((num_epochs, num_sats, num_obs), np.nan),
+            "lli": np.zeros((num_epochs, num_sats, num_obs), dtype=np.int8),
+            "ssi": np.zeros((num_epochs, num_sats, num_obs), dtype=np.int8),
+            "observed": np.zeros((num_epochs, num_sats), dtype=bool),
         }
 
-    def _parse_prn_obs_line(self, epoch, line):
-        """Parses observation data for each PRN, aligning the observed values with the expected GNSS observation types."""
-        prn = line[:3].strip()
-        gnss_system = prn[0]
-        obs_data = {}
-
-        # Ensure we map observation data to their respective types for the GNSS system of the PRN
-        if gnss_system in self.observation_codes:
-            obs_types = self.observation_codes[gnss_system]
-
-            # Prepare to extract each data point based on the known format size
-            data_start = 3
-            data_length = 16  # Assuming 14 for the value + 1 for lock + 1 for strength
-            for obs_type in obs_types:
-                data_end = data_start + data_length
-                data_point = line[data_start:data_end].strip()
-
-                if (
-                    len(data_point) > 2
-                ):  # There's enough data for at least the value and indicators
-                    value = float(data_point[:-2]) if data_point[:-2].strip() else None
-                    loss_lock = (
-                        int(data_point[-2]) if data_point[-2].isdigit() else None
-                    )
-                    signal_strength = (
-                        int(data_point[-1]) if data_point[-1].isdigit() else None
-                    )
-                else:
-                    value, loss_lock, signal_strength = None, None, None
-
-                obs_data[obs_type] = {
-                    "value": value,
-                    "loss_of_lock": loss_lock,
-                    "signal_strength": signal_strength,
-                }
-                data_start = data_end  # Move to the start of the next data point
-
-            # Store this PRN's data under its corresponding epoch and system
-            if epoch not in self.observation_data:
-                self.observation_data[epoch] = {}
-            if gnss_system not in self.observation_data[epoch]:
-                self.observation_data[epoch][gnss_system] = {}
-            self.observation_data[epoch][gnss_system][prn] = obs_data
-            # print("observation data: ")
-            # print(self.observation_data)
-        else:
-            print(
-                f"Warning: GNSS system '{gnss_system}' for PRN {prn} not found in observation types."
-            )
-
-    def _parse_antenna_phase_center_line(self, line):
-        """Parses an 'ANTENNA: PHASECENTER' line."""
-        parts = line.split()
-        gnss_system = parts[0]  # GNSS system code
-        obs_code = parts[1]  # Observation code
-        # Extract the North, East, Up phase center positions
-        north, east, up = float(parts[2]), float(parts[3]), float(parts[4])
-
-        # Initialize the dictionary for the GNSS system if not present
-        if gnss_system not in self.antenna_phase_center:
-            self.antenna_phase_center[gnss_system] = {}
-
-        # Store the phase center info for the observation code
-        self.antenna_phase_center[gnss_system][obs_code] = {
-            "north": north,
-            "east": east,
-            "up": up,
-        }
+    def _grow_epochs(self, min_epochs):
+        """Enlarges the epoch axis of every array to hold at least min_epochs rows."""
+        capacity = len(self.epoch_times)
+        new_capacity = max(min_epochs, 2 * capacity, DEFAULT_EPOCH_CAPACITY)
+
+        for name, fill in _EPOCH_ARRAY_FILL.items():
+            setattr(self, name, _grow_axis(getattr(self, name), 0, new_capacity, fill))
+        for arrays in self.obs_data.values():
+            for name, fill in _OBS_ARRAY_FILL.items():
+                arrays[name] = _grow_axis(arrays[name], 0, new_capacity, fill)
+
+    def _satellite_columns_for(self, system, prns):
+        """Returns the satellite-axis indices of prns, adding columns for unseen satellites."""
+        columns = self._satellite_columns[system]
+        new_prns = [prn for prn in prns if prn not in columns]
+        if new_prns:
+            for prn in new_prns:
+                columns[prn] = len(self.satellites[system])
+                self.satellites[system].append(prn)
+
+            arrays = self.obs_data[system]
+            capacity = arrays["observed"].shape[1]
+            if len(columns) > capacity:
+                new_capacity = max(len(columns), 2 * capacity)
+                for name, fill in _OBS_ARRAY_FILL.items():
+                    arrays[name] = _grow_axis(arrays[name], 1, new_capacity, fill)
+
+        return np.fromiter(
+            (columns[prn] for prn in prns), dtype=np.intp, count=len(prns)
+        )
 
-    def _parse_glonass_code_phase_bias_line(self, line):
-        """Parses a 'GLONASS COD/PHS/BIS' line."""
-        # Initial split of the line based on whitespace
-        parts = line.strip().split()
-
-        # Iterate over the parts in pairs (identifier, bias), excluding the last descriptor part
-        for i in range(
-            0, len(parts) - 2, 2
-        ):  # Excluding 'GLONASS COD/PHS/BIS' by reducing loop range
-            signal_identifier = parts[i]
-            # Check if the next part is a number (float) before attempting conversion
-            if parts[i + 1].replace(".", "", 1).isdigit():
-                bias_correction = float(parts[i + 1])
-            else:
-                bias_correction = None  # Default to None if not a valid float
-
-            # Store the bias correction for the signal identifier
-            self.glonass_code_phase_bias[signal_identifier] = bias_correction
-
-    def _parse_epoch_line(self, line):
-        """Parses an epoch line, accounting for fractional seconds."""
-        parts = line[2:].split()  # Splitting from position 2 to skip '> '
-        year, month, day, hour, minute = map(int, parts[:5])
-        second = float(parts[5])  # Fractional seconds are now correctly parsed as float
-        epoch = np.datetime64(
-            f"{year:04d}-{month:02d}-{day:02d}T{hour:02d}:{minute:02d}:{int(second):02d}"
+    def observation_series(self, prn, obs_code, field="value"):
+        """
+        Returns one PRN/observation code over time as array views.
+
+        :param prn: Satellite, e.g. "I02".
+        :param obs_code: Observation code, e.g. "L5C".
+        :param field: "value", "lli" or "ssi".
+        :return: A tuple (epoch_times, values) for the filled epochs.
+        """
+        system = prn[0]
+        column = self._satellite_columns[system][prn]
+        code = self.observation_codes[system].index(obs_code)
+        return (
+            self.epoch_times[: self.num_epochs],
+            self.obs_data[system][field][: self.num_epochs, column, code],
         )
-        # Note: Fractional part of the seconds is ignored in the final datetime64 object here; adjust if needed
-        return epoch
+
+    def _apply_header(self, header):
+        """Copies the records of a RinexHeader onto the receiver."""
+        self.rinex_version = header.version
+        self.observation_type = header.file_type
+        self.system_type = header.system_name
+        self.program_run_info = (header.program, header.run_by, header.date)
+        self.marker_name = header.marker_name
+        self.marker_number = header.marker_number
+        self.observer = header.observer
+        self.agency = header.agency
+        if header.approx_position_xyz is not None:
+            self.approx_position_xyz = header.approx_position_xyz
+        if header.antenna_delta_hen is not None:
+            (
+                self.antenna_height,
+                self.antenna_east_eccen,
+                self.antenna_north_eccen,
+            ) = header.antenna_delta_hen
+        self.antenna_number = header.antenna_number
+        self.antenna_type = header.antenna_type
+        self.receiver_number = header.receiver_number
+        self.receiver_type = header.receiver_type
+        self.receiver_version = header.receiver_version
+        self.antenna_phase_center = header.antenna_phase_center
+        self.observation_codes = {
+            system: list(codes) for system, codes in header.obs_types.items()
+        }
+        self.phase_shifts = header.phase_shifts
+        self.glonass_slot_frq_num = header.glonass_slot_frq_num
+        self.glonass_code_phase_bias = header.glonass_code_phase_bias
+        self.leap_seconds = header.leap_seconds
+        self.num_of_satellites = header.num_satellites or 0
+        self.interval = header.interval
+        self.time_of_first_obs = header.time_of_first_obs
+        self.time_of_last_obs = header.time_of_last_obs
+        self.time_system = header.time_system or None
+        self.rcv_clock_offs_appl = header.rcv_clock_offs_appl
+        self.scale_factors = header.scale_factors
+        self.prn_obs_counts = header.prn_obs_counts
+
+        for system, codes in self.observation_codes.items():
+            print(f"Final observation codes for {system}: {codes}")
 
     def import_data(self, filepath):
         """Imports RINEX observation data from a given file, parsing the header in detail."""
-        current_prn = None
-        obs_data_start = False
-        obs_counts = []  # Initialize obs_counts here to avoid UnboundLocalError
-        current_epoch = None
-
-        with open(filepath, "r") as file:
-            for line in file:
-                if "END OF HEADER" in line:
-                    # Initialize Empty DataFrames based on parsed header data
-                    obs_data_start = True
-                    self._initialize_obs_data()  # Initialize empty DataFrames after parsing the header
-                    # No need to break; continue reading the file for observation data
-
-                if line.startswith(">"):
-                    obs_data_start = True  # Some of the files doesnt have the line 'END OF HEADER' in their RINEX format
-
-                if not obs_data_start:  # If the observation data not sarted yet
-
-                    header_label = line[60:].strip()
-
-                    if header_label == "RINEX VERSION / TYPE":
-                        self._parse_rinex_version_type_line(line)
-
-                    elif (
-                        header_label == "PGM / RUN BY / DATE"
-                    ):  # Name of the programm , agency creating the current file, date of creation
-                        self.program_run_info = (
-                            line[:20].strip(),
-                            line[20:40].strip(),
-                            line[40:60].strip(),
-                        )
-
-                    elif header_label == "MARKER NAME":  # Name of the Antenna Marker
-                        self.marker_name = line[:20].strip()
-
-                    elif header_label == "MARKER NUMBER":  # Number of Antenna Marker
-                        self.marker_number = line[:20].strip()
-
-                    elif (
-                        header_label == "OBSERVER / AGENCY"
-                    ):  # Name of the observer and Name of the Agency
-                        # Extract and store the observer and agency names
-                        self.observer = line[:20].strip()  # Observer name
-                        self.agency = line[20:60].strip()  # Agency name
-
-                    elif header_label == "APPROX POSITION XYZ":
-                        # Extract and store the X, Y, Z coordinates
-                        x_coord = float(line[0:14].strip())
-                        y_coord = float(line[14:28].strip())
-                        z_coord = float(line[28:42].strip())
-                        self.approx_position_xyz = (x_coord, y_coord, z_coord)
-
-                    elif header_label == "ANTENNA: DELTA H/E/N":
-                        # Extract and store the antenna height and eccentricity
-                        parts = line[
-                            :43
-                        ].split()  # Assume up to 43 characters for the three values
-                        if len(parts) >= 3:
-                            self.antenna_height = float(
-                                parts[0]
-                            )  # Antenna height above the marker
-                            self.antenna_east_eccen = float(parts[1])
-                            self.antenna_north_eccen = float(parts[2])
-
-                    elif header_label == "ANT # / TYPE":
-                        # Extract and store the antenna number and type
-                        self.antenna_number = line[:20].strip()  # Antenna Number
-                        self.antenna_type = line[20:40].strip()  # Antenna Type
-
-                    elif header_label == "REC # / TYPE / VERS":
-                        # Extract and store the receiver number, type, and version
-                        self.receiver_number = line[:20].strip()  # Receiver Number
-                        self.receiver_type = line[20:40].strip()  # Receiver Type
-                        self.receiver_version = line[40:60].strip()  # Receiver Version
-
-                    elif (
-                        header_label == "ANTENNA: PHASECENTER"
-                    ):  # Parsing for "ANTENNA: PHASECENTER" lines
-                        self._parse_antenna_phase_center_line(line)
-
-                    elif (
-                        header_label == "SYS / # / OBS TYPES"
-                        or header_label.startswith("SYS / # / OBS TYPES")
-                    ):
-                        if line[0] in [
-                            "G",
-                            "R",
-                            "E",
-                            "C",
-                            "S",
-                            "I",
-                        ]:  # GNSS system identifiers
-                            system = line[0]
-                            num_obs_types = int(
-                                line.split()[1]
-                            )  # Extract the number of observation types securely
-                            self.current_gnss_system = system
-                            self.observation_codes[system] = []
-                            self.obs_types_remaining = num_obs_types
-
-                            # Start extracting observation codes after the number
-                            start_index = line.find(str(num_obs_types)) + len(
-                                str(num_obs_types)
-                            )
-                            obs_types = line[start_index:].strip().split()
-
-                        else:
-                            # Handle continuation line when there is no GNSS system identifier but obs types are still expected
-                            obs_types = line.strip().split()
-
-                        # Process observation types, ensuring the count is respected
-                        if self.current_gnss_system and self.obs_types_remaining > 0:
-                            num_to_add = min(self.obs_types_remaining, len(obs_types))
-                            self.observation_codes[self.current_gnss_system].extend(
-                                obs_types[:num_to_add]
-                            )
-                            self.obs_types_remaining -= num_to_add
-
-                            if self.obs_types_remaining <= 0:
-                                print(
-                                    f"Final observation codes for {self.current_gnss_system}: {self.observation_codes[self.current_gnss_system]}"
-                                )
-                                self.current_gnss_system = None  # Reset after all observation types for current system are read
-
-                    elif header_label == "SYS / PHASE SHIFT":
-
-                        self._parse_phase_shifts_line(line)
-
-                    elif header_label == "GLONASS SLOT / FRQ #":
-                        # The first character is the number of satellites, which is not always explicitly needed for parsing
-                        entries = (
-                            line[1:60].strip().split()
-                        )  # Strip and split the rest of the line by spaces
-
-                        for entry in entries:
-                            if entry.startswith(
-                                "R"
-                            ):  # Check if the entry is for a GLONASS satellite
-                                slot_number = int(entry[1:3])  # Extract the slot number
-                                frq_number = (
-                                    int(entry[3:]) if len(entry) > 3 else None
-                                )  # Extract the frequency number if available
-                                self.glonass_slot_frq_num[slot_number] = frq_number
-
-                    elif header_label == "LEAP SECONDS":
-                        # Extract and store the number of leap seconds as trsmitted by GPS Almanc information
-                        self.leap_seconds = int(line[:6].strip())
-
-                    elif header_label == "# OF SATELLITES":
-                        # Number of satellites, for which observations are stored in the file.
-                        self.num_of_satellites = int(line[:6].strip())
-
-                    elif header_label == "INTERVAL":
-                        self.interval = float(line[:10].strip())
-
-                    elif header_label == "TIME OF FIRST OBS":
-                        # Parse and store the start time and time system
-                        self.time_of_first_obs = self._parse_time_line(
-                            line[:43].strip()
-                        )
-                        self.time_system = line[48:51].strip()
-
-                    elif header_label == "TIME OF LAST OBS":
-                        # Parse and store the end time
-                        self.time_of_last_obs = self._parse_time_line(line[:43].strip())
-                        # Assuming the time system is the same as specified in TIME OF FIRST OBS, no need to parse again
-
-                    elif header_label == "RCV CLOCK OFFS APPL":
-                        # Parse and store the receiver clock offset application flag
-                        self.rcv_clock_offs_appl = int(line[:6].strip())
-
-                    elif (
-                        header_label.startswith("SYS / SCALE FACTOR")
-                        or header_label == "SYS / SCALE FACTOR"
-                    ):
-                        scale_info = line.split()  # Split the line into components
-                        if line[0] in [
-                            "G",
-                            "R",
-                            "E",
-                            "C",
-                            "S",
-                            "I",
-                        ]:  # If it's a new system identifier
-                            system = scale_info[0]  # GNSS system
-                            scale_factor = int(scale_info[1])  # Scale factor
-                            self.current_gnss_system = (
-                                system  # Update the current GNSS system
-                            )
-                            # Initialize or update scale factor for the current GNSS system
-                            self.scale_factors[system] = scale_factor
-                            # Observation types that the scale factor applies to, if listed on the same line
-                            obs_types = scale_info[3:] if len(scale_info) > 3 else []
-                            if system in self.observation_codes:
-                                self.observation_codes[system].extend(obs_types)
-                            else:
-                                self.observation_codes[system] = obs_types
-                        else:
-                            # Continuation line for the current GNSS system's scale factor
-                            if self.current_gnss_system:
-                                obs_types_continued = line[3:60].strip().split()
-                                self.observation_codes[self.current_gnss_system].extend(
-                                    obs_types_continued
-                                )
-
-                    elif header_label == "PRN / # OF OBS" or current_prn is not None:
-                        if (
-                            line[0].strip() == ""
-                        ):  # This checks if the line is a continuation line
-                            # Continue accumulating obs_counts for the current PRN
-                            additional_counts = [
-                                int(part.strip())
-                                for part in line.strip().split()
-                                if part.strip().isdigit()
-                            ]
-                            obs_counts += additional_counts
-                        else:
-                            if (
-                                current_prn
-                            ):  # Process the previous PRN before moving to a new one
-                                # Finalize observation counts for the current PRN
-                                if (
-                                    current_prn[0] in self.observation_codes
-                                ):  # Ensure GNSS system is recognized
-                                    obs_types = self.observation_codes[current_prn[0]]
-                                    self.prn_obs_counts[current_prn] = dict(
-                                        zip(obs_types, obs_counts)
-                                    )
-
-                            # Reset for a new PRN block
-                            current_prn = line[0:3].strip()  # Extract the PRN code
-                            obs_counts = [
-                                int(part.strip())
-                                for part in line[4:].strip().split()
-                                if part.strip().isdigit()
-                            ]
-
-                        # Handle the end of the last PRN block after exiting the loop
-                        if current_prn and current_prn[0] in self.observation_codes:
-                            obs_types = self.observation_codes[current_prn[0]][
-                                : len(obs_counts)
-                            ]
-                            self.prn_obs_counts[current_prn] = dict(
-                                zip(obs_types, obs_counts)
-                            )
-
-                    elif (
-                        header_label == "GLONASS COD/PHS/BIS"
-                    ):  # Parsing for "GLONASS COD/PHS/BIS" line
-                        self._parse_glonass_code_phase_bias_line(line)
-
-                elif obs_data_start:  # Observation Data started
-                    # check for multiple headers in the file
-                    header_label = line[60:].strip()
-                    if header_label == "RINEX VERSION / TYPE":
-                        obs_data_start = False
-
-                    if obs_data_start:
-                        if line.startswith(">"):
-                            # Parse the new epoch including fractional seconds
-                            current_epoch = self._parse_epoch_line(line)
-                            self.epochs.append(current_epoch)
-                        else:
-                            # Parse observation data
-                            self._parse_prn_obs_line(current_epoch, line)
-
-                            # satellite = line[:3].strip()
-                            # measurements = line[3:].split()  # Assuming measurements are correctly handled as strings here
-                            # if current_epoch:  # Ensure there's a valid current epoch
-                            #     self.observations.append((current_epoch, satellite, measurements))
-        # print("observation data: ")
-        # print(self.observation_data)
+        with stage("Receiver.import_data"), open_rinex(filepath) as file:
+            with stage("header"):
+                header = read_header(file)
+                self._apply_header(header)
+
+            # Preallocate the observation arrays from the parsed header data
+            self._initialize_obs_data()
+
+            # Hand the rest of the file to the streaming epoch decoder; files without
+            # END OF HEADER end the header on their first epoch line
+            first_lines = [header.first_data_line] if header.first_data_line else []
+            self.import_epochs(
+                iter_observation_epochs(
+                    itertools.chain(first_lines, file), self.observation_codes
+                )
+            )
+        count("Receiver.import_data", files=1, epochs=self.num_epochs)
+
+    def import_epochs(self, epochs):
+        """Stores decoded epochs, as yielded by iter_epochs / iter_observation_epochs, in obs_data."""
+        if not self.obs_data:
+            self._initialize_obs_data()
+
+        for epoch in epochs:
+            row = self.num_epochs
+            if row >= len(self.epoch_times):
+                self._grow_epochs(row + 1)
+
+            with stage("store"):
+                self._add_epoch_row(row, epoch["time"])
+                self.epoch_flags[row] = epoch["flag"]
+                self.clock_offsets[row] = epoch["clock_offset"]
+
+                for gnss_system, sat_data in epoch["systems"].items():
+                    columns = self._satellite_columns_for(
+                        gnss_system, sat_data["prn"].tolist()
+                    )
+                    arrays = self.obs_data[gnss_system]
+                    codes = slice(0, sat_data["value"].shape[1])
+                    arrays["value"][row, columns, codes] = sat_data["value"]
+                    arrays["lli"][row, columns, codes] = sat_data["lli"]
+                    arrays["ssi"][row, columns, codes] = sat_data["ssi"]
+                    arrays["observed"][row, columns] = True
+
+            self.num_epochs += 1
+            count("store", epochs=1)
+
+    def _add_epoch_row(self, row, time):
+        """Records the time of a newly filled row in the epoch index."""
+        self.epoch_times[row] = time
+        if row > 0 and self._rows_sorted and self.epoch_times[row - 1] > time:
+            self._rows_sorted = False
+        self._epoch_rows[_epoch_key(time)] = row
+
+    def epoch_row(self, epoch):
+        """Returns the obs_data row of an epoch, or None when it is not stored."""
+        return self._epoch_rows.get(_epoch_key(epoch))
+
+    def _append_epoch(self, epoch, flag=0, clock_offset=np.nan):
+        """Returns the row of an epoch, appending an empty row for a new one."""
+        row = self.epoch_row(epoch)
+        if row is None:
+            row = self.num_epochs
+            if row >= len(self.epoch_times):
+                self._grow_epochs(row + 1)
+            self._add_epoch_row(row, np.datetime64(epoch, "ns"))
+            self.epoch_flags[row] = flag
+            self.clock_offsets[row] = clock_offset
+            self.num_epochs += 1
+        return row
 
     def delete_observation(self, epoch):
-        """Deletes observations for a specific epoch."""
-        self.observations = [obs for obs in self.observations if obs[0] != epoch]
-        if epoch in self.epochs:
-            self.epochs.remove(epoch)
-
-    def append_observation(self, observation, epoch, gnss_system, observation_code):
-        """Appends a new observation."""
-        # This method should be refined based on how you define an observation's structure
-        self.observations.append((epoch, gnss_system, observation))
+        """
+        Deletes the observations of an epoch.
+
+        The row is tombstoned and cleared in place; rows are compacted once
+        COMPACTION_FRACTION of them are deleted, so deletes cost O(1) amortized.
+
+        :return: True when the epoch was stored.
+        """
+        row = self._epoch_rows.pop(_epoch_key(epoch), None)
+        if row is None:
+            return False
+
+        self.epoch_deleted[row] = True
+        for arrays in self.obs_data.values():
+            for name, fill in _OBS_ARRAY_FILL.items():
+                arrays[name][row] = fill
+        self.num_deleted += 1
+
+        if self.num_deleted >= max(
+            COMPACTION_MIN_DELETED, COMPACTION_FRACTION * self.num_epochs
+        ):
+            self.compact()
+        return True
+
+    def append_observation(
+        self, observation, epoch, gnss_system, observation_code, prn, lli=0, ssi=0
+    ):
+        """
+        Appends (or overwrites) one observation of a satellite at an epoch.
+
+        New epochs, systems, observation codes and satellites get their rows and
+        columns on demand; the arrays grow geometrically, so appends are O(1)
+        amortized.
+
+        :param observation: Observation value.
+        :param epoch: Epoch of the observation (anything np.datetime64 accepts).
+        :param gnss_system: GNSS system letter, e.g. "I".
+        :param observation_code: Observation code, e.g. "L5C".
+        :param prn: Satellite, e.g. "I02".
+        """
+        if not self.obs_data and not len(self.epoch_times):
+            self._initialize_obs_data()
         if gnss_system not in self.gnss_systems:
             self.gnss_systems.append(gnss_system)
         if gnss_system not in self.observation_codes:
             self.observation_codes[gnss_system] = [observation_code]
-        elif observation_code not in self.observation_codes[gnss_system]:
-            self.observation_codes[gnss_system].append(observation_code)
+        if gnss_system not in self.obs_data:
+            self._initialize_system(gnss_system, len(self.epoch_times))
+
+        codes = self.observation_codes[gnss_system]
+        if observation_code not in codes:
+            codes.append(observation_code)
+        code = codes.index(observation_code)
+        arrays = self.obs_data[gnss_system]
+        if code >= arrays["value"].shape[2]:
+            new_capacity = max(code + 1, 2 * arrays["value"].shape[2])
+            for name in ("value", "lli", "ssi"):
+                arrays[name] = _grow_axis(
+                    arrays[name], 2, new_capacity, _OBS_ARRAY_FILL[name]
+                )
+
+        row = self._append_epoch(epoch)
+        column = self._satellite_columns_for(gnss_system, [prn])[0]
+        arrays = self.obs_data[gnss_system]
+        arrays["value"][row, column, code] = observation
+        arrays["lli"][row, column, code] = lli
+        arrays["ssi"][row, column, code] = ssi
+        arrays["observed"][row, column] = True
+
+    def compact(self):
+        """
+        Drops tombstoned rows and restores the time order of the rows.
+
+        :return: The number of rows removed.
+        """
+        num_epochs = self.num_epochs
+        rows = np.flatnonzero(~self.epoch_deleted[:num_epochs])
+        if not self._rows_sorted:
+            rows = rows[np.argsort(self.epoch_times[rows], kind="stable")]
+        elif len(rows) == num_epochs:
+            return 0
+
+        kept = len(rows)
+        with stage("compact"):
+            for name, fill in _EPOCH_ARRAY_FILL.items():
+                array = getattr(self, name)
+                array[:kept] = array[rows]
+                array[kept:num_epochs] = fill
+            for arrays in self.obs_data.values():
+                for name, fill in _OBS_ARRAY_FILL.items():
+                    arrays[name][:kept] = arrays[name][rows]
+                    arrays[name][kept:num_epochs] = fill
+
+        self.num_epochs = kept
+        self.num_deleted = 0
+        self._rows_sorted = True
+        self._epoch_rows = dict(
+            zip(self.epoch_times[:kept].astype(np.int64).tolist(), range(kept))
+        )
+        return num_epochs - kept
+
+    def slice_time(self, start, end):
+        """
+        Returns the epochs in [start, end) as views of the stored arrays.
+
+        :param start: First epoch to include (anything np.datetime64 accepts).
+        :param end: Epochs at or after this time are excluded.
+        :return: A dictionary with 'epoch_times', 'epoch_flags', 'clock_offsets' and
+                 'deleted' (tombstones within the range) views, and 'obs_data' with
+                 views of each system's value/lli/ssi/observed arrays.
+        """
+        if not self._rows_sorted:
+            self.compact()
+
+        times = self.epoch_times[: self.num_epochs]
+        rows = slice(
+            np.searchsorted(times, np.datetime64(start, "ns"), side="left"),
+            np.searchsorted(times, np.datetime64(end, "ns"), side="left"),
+        )
+        return {
+            "epoch_times": times[rows],
+            "epoch_flags": self.epoch_flags[rows],
+            "clock_offsets": self.clock_offsets[rows],
+            "deleted": self.epoch_deleted[rows],
+            "obs_data": {
+                system: {name: array[rows] for name, array in arrays.items()}
+                for system, arrays in self.obs_data.items()
+            },
+        }
 
 
-def export_irnss_data_to_file(receiver, filename):
-    """Exports IRNSS observation data to a text file."""
-    # Prepare a list to accumulate data
-    all_data = []
-
-    # Iterate over each epoch in the observation data
-    for epoch, systems_data in receiver.observation_data.items():
-        # Extract data for IRNSS system if available
-        irnss_data = systems_data.get("I", {})
-        # print(f"IRNSS data for epoch {epoch}: {irnss_data}")
-
-        # Iterate over observation types and their data
-        for prn, obs_types_data in irnss_data.items():
-            for obs_type, data in obs_types_data.items():
-                # Prepare a single row per observation
-                all_data.append(
+def iter_observation_rows(receiver, systems, rows_per_chunk):
+    """
+    Yields the observation table of a Receiver in chunks of whole epochs.
+
+    Rows come out ordered by epoch, PRN and observation code without a global sort:
+    epochs are taken in row order, compacting the receiver first when epochs were
+    appended out of time order, and satellites and codes in sorted order.
+
+    :param systems: GNSS system letters to include.
+    :param rows_per_chunk: Approximate number of rows per chunk.
+    :return: Generator of DataFrames with Epoch, Obs_Type, PRN, Value, LoL and SSI.
+    """
+    if not receiver._rows_sorted:
+        receiver.compact()
+
+    num_epochs = receiver.num_epochs
+    systems = sorted(systems)
+    layouts = {}
+    for system in systems:
+        codes = np.array(receiver.observation_codes[system], dtype=object)
+        satellites = np.array(receiver.satellites[system], dtype=object)
+        sat_order = np.argsort(satellites, kind="stable")
+        code_order = np.argsort(codes, kind="stable")
+        layouts[system] = (
+            sat_order,
+            code_order,
+            satellites[sat_order],
+            codes[code_order],
+        )
+
+    rows_per_epoch = sum(
+        len(sat_order) * len(code_order)
+        for sat_order, code_order, _, _ in layouts.values()
+    )
+    epochs_per_chunk = max(1, rows_per_chunk // max(rows_per_epoch, 1))
+
+    for first in range(0, num_epochs, epochs_per_chunk):
+        rows = slice(first, min(first + epochs_per_chunk, num_epochs))
+        frames = []
+        for system in systems:
+            arrays = receiver.obs_data[system]
+            sat_order, code_order, satellites, codes = layouts[system]
+            num_obs_types = len(codes)
+
+            # One row per observed (epoch, PRN) pair, expanded over the system's codes
+            epoch_rows, sat_columns = np.nonzero(arrays["observed"][rows][:, sat_order])
+            epoch_rows += first
+            columns = sat_order[sat_columns]
+            frames.append(
+                pd.DataFrame(
                     {
-                        "Epoch": epoch,
-                        "Obs_Type": obs_type,
-                        "PRN": prn,
-                        "Value": data.get("value"),
-                        "LoL": data.get("loss_of_lock"),
-                        "SSI": data.get("signal_strength"),
+                        "Epoch": np.repeat(
+                            receiver.epoch_times[epoch_rows], num_obs_types
+                        ),
+                        "Obs_Type": np.tile(codes, len(epoch_rows)),
+                        "PRN": np.repeat(satellites[sat_columns], num_obs_types),
+                        "Value": arrays["value"][epoch_rows, columns][
+                            :, code_order
+                        ].ravel(),
+                        "LoL": arrays["lli"][epoch_rows, columns][
+                            :, code_order
+                        ].ravel(),
+                        "SSI": arrays["ssi"][epoch_rows, columns][
+                            :, code_order
+                        ].ravel(),
+                        "epoch_row": np.repeat(epoch_rows, num_obs_types),
                     }
                 )
+            )
 
-    # Convert list to DataFrame
-    if all_data:
-        df = pd.DataFrame(all_data)
-        # print(df.head())  # Print first few rows to check
-        df.sort_values(["Epoch", "PRN", "Obs_Type"], inplace=True)
+        df = pd.concat(frames, ignore_index=True)
+        if len(frames) > 1:
+            # Interleave the systems epoch by epoch; PRNs sort by system letter first
+            df = df.iloc[np.argsort(df["epoch_row"].to_numpy(), kind="stable")]
+        yield df.drop(columns="epoch_row")
+
+
+def export_observations_to_file(
+    receiver,
+    filename,
+    systems=None,
+    stage_name=None,
+    format=None,
+    compression=None,
+    memory_budget=DEFAULT_MEMORY_BUDGET,
+):
+    """
+    Exports the observations of one or more GNSS systems to a file, chunk by chunk.
+
+    :param receiver: Receiver holding imported observations.
+    :param filename: Output file path; the format and compression are inferred from
+                     its extension unless given (tab-separated text by default).
+    :param systems: GNSS system letters to export; every imported system when omitted.
+    :param stage_name: Profiling stage name, defaults to "export_observations_to_file".
+    :param format: Output format, see rinex_export.EXPORT_FORMATS.
+    :param compression: "gzip" or "zstd" for text output, the codec for Parquet/Arrow.
+    :param memory_budget: Approximate bytes held per exported chunk.
+    :return: True when observations were written.
+    """
+    num_epochs = receiver.num_epochs
+    if systems is None:
+        systems = list(receiver.obs_data)
+    systems = [
+        system
+        for system in systems
+        if system in receiver.obs_data
+        and receiver.obs_data[system]["observed"][:num_epochs].any()
+    ]
+    if not systems:
+        return False
+
+    with stage(stage_name or "export_observations_to_file"), ObservationWriter(
+        filename, format, compression
+    ) as writer:
+        for df in iter_observation_rows(receiver, systems, chunk_rows(memory_budget)):
+            writer.write(df)
+
+    print(f"Data exported to {filename} successfully.")
+    return True
 
-        # Write DataFrame to text file
-        df.to_csv(filename, index=False, sep="\t")
 
-        print(f"Data exported to {filename} successfully.")
-    else:
+def export_irnss_data_to_file(receiver, filename):
+    """Exports IRNSS observation data to a text file."""
+    if not export_observations_to_file(
+        receiver, filename, systems=["I"], stage_name="export_irnss_data_to_file"
+    ):
         print("No IRNSS data available to export.")
 
 
 # Example usage
-receiver = Receiver()
+if __name__ == "__main__":
+    receiver = Receiver()
 
-receiver.import_data("ITBR2910.23O")  # Update the filepath accordingly
+    receiver.import_data("ITBR2910.23O")  # Update the filepath accordingly
 
-export_irnss_data_to_file(receiver, "irnss_observation_data.txt")
+    export_irnss_data_to_file(receiver, "irnss_observation_data.txt")
 
-# Example to access IRNSS L1C data
+    # Example to access IRNSS L1C data
 
-# irnss_l1c = receiver.observation_data.get('I', {}).get('L1C', {})
+    # epochs, irnss_l1c = receiver.observation_series("I02", "L1C")
 
-# Example to access GPS L2P data
-# gps_l2p = receiver.observation_data.get('G', {}).get('L2P', {})
+    # Example to access GPS L2P data
+    # epochs, gps_l2p = receiver.observation_series("G05", "L2P")
@@ -0,0 +1,109 @@
+import numpy as np
+import plotly.graph_objects as go
+import dash
+from dash import dcc, html
+from dash.dependencies import Input, Output, State
+
+from rinex_follow import LiveObservations, ObservationFollower
+
+UPDATE_INTERVAL = 2000  # Milliseconds between browser updates
+MAX_LIVE_POINTS = 20000  # Points kept per trace; older points scroll out
+
+# Follow the file the receiver is writing; everything written so far is read first
+file_path = "ACCO0020.24O"
+follower = ObservationFollower(file_path)
+live = LiveObservations()
+follower.subscribe(live)
+follower.poll()
+follower.start()
+
+obs_types = list(
+    dict.fromkeys(
+        code for codes in (follower.obs_types or {}).values() for code in codes
+    )
+)
+
+# Create Dash app
+app = dash.Dash(__name__)
+
+app.layout = html.Div(
+    [
+        html.H1("Live RINEX Observations"),
+        dcc.Dropdown(
+            id="live_obs_type_dropdown",
+            options=[{"label": obs_type, "value": obs_type} for obs_type in obs_types],
+            value=obs_types[-1:],  # Default value
+            multi=True,
+        ),
+        dcc.Graph(id="live_plot"),
+        dcc.Store(id="live_cursor"),
+        dcc.Interval(id="live_interval", interval=UPDATE_INTERVAL),
+    ]
+)
+
+
+def _latest(rows, obs_type):
+    """Returns the rows of one obs type, at most the last MAX_LIVE_POINTS."""
+    selected = np.flatnonzero(rows["obs_type"] == obs_type)[-MAX_LIVE_POINTS:]
+    return {name: column[selected] for name, column in rows.items()}
+
+
+@app.callback(
+    [
+        Output("live_plot", "figure"),
+        Output("live_plot", "extendData"),
+        Output("live_cursor", "data"),
+    ],
+    [Input("live_obs_type_dropdown", "value"), Input("live_interval", "n_intervals")],
+    [State("live_cursor", "data")],
+)
+def update_graph(selected_obs_types, n_intervals, cursor):
+    selected_obs_types = selected_obs_types or []
+    triggered = [trigger["prop_id"] for trigger in dash.callback_context.triggered]
+
+    if cursor is None or "live_obs_type_dropdown.value" in triggered:
+        # New selection: draw everything received so far once
+        rows, cursor = live.since(0, selected_obs_types)
+        fig = go.Figure()
+        for obs_type in selected_obs_types:
+            latest = _latest(rows, obs_type)
+            fig.add_trace(
+                go.Scattergl(
+                    x=latest["time"],
+                    y=latest["value"],
+                    customdata=latest["prn"],
+                    mode="markers",
+                    marker=dict(size=5),
+                    name=obs_type,
+                    hovertemplate="%{x}<br>%{y}<br>PRN %{customdata}",
+                )
+            )
+        fig.update_layout(
+            title=f"{file_path} (live)",
+            xaxis_title="Time (Epoch)",
+            yaxis_title="Observation Value",
+            legend_title_text="Observation Type",
+            uirevision="obs_live",  # Keep the user's zoom while points are appended
+        )
+        return fig, dash.no_update, cursor
+
+    # Timer tick: send only the observations decoded since the last update
+    rows, new_cursor = live.since(cursor, selected_obs_types)
+    if not len(rows["time"]):
+        return dash.no_update, dash.no_update, new_cursor
+
+    latest = [_latest(rows, obs_type) for obs_type in selected_obs_types]
+    extend = {
+        "x": [trace["time"] for trace in latest],
+        "y": [trace["value"] for trace in latest],
+        "customdata": [trace["prn"] for trace in latest],
+    }
+    return (
+        dash.no_update,
+        (extend, list(range(len(latest))), MAX_LIVE_POINTS),
+        new_cursor,
+    )
+
+
+if __name__ == "__main__":
+    app.run_server(debug=True)
@@ -1,159 +1,48 @@
-import re
-import pandas as pd
+import numpy as np
 import plotly.express as px
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 
-# Constants
-c = 299_792_458  # Speed of light in meters per second
-f1 = 1176.45  # Frequency f1 in MHz
-f2 = 2492.028  # Frequency f2 in MHz
-
-# Convert frequencies from MHz to Hz
-f1_hz = f1 * 1e6
-f2_hz = f2 * 1e6
-
-
-# Function to parse RINEX file
-def parse_rinex_file(file_path):
-    metadata = {}
-    observation_data = []
-
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-
-        header_end = False
-        obs_types = []
-        for i, line in enumerate(lines):
-            if "END OF HEADER" in line:
-                header_end = True
-                header_end_index = i + 1
-                break
-            elif "RINEX VERSION / TYPE" in line:
-                metadata["version"] = line[:9].strip()
-                metadata["file_type"] = line[20:40].strip()
-            elif "PGM / RUN BY / DATE" in line:
-                metadata["program"] = line[:20].strip()
-                metadata["run_by"] = line[20:40].strip()
-                metadata["date"] = line[40:60].strip()
-            elif "MARKER NAME" in line:
-                metadata["marker_name"] = line[:60].strip()
-            elif "MARKER NUMBER" in line:
-                metadata["marker_number"] = line[:60].strip()
-            elif "MARKER TYPE" in line:
-                metadata["marker_type"] = line[:60].strip()
-            elif "OBSERVER / AGENCY" in line:
-                metadata["observer"] = line[:20].strip()
-                metadata["agency"] = line[20:40].strip()
-            elif "REC # / TYPE / VERS" in line:
-                metadata["receiver_number"] = line[:20].strip()
-                metadata["receiver_type"] = line[20:40].strip()
-                metadata["receiver_version"] = line[40:60].strip()
-            elif "ANT # / TYPE" in line:
-                metadata["antenna_number"] = line[:20].strip()
-                metadata["antenna_type"] = line[20:40].strip()
-            elif "APPROX POSITION XYZ" in line:
-                metadata["approx_position_xyz"] = [float(x) for x in line.split()[:3]]
-            elif "ANTENNA: DELTA H/E/N" in line:
-                metadata["antenna_delta_hen"] = [float(x) for x in line.split()[:3]]
-            elif "SYS / # / OBS TYPES" in line:
-                parts = line.split()
-                num_obs_types = int(parts[1])
-                obs_types_line = parts[2:]
-                while len(obs_types_line) < num_obs_types:
-                    i += 1
-                    obs_types_line.extend(lines[i].split())
-                obs_types = obs_types_line[:num_obs_types]
-            elif "SIGNAL STRENGTH UNIT" in line:
-                metadata["signal_strength_unit"] = line[:60].strip()
-            elif "INTERVAL" in line:
-                metadata["interval"] = float(line[:10].strip())
-            elif "TIME OF FIRST OBS" in line:
-                metadata["time_of_first_obs"] = line[:40].strip()
-            elif "TIME OF LAST OBS" in line:
-                metadata["time_of_last_obs"] = line[:40].strip()
-
-        obs_types_specs = {
-            "C5C": (14, 1, 1),
-            "L5C": (16, 1, 1),
-            "D5C": (12, 1, 1),
-            "S5C": (14, 1, 1),
-            "C9C": (14, 1, 1),
-            "L9C": (16, 1, 1),
-            "D9C": (12, 1, 1),
-            "S9C": (14, 1, 1),
-        }
-
-        if header_end:
-            observation_lines = lines[header_end_index:]
-            current_epoch = None
-
-            for line in observation_lines:
-                if re.match(r"^\s*>\s*", line):
-                    epoch_parts = line[1:].strip().split()
-                    year, month, day, hour, minute = epoch_parts[:5]
-                    second = float(epoch_parts[5])
-                    epoch_flag = int(epoch_parts[6])
-                    num_satellites = int(epoch_parts[7])
-                    receiver_clock_offset = (
-                        float(epoch_parts[8]) if len(epoch_parts) > 8 else None
-                    )
-                    current_epoch = f"{year}-{month.zfill(2)}-{day.zfill(2)} {hour.zfill(2)}:{minute.zfill(2)}:{second:02.0f}"
-                else:
-                    if current_epoch:
-                        index = 0
-                        prn = line[index : index + 3].strip()
-                        index += 3
-
-                        for obs_type in obs_types:
-                            value_length, lol_length, ssi_length = obs_types_specs[
-                                obs_type
-                            ]
-                            value = line[index : index + value_length].strip()
-                            value = value.lstrip("0")  # Remove leading zeros
-                            index += value_length
-                            lol = line[index : index + lol_length].strip()
-                            index += lol_length
-                            ssi = line[index : index + ssi_length].strip()
-                            index += ssi_length
-
-                            observation_data.append(
-                                {
-                                    "Epoch": current_epoch,
-                                    "Epoch Flag": epoch_flag,
-                                    "Epoch Satellite Number": num_satellites,
-                                    "Receiver Clock Offset": receiver_clock_offset,
-                                    "Obs_Type": obs_type,
-                                    "PRN": prn,
-                                    "Value": float(value) if value else None,
-                                    "LoL": lol,
-                                    "SSI": ssi,
-                                }
-                            )
-
-    obs_df = pd.DataFrame(observation_data)
-
-    # Calculate L1 and L2 for observation types L5C and LSC
-    obs_df["L1"] = obs_df.apply(
-        lambda row: (c * row["Value"]) / f1_hz if row["Obs_Type"] == "L5C" else None,
-        axis=1,
-    )
-    obs_df["L2"] = obs_df.apply(
-        lambda row: (c * row["Value"]) / f2_hz if row["Obs_Type"] == "L9C" else None,
-        axis=1,
-    )
+from processed_rinex_observation_file import parse_rinex_file
+from rinex_cache import cached_parse
+from rinex_combinations import DEFAULT_BANDS, carrier_frequency, phase_in_metres
+
+
+# Function to load the parsed RINEX file and add L1/L2
+def load_rinex_file(file_path):
+    rinex_data = cached_parse(file_path, parse_rinex_file, "observations")
+    obs_df = rinex_data["observations"].copy()
+
+    # Calculate L1 and L2 (carrier phase in metres) from the phase codes of each
+    # system's default band pair, e.g. L5C/L9C for IRNSS or L1C/L2W for GPS
+    system = obs_df["PRN"].str[:1]
+    obs_df["L1"] = np.nan
+    obs_df["L2"] = np.nan
+    for gnss_system, bands in DEFAULT_BANDS.items():
+        if gnss_system == "R":
+            continue  # GLONASS FDMA frequencies depend on the satellite channel
+        for column, band in zip(("L1", "L2"), bands):
+            rows = (
+                (system == gnss_system)
+                & obs_df["Obs_Type"].str.startswith("L")
+                & (obs_df["Obs_Type"].str[1:2] == band)
+            )
+            if rows.any():
+                obs_df.loc[rows, column] = phase_in_metres(
+                    obs_df.loc[rows, "Value"], carrier_frequency(gnss_system, band)
+                )
 
     # Forward fill the L1 and L2 values for corresponding PRNs
     obs_df["L1"] = obs_df.groupby("PRN")["L1"].ffill()
     obs_df["L2"] = obs_df.groupby("PRN")["L2"].ffill()
 
-    return {"metadata": metadata, "observations": obs_df}
+    return {"metadata": rinex_data["metadata"], "observations": obs_df}
 
 
 # Parse the RINEX file
 file_path = "ACCO0020.24O"
-rinex_data = parse_rinex_file(file_path)
+rinex_data = load_rinex_file(file_path)
 
 # Save processed observation data to CSV
 output_file_path = "processed_rinex_data.csv"
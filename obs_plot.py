@@ -1,141 +1,47 @@
-import re
+import numpy as np
 import pandas as pd
-import plotly.express as px
+import plotly.graph_objects as go
 import dash
 from dash import dcc, html
 from dash.dependencies import Input, Output
 
+from processed_rinex_observation_file import parse_rinex_file
+from rinex_cache import cached_parse, default_cache
+from rinex_downsample import downsample, visible_range
+from rinex_figure_memo import FigureMemo, shared_store
+from rinex_group_index import GroupIndex
+from rinex_pyramid import choose_level, cached_pyramid, pyramid_series
 
-# Function to parse RINEX file
-def parse_rinex_file(file_path):
-    metadata = {}
-    observation_data = []
-
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-
-        header_end = False
-        obs_types = []
-        for i, line in enumerate(lines):
-            if "END OF HEADER" in line:
-                header_end = True
-                header_end_index = i + 1
-                break
-            elif "RINEX VERSION / TYPE" in line:
-                metadata["version"] = line[:9].strip()
-                metadata["file_type"] = line[20:40].strip()
-            elif "PGM / RUN BY / DATE" in line:
-                metadata["program"] = line[:20].strip()
-                metadata["run_by"] = line[20:40].strip()
-                metadata["date"] = line[40:60].strip()
-            elif "MARKER NAME" in line:
-                metadata["marker_name"] = line[:60].strip()
-            elif "MARKER NUMBER" in line:
-                metadata["marker_number"] = line[:60].strip()
-            elif "MARKER TYPE" in line:
-                metadata["marker_type"] = line[:60].strip()
-            elif "OBSERVER / AGENCY" in line:
-                metadata["observer"] = line[:20].strip()
-                metadata["agency"] = line[20:40].strip()
-            elif "REC # / TYPE / VERS" in line:
-                metadata["receiver_number"] = line[:20].strip()
-                metadata["receiver_type"] = line[20:40].strip()
-                metadata["receiver_version"] = line[40:60].strip()
-            elif "ANT # / TYPE" in line:
-                metadata["antenna_number"] = line[:20].strip()
-                metadata["antenna_type"] = line[20:40].strip()
-            elif "APPROX POSITION XYZ" in line:
-                metadata["approx_position_xyz"] = [float(x) for x in line.split()[:3]]
-            elif "ANTENNA: DELTA H/E/N" in line:
-                metadata["antenna_delta_hen"] = [float(x) for x in line.split()[:3]]
-            elif "SYS / # / OBS TYPES" in line:
-                parts = line.split()
-                num_obs_types = int(parts[1])
-                obs_types_line = parts[2:]
-                while len(obs_types_line) < num_obs_types:
-                    i += 1
-                    obs_types_line.extend(lines[i].split())
-                obs_types = obs_types_line[:num_obs_types]
-            elif "SIGNAL STRENGTH UNIT" in line:
-                metadata["signal_strength_unit"] = line[:60].strip()
-            elif "INTERVAL" in line:
-                metadata["interval"] = float(line[:10].strip())
-            elif "TIME OF FIRST OBS" in line:
-                metadata["time_of_first_obs"] = line[:40].strip()
-            elif "TIME OF LAST OBS" in line:
-                metadata["time_of_last_obs"] = line[:40].strip()
-
-        obs_types_specs = {
-            "C5C": (14, 1, 1),
-            "L5C": (16, 1, 1),
-            "D5C": (12, 1, 1),
-            "S5C": (14, 1, 1),
-            "C9C": (14, 1, 1),
-            "L9C": (16, 1, 1),
-            "D9C": (12, 1, 1),
-            "S9C": (14, 1, 1),
-        }
-
-        if header_end:
-            observation_lines = lines[header_end_index:]
-            current_epoch = None
-
-            for line in observation_lines:
-                if re.match(r"^\s*>\s*", line):
-                    epoch_parts = line[1:].strip().split()
-                    year, month, day, hour, minute = epoch_parts[:5]
-                    second = float(epoch_parts[5])
-                    epoch_flag = int(epoch_parts[6])
-                    num_satellites = int(epoch_parts[7])
-                    receiver_clock_offset = (
-                        float(epoch_parts[8]) if len(epoch_parts) > 8 else None
-                    )
-                    current_epoch = f"{year}-{month.zfill(2)}-{day.zfill(2)} {hour.zfill(2)}:{minute.zfill(2)}:{second:02.0f}"
-                else:
-                    if current_epoch:
-                        index = 0
-                        prn = line[index : index + 3].strip()
-                        index += 3
-
-                        for obs_type in obs_types:
-                            value_length, lol_length, ssi_length = obs_types_specs[
-                                obs_type
-                            ]
-                            value = line[index : index + value_length].strip()
-                            value = value.lstrip("0")  # Remove leading zeros
-                            index += value_length
-                            lol = line[index : index + lol_length].strip()
-                            index += lol_length
-                            ssi = line[index : index + ssi_length].strip()
-                            index += ssi_length
-
-                            observation_data.append(
-                                {
-                                    "Epoch": current_epoch,
-                                    "Epoch Flag": epoch_flag,
-                                    "Epoch Satellite Number": num_satellites,
-                                    "Receiver Clock Offset": receiver_clock_offset,
-                                    "Obs_Type": obs_type,
-                                    "PRN": prn,
-                                    "Value": value,
-                                    "LoL": lol,
-                                    "SSI": ssi,
-                                }
-                            )
-
-    obs_df = pd.DataFrame(observation_data)
-    return {"metadata": metadata, "observations": obs_df}
-
+DEFAULT_GRAPH_WIDTH = 1200  # Pixels, until the browser reports the window width
+POINTS_PER_PIXEL = 40  # Points drawn per pixel of graph width, over all traces
 
 # Parse the RINEX file
 file_path = "ACCO0020.24O"
-rinex_data = parse_rinex_file(file_path)
+rinex_data = cached_parse(file_path, parse_rinex_file, "observations")
 
 # Save processed observation data to CSV
 output_file_path = "processed_rinex_data.csv"
 rinex_data["observations"].to_csv(output_file_path, index=False)
 print(f"\nProcessed observation data saved to {output_file_path}")
 
+# Columns as NumPy arrays once, and the rows of every (obs type, PRN) series as a
+# precomputed range, so the callbacks never scan the table
+observations = rinex_data["observations"]
+epoch_times = pd.to_datetime(observations["Epoch"]).to_numpy()
+values = observations["Value"].to_numpy(dtype=np.float64)
+series_index = GroupIndex(observations["Obs_Type"], observations["PRN"])
+data_range = epoch_times.min(), epoch_times.max()
+
+# Min/max/mean/count aggregates at several resolutions, drawn instead of the raw
+# samples once the view spans more buckets of a level than the graph has pixels
+pyramid = cached_pyramid(file_path)
+sampling_interval = rinex_data["metadata"].get("interval") or 0
+
+# Built figures, shared with the other workers when RINEX_FIGURE_CACHE is set
+figure_memo = FigureMemo(
+    f"obs_plot-{default_cache().content_hash(file_path)}", shared=shared_store()
+)
+
 # Create Dash app
 app = dash.Dash(__name__)
 
@@ -162,35 +68,125 @@ app.layout = html.Div(
             value=rinex_data["observations"]["PRN"].unique().tolist(),  # Default value
             multi=True,
         ),
+        dcc.Store(id="graph_width"),
         dcc.Graph(id="obs_plot"),
     ]
 )
 
+# Report the browser window width so the point budget follows the graph size
+app.clientside_callback(
+    "function(id) { return window.innerWidth; }",
+    Output("graph_width", "data"),
+    Input("obs_plot", "id"),
+)
+
 
 @app.callback(
     Output("obs_plot", "figure"),
-    [Input("obs_type_dropdown", "value"), Input("prn_dropdown", "value")],
+    [
+        Input("obs_type_dropdown", "value"),
+        Input("prn_dropdown", "value"),
+        Input("obs_plot", "relayoutData"),
+        Input("graph_width", "data"),
+    ],
 )
-def update_graph(selected_obs_types, selected_prns):
-    filtered_df = rinex_data["observations"][
-        (rinex_data["observations"]["Obs_Type"].isin(selected_obs_types))
-        & (rinex_data["observations"]["PRN"].isin(selected_prns))
-    ]
+def update_graph(selected_obs_types, selected_prns, relayout_data, graph_width):
+    # Zooming in narrows the window, so the same budget brings back full resolution
+    x_range = visible_range(relayout_data)
+    num_pixels = int(graph_width or DEFAULT_GRAPH_WIDTH)
+    return figure_memo.get_or_build(
+        (selected_obs_types, selected_prns, x_range, num_pixels),
+        lambda: build_figure(selected_obs_types, selected_prns, x_range, num_pixels),
+    )
+
 
-    fig = px.scatter(
-        filtered_df,
-        x="Epoch",
-        y="Value",
-        color="Obs_Type",
+def build_figure(selected_obs_types, selected_prns, x_range, num_pixels):
+    level = choose_level(
+        pyramid["levels"], *(x_range if x_range is not None else data_range), num_pixels
+    )
+    if level is not None and level > sampling_interval:
+        traces = pyramid_traces(selected_obs_types, selected_prns, x_range, level)
+    else:
+        traces = sample_traces(
+            selected_obs_types, selected_prns, x_range, POINTS_PER_PIXEL * num_pixels
+        )
+
+    fig = go.Figure()
+    for obs_type, (times, trace_values, prns) in traces.items():
+        fig.add_trace(
+            go.Scattergl(
+                x=times,
+                y=trace_values,
+                customdata=prns,
+                mode="markers",
+                marker=dict(size=5),
+                name=obs_type,
+                hovertemplate="%{x}<br>%{y}<br>PRN %{customdata}",
+            )
+        )
+
+    fig.update_layout(
         title="Observations Over Time",
-        labels={"Value": "Observation Value", "Epoch": "Time (Epoch)"},
-        hover_data=["PRN"],
+        xaxis_title="Time (Epoch)",
+        yaxis_title="Observation Value",
+        legend_title_text="Observation Type",
+        uirevision="obs_plot",  # Keep the user's zoom across updates
     )
-
-    fig.update_traces(marker=dict(size=5), selector=dict(mode="markers"))
-    fig.update_layout(legend_title_text="Observation Type")
+    if x_range is not None:
+        fig.update_xaxes(range=[str(x_range[0]), str(x_range[1])])
     return fig
 
 
+def sample_traces(selected_obs_types, selected_prns, x_range, max_points):
+    """Returns (times, values, PRNs) of the downsampled raw samples per obs type."""
+    series = {}
+    for (obs_type, prn), rows in series_index.groups(
+        selected_obs_types or [], selected_prns or []
+    ):
+        if x_range is not None:
+            # Rows of a series are in time order, so the window is one slice
+            times = epoch_times[rows]
+            start = np.searchsorted(times, x_range[0], "left")
+            stop = np.searchsorted(times, x_range[1], "right")
+            rows = rows[start:stop]
+        series.setdefault(obs_type, []).append((prn, rows))
+
+    traces = {}
+    for obs_type, type_series in series.items():
+        budget = max(4, max_points // len(series) // len(type_series))
+        kept, prns = [], []
+        for prn, rows in type_series:
+            rows = rows[downsample(epoch_times[rows], values[rows], budget)]
+            kept.append(rows)
+            prns.append(np.full(len(rows), prn, dtype=object))
+        kept = np.concatenate(kept)
+        traces[obs_type] = epoch_times[kept], values[kept], np.concatenate(prns)
+    return traces
+
+
+def pyramid_traces(selected_obs_types, selected_prns, x_range, level):
+    """Returns (times, values, PRNs) of each bucket's min and max per obs type."""
+    parts = {}
+    half_bucket = np.timedelta64(level * 500, "ms")
+    for prn, obs_type, buckets in pyramid_series(
+        pyramid, level, selected_obs_types or [], selected_prns or [], x_range
+    ):
+        centres = buckets["time"] + half_bucket
+        parts.setdefault(obs_type, []).append(
+            (
+                np.concatenate([centres, centres]),
+                np.concatenate([buckets["min"], buckets["max"]]),
+                np.full(2 * len(centres), prn, dtype=object),
+            )
+        )
+
+    # Same trace order as the raw samples
+    return {
+        obs_type: tuple(np.concatenate(arrays) for arrays in zip(*parts[obs_type]))
+        for obs_type in series_index.names[0]
+        if obs_type in parts
+    }
+
+
 if __name__ == "__main__":
     app.run_server(debug=True)
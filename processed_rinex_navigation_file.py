@@ -1,127 +1,171 @@
-import re
+import numpy as np
 import pandas as pd
 
+from processed_rinex_observation_file import _fixed_width_buffer
+from rinex_time import _fixed_width_ints, calendar_to_datetime64
+from rinex_cache import cached_parse
+from rinex_compression import open_rinex
+from rinex_header import read_header
+
+NAV_LINE_WIDTH = 80
+NAV_FIELD_START = 4  # Numeric fields start after the 4-char PRN / indent column
+NAV_FIELD_WIDTH = 19
+
+# Broadcast orbit fields per GNSS system in file order: three clock fields on the
+# record's first line, then four per continuation line (None marks spare fields)
+_KEPLERIAN_ORBIT = [
+    "Crs", "Delta n", "M0",
+    "Cuc", "e", "Cus", "sqrt(A)",
+    "Toe", "Cic", "OMEGA0", "Cis",
+    "i0", "Crc", "omega", "OMEGA DOT",
+]  # fmt: skip
+_STATE_VECTOR = [
+    "X", "X Velocity", "X Acceleration", "Health",
+    "Y", "Y Velocity", "Y Acceleration",
+]  # fmt: skip
+NAV_RECORD_FIELDS = {
+    "G": ["SV Clock Bias", "SV Clock Drift", "SV Clock Drift Rate", "IODE"]
+    + _KEPLERIAN_ORBIT
+    + ["IDOT", "Codes on L2", "GPS Week", "L2 P Flag"]
+    + ["SV Accuracy", "SV Health", "TGD", "IODC"]
+    + ["Transmission Time", "Fit Interval", None, None],
+    "J": ["SV Clock Bias", "SV Clock Drift", "SV Clock Drift Rate", "IODE"]
+    + _KEPLERIAN_ORBIT
+    + ["IDOT", "Codes on L2", "GPS Week", "L2 P Flag"]
+    + ["SV Accuracy", "SV Health", "TGD", "IODC"]
+    + ["Transmission Time", "Fit Interval", None, None],
+    "E": ["SV Clock Bias", "SV Clock Drift", "SV Clock Drift Rate", "IODnav"]
+    + _KEPLERIAN_ORBIT
+    + ["IDOT", "Data Sources", "GAL Week", None]
+    + ["SISA", "SV Health", "BGD E5a/E1", "BGD E5b/E1"]
+    + ["Transmission Time", None, None, None],
+    "C": ["SV Clock Bias", "SV Clock Drift", "SV Clock Drift Rate", "AODE"]
+    + _KEPLERIAN_ORBIT
+    + ["IDOT", None, "BDT Week", None]
+    + ["SV Accuracy", "SatH1", "TGD1", "TGD2"]
+    + ["Transmission Time", "AODC", None, None],
+    "I": ["SV Clock Bias", "SV Clock Drift", "SV Clock Drift Rate", "IODE"]
+    + _KEPLERIAN_ORBIT
+    + ["IDOT", None, "IRN Week", None]
+    + ["SV Accuracy", "SV Health", "TGD", None]
+    + ["Transmission Time", None, None, None],
+    "R": ["SV Clock Bias", "SV Relative Frequency Bias", "Message Frame Time"]
+    + _STATE_VECTOR
+    + ["Frequency Number", "Z", "Z Velocity", "Z Acceleration", "Age of Operation"],
+    "S": ["SV Clock Bias", "SV Clock Drift", "Transmission Time"]
+    + _STATE_VECTOR
+    + ["URA", "Z", "Z Velocity", "Z Acceleration", "IODN"],
+}
+
+# Lines per record: 8 for the Keplerian systems, 4 for GLONASS and SBAS state vectors
+NAV_RECORD_LINES = {
+    system: 1 + (len(fields) - 3) // 4 for system, fields in NAV_RECORD_FIELDS.items()
+}
+
+
+def decode_navigation_records(lines):
+    """
+    Decodes the data section of a RINEX 3 navigation file, every system at once.
+
+    Records are framed by the system letter in column 1 in a single pass, and every
+    numeric field of the file (D or E exponents) is converted in one bulk operation.
+
+    :param lines: Lines (bytes) after END OF HEADER.
+    :return: A dictionary mapping system letter to a table with 'PRN', 'Epoch'
+             (datetime64, the time of clock) and the fields of NAV_RECORD_FIELDS.
+    """
+    lines = [line for line in lines if line.strip()]
+    buffer = _fixed_width_buffer(lines, NAV_LINE_WIDTH)
+    num_lines = buffer.shape[0]
+
+    fields = np.ascontiguousarray(buffer[:, NAV_FIELD_START:]).reshape(
+        num_lines, -1, NAV_FIELD_WIDTH
+    )
+    starts = np.flatnonzero(buffer[:, 0] != 32)
+
+    fields[(fields == ord("D")) | (fields == ord("d"))] = ord("E")
+    blank = (fields == 32).all(axis=2)
+    blank[starts, 0] = True  # The epoch occupies the first field of a record
+    text = fields.view(f"S{NAV_FIELD_WIDTH}")[:, :, 0]
+    text[blank] = b"nan"
+    values = text.astype(np.float64)
+
+    record_lengths = np.diff(np.append(starts, num_lines))
+    systems = buffer[starts, 0].view("S1").astype("U1")
+
+    tables = {}
+    for system in dict.fromkeys(systems.tolist()):
+        if system not in NAV_RECORD_FIELDS:
+            print(f"Skipping navigation records of unsupported system {system}")
+            continue
+        expected = NAV_RECORD_LINES[system]
+        selected = (systems == system) & (record_lengths >= expected)
+        if (systems == system).sum() > selected.sum():
+            print(f"Skipping truncated navigation records of system {system}")
+
+        first_lines = starts[selected]
+        rows = buffer[first_lines]
+
+        # Leading blanks of the satellite number, e.g. "G 1" -> "G01"
+        prn_chars = rows[:, :3].copy()
+        prn_chars[prn_chars == 32] = ord("0")
+
+        record_values = values[first_lines[:, np.newaxis] + np.arange(expected)]
+        record_values = record_values.reshape(len(first_lines), -1)[:, 1:]
+
+        table = {
+            "PRN": prn_chars.view("S3").ravel().astype("U3"),
+            "Epoch": calendar_to_datetime64(
+                _fixed_width_ints(rows, 4, 8),
+                _fixed_width_ints(rows, 9, 11),
+                _fixed_width_ints(rows, 12, 14),
+                _fixed_width_ints(rows, 15, 17),
+                _fixed_width_ints(rows, 18, 20),
+                _fixed_width_ints(rows, 21, 23),
+            ),
+        }
+        for i, name in enumerate(NAV_RECORD_FIELDS[system]):
+            if name is not None:
+                table[name] = record_values[:, i]
+        tables[system] = pd.DataFrame(table)
+    return tables
+
+
 def parse_rinex_nav_file(file_path):
-    metadata = {}
-    navigation_data = []
-
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-
-        header_end = False
-        for i, line in enumerate(lines):
-            if "END OF HEADER" in line:
-                header_end = True
-                header_end_index = i + 1
-                break
-            elif "RINEX VERSION / TYPE" in line:
-                metadata["version"] = line[:9].strip()
-                metadata["file_type"] = line[20:40].strip()
-            elif "PGM / RUN BY / DATE" in line:
-                metadata["program"] = line[:20].strip()
-                metadata["run_by"] = line[20:40].strip()
-                metadata["date"] = line[40:60].strip()
-            elif "ION ALPHA" in line:
-                metadata["ion_alpha"] = [float(x) for x in line[2:].split()[:4]]
-            elif "ION BETA" in line:
-                metadata["ion_beta"] = [float(x) for x in line[2:].split()[:4]]
-            elif "DELTA-UTC: A0,A1,T,W" in line:
-                metadata["delta_utc"] = [float(x) for x in line[3:].split()[:4]]
-            elif "LEAP SECONDS" in line:
-                metadata["leap_seconds"] = int(line.split()[0])
-
-        if header_end:
-            nav_lines = lines[header_end_index:]
-            num_lines_per_record = 8  # Typically 8 lines per satellite record in a GPS RINEX Nav file
-            for i in range(0, len(nav_lines), num_lines_per_record):
-                record_lines = nav_lines[i:i + num_lines_per_record]
-
-                # Print the first line for debugging purposes
-                print(f"Record line 0: {record_lines[0].strip()}")
-
-                # First line contains PRN and epoch
-                try:
-                    prn = record_lines[0][:3].strip()
-                    year = int(record_lines[0][4:8].strip())  # Assuming 2000+ for RINEX 3
-                    month = int(record_lines[0][9:11].strip())
-                    day = int(record_lines[0][12:14].strip())
-                    hour = int(record_lines[0][15:17].strip())
-                    minute = int(record_lines[0][18:20].strip())
-                    second_str = record_lines[0][21:23].strip()
-                    second = float(second_str.replace(" ", "").replace("0", "", 1))
-                except ValueError as e:
-                    print(f"Error parsing epoch data: {e} | Line: {record_lines[0]}")
-                    continue
-
-                epoch = f"{year}-{month:02}-{day:02} {hour:02}:{minute:02}:{second:05.2f}"
-
-                # SV clock data
-                try:
-                    sv_clock_bias = float(record_lines[0][23:42].strip())
-                    sv_clock_drift = float(record_lines[0][43:61].strip())
-                    sv_clock_drift_rate = float(record_lines[0][62:80].strip())
-                except ValueError as e:
-                    print(f"Error parsing SV clock data: {e}")
-                    continue
-
-                # Additional ephemeris data from following lines
-                try:
-                    nav_record = {
-                        "PRN": prn,
-                        "Epoch": epoch,
-                        "SV Clock Bias": sv_clock_bias,
-                        "SV Clock Drift": sv_clock_drift,
-                        "SV Clock Drift Rate": sv_clock_drift_rate,
-                        "IODE": float(record_lines[1][4:23].strip()),
-                        "Crs": float(record_lines[1][23:42].strip()),
-                        "Delta n": float(record_lines[1][42:61].strip()),
-                        "M0": float(record_lines[1][61:80].strip()),
-                        "Cuc": float(record_lines[2][4:23].strip()),
-                        "e": float(record_lines[2][23:42].strip()),
-                        "Cus": float(record_lines[2][42:61].strip()),
-                        "sqrt(A)": float(record_lines[2][61:80].strip()),
-                        "Toe": float(record_lines[3][4:23].strip()),
-                        "Cic": float(record_lines[3][23:42].strip()),
-                        "OMEGA0": float(record_lines[3][42:61].strip()),
-                        "Cis": float(record_lines[3][61:80].strip()),
-                        "i0": float(record_lines[4][4:23].strip()),
-                        "Crc": float(record_lines[4][23:42].strip()),
-                        "omega": float(record_lines[4][42:61].strip()),
-                        "OMEGA DOT": float(record_lines[4][61:80].strip()),
-                        "IDOT": float(record_lines[5][4:23].strip()),
-
-
-                        
-                        "IRN Week": float(record_lines[5][42:61].strip()),
-                       
-                        "SV Accuracy": float(record_lines[6][4:23].strip()),
-                        "SV Health": float(record_lines[6][23:42].strip()),
-                        "TGD": float(record_lines[6][42:61].strip()),
-                       
-                        "Transmission Time": float(record_lines[7][4:23].strip()),
-                   
-                    }
-                except ValueError as e:
-                    print(f"Error parsing ephemeris data: {e}")
-                    continue
-
-                navigation_data.append(nav_record)
-
-    nav_df = pd.DataFrame(navigation_data)
-    return {"metadata": metadata, "navigation": nav_df}
-
-file_path = "ACCO0010.24N"
-rinex_data = parse_rinex_nav_file(file_path)
-
-print("Metadata:")
-for key, value in rinex_data["metadata"].items():
-    if isinstance(value, list):
-        value = ", ".join(map(str, value))
-    print(f"{key.replace('_', ' ').title()}: {value}")
-
-print("\nNavigation Data:")
-print(rinex_data["navigation"].head())
-
-output_file_path = "processed_rinex_navigation_data.csv"
-rinex_data["navigation"].to_csv(output_file_path, index=False)
-print(f"\nProcessed navigation data saved to {output_file_path}")
+    """
+    Parses a RINEX 3 navigation file, plain or compressed (see open_rinex).
+
+    :return: A dictionary with 'metadata', 'navigation' (every record of the file in one
+             table) and one typed table per GNSS system under 'navigation_<system>',
+             e.g. 'navigation_I'.
+    """
+    with open_rinex(file_path) as file:
+        lines = iter(file.read().splitlines())
+        header = read_header(lines)
+
+    tables = decode_navigation_records(list(lines))
+    result = {"metadata": header.to_metadata()}
+    result["navigation"] = (
+        pd.concat(tables.values(), ignore_index=True) if tables else pd.DataFrame()
+    )
+    for system, table in tables.items():
+        result[f"navigation_{system}"] = table
+    return result
+
+
+if __name__ == "__main__":
+    file_path = "ACCO0010.24N"
+    rinex_data = cached_parse(file_path, parse_rinex_nav_file, "navigation")
+
+    print("Metadata:")
+    for key, value in rinex_data["metadata"].items():
+        if isinstance(value, list):
+            value = ", ".join(map(str, value))
+        print(f"{key.replace('_', ' ').title()}: {value}")
+
+    print("\nNavigation Data:")
+    print(rinex_data["navigation"].head())
+
+    output_file_path = "processed_rinex_navigation_data.csv"
+    rinex_data["navigation"].to_csv(output_file_path, index=False)
+    print(f"\nProcessed navigation data saved to {output_file_path}")
@@ -1,143 +1,675 @@
-import re
+import itertools
+import mmap
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+from rinex_compression import is_memory_mappable, open_rinex
+from rinex_header import read_header
+from rinex_profiling import count, stage
+from rinex_time import _fixed_width_ints, calendar_to_datetime64, epoch_lines_to_ns
+
+PRN_WIDTH = 3  # Satellite identifier at the start of every observation line
+OBS_FIELD_WIDTH = 16  # F14.3 value + 1 char LLI + 1 char SSI
+OBS_VALUE_WIDTH = 14
+EPOCH_FLAG_COLUMN = 31  # Epoch flag column of a '>' epoch line, satellite count follows
+DEFAULT_CHUNK_BYTES = 16 * 1024**2  # Observation text decoded at a time when streaming
+
+
+def _epoch_flag_and_count(line):
+    """Returns the epoch flag and number of satellite (or event record) lines of a '>' line."""
+    # Flag (I1) and satellite count (I3) touch once there are 100 or more satellites
+    return (
+        int(line[EPOCH_FLAG_COLUMN : EPOCH_FLAG_COLUMN + 1]),
+        int(line[EPOCH_FLAG_COLUMN + 1 : EPOCH_FLAG_COLUMN + 4]),
+    )
+
+
+def _parse_epoch_record(line):
+    """Parses a '>' epoch line into its calendar fields, flag, satellite count and clock offset."""
+    parts = line[1:EPOCH_FLAG_COLUMN].split()
+    year, month, day, hour, minute = (int(x) for x in parts[:5])
+    second = float(parts[5])
+    epoch_flag, num_satellites = _epoch_flag_and_count(line)
+    clock = line[EPOCH_FLAG_COLUMN + 4 :].strip()
+    receiver_clock_offset = float(clock) if clock else np.nan
+    return (
+        year,
+        month,
+        day,
+        hour,
+        minute,
+        second,
+        epoch_flag,
+        num_satellites,
+        receiver_clock_offset,
+    )
+
+
+def decode_epoch_lines(epoch_lines):
+    """
+    Decodes '>' epoch lines into per-epoch arrays, every line at once.
+
+    :param epoch_lines: Epoch lines (bytes).
+    :return: A dictionary with 'time' (datetime64[ns], sub-second precision kept),
+             'flag' int8, 'num_satellites' int16 and 'clock_offset' float64 (NaN
+             when blank).
+    """
+    width = max(map(len, epoch_lines), default=0)
+    # Lines without a clock field still need room for the "nan" written below
+    width = max(width, EPOCH_FLAG_COLUMN + 4 + len(b"nan"))
+    buffer = _fixed_width_buffer(epoch_lines, width)
+
+    # Copied: a single line's slice is contiguous and would stay a read-only view
+    clock_chars = buffer[:, EPOCH_FLAG_COLUMN + 4 :].copy()
+    clock_text = clock_chars.view(f"S{clock_chars.shape[1]}").ravel()
+    clock_text[(clock_chars == 32).all(axis=1)] = b"nan"
+
+    return {
+        "time": epoch_lines_to_ns(epoch_lines).view("datetime64[ns]"),
+        "flag": _fixed_width_ints(
+            buffer, EPOCH_FLAG_COLUMN, EPOCH_FLAG_COLUMN + 1
+        ).astype(np.int8),
+        "num_satellites": _fixed_width_ints(
+            buffer, EPOCH_FLAG_COLUMN + 1, EPOCH_FLAG_COLUMN + 4
+        ).astype(np.int16),
+        "clock_offset": clock_text.astype(np.float64),
+    }
+
+
+def split_epoch_blocks(body_lines):
+    """
+    Walks the observation section once and separates epoch records from satellite lines.
+
+    Event epochs (flags 2-5) announce header/comment records instead of satellites;
+    those records are skipped.
+
+    :param body_lines: Lines (bytes) following END OF HEADER.
+    :return: A tuple (epoch_lines, sat_lines, sat_counts) where epoch_lines holds the
+             '>' line of each epoch, sat_lines the satellite lines of all epochs in file
+             order and sat_counts the number of satellite lines belonging to each epoch.
+    """
+    epoch_lines = []
+    sat_lines = []
+    sat_counts = []
+
+    i = 0
+    num_lines = len(body_lines)
+    while i < num_lines:
+        line = body_lines[i]
+        if not line.startswith(b">"):
+            i += 1  # Stray line outside an epoch block
+            continue
+
+        epoch_flag, num_records = _epoch_flag_and_count(line)
+        block = body_lines[i + 1 : i + 1 + num_records]
+        i += 1 + num_records
+
+        if 2 <= epoch_flag <= 5:
+            continue  # Special event: the following records are header lines
+
+        epoch_lines.append(line)
+        sat_lines.extend(block)
+        sat_counts.append(len(block))
+
+    return epoch_lines, sat_lines, sat_counts
+
+
+def _fixed_width_buffer(sat_lines, width):
+    """Packs satellite lines into a (n_lines, width) uint8 array, space padded."""
+    if not sat_lines:
+        return np.empty((0, width), dtype=np.uint8)
+
+    lengths = np.fromiter(map(len, sat_lines), dtype=np.int64, count=len(sat_lines))
+    if not (lengths == width).all():
+        sat_lines = [line[:width].ljust(width) for line in sat_lines]
+    buffer = np.frombuffer(b"".join(sat_lines), dtype=np.uint8)
+    return buffer.reshape(len(sat_lines), width)
+
+
+def _decode_flags(chars):
+    """Converts LLI/SSI characters to int8; blanks (not known) become 0."""
+    digits = chars.astype(np.int16) - 48
+    return np.where((digits >= 0) & (digits <= 9), digits, 0).astype(np.int8)
+
+
+def decode_observation_lines(sat_lines, num_obs_types):
+    """
+    Decodes satellite observation lines with every observation code handled at once.
+
+    :param sat_lines: Satellite lines (bytes) of one or more epoch blocks.
+    :param num_obs_types: Number of observation codes announced for the system.
+    :return: A dictionary with 'prn' (n,) and 'value' float64, 'lli' int8, 'ssi' int8
+             arrays of shape (n, num_obs_types). Blank values are NaN.
+    """
+    width = PRN_WIDTH + OBS_FIELD_WIDTH * num_obs_types
+    buffer = _fixed_width_buffer(sat_lines, width)
+    num_lines = buffer.shape[0]
+
+    prn = np.ascontiguousarray(buffer[:, :PRN_WIDTH]).view(f"S{PRN_WIDTH}").ravel()
+    fields = buffer[:, PRN_WIDTH:].reshape(num_lines, num_obs_types, OBS_FIELD_WIDTH)
+
+    value_chars = np.ascontiguousarray(fields[:, :, :OBS_VALUE_WIDTH])
+    blank = (value_chars == 32).all(axis=2)
+    value_text = value_chars.view(f"S{OBS_VALUE_WIDTH}")[:, :, 0]
+    value_text[blank] = b"nan"
+
+    return {
+        "prn": np.char.strip(prn.astype("U3")),
+        "value": value_text.astype(np.float64),
+        "lli": _decode_flags(fields[:, :, OBS_VALUE_WIDTH]),
+        "ssi": _decode_flags(fields[:, :, OBS_VALUE_WIDTH + 1]),
+    }
+
+
+def read_observation_header(lines):
+    """
+    Reads header records from an iterator of lines (bytes) up to END OF HEADER.
+
+    The iterator is left positioned on the first observation line, so the same
+    file object can be handed straight to the epoch readers.
+
+    :param lines: Iterator of header lines, e.g. a file opened in binary mode.
+    :return: A tuple (metadata, obs_types) where obs_types maps each GNSS system
+             letter to its list of observation codes from SYS / # / OBS TYPES.
+    """
+    with stage("header"):
+        header = read_header(lines)
+    return header.to_metadata(), header.obs_types
+
+
+def iter_observation_epochs(lines, obs_types):
+    """
+    Yields one decoded epoch at a time from the observation section.
+
+    Only the lines of the current epoch block are held in memory, so files of any
+    length can be reduced, filtered or written out in constant memory.
+
+    :param lines: Iterator of observation lines (bytes) positioned after END OF HEADER.
+    :param obs_types: Observation codes per GNSS system, as from read_observation_header.
+    :return: Generator of dictionaries with 'time', 'flag', 'num_satellites',
+             'clock_offset' and 'systems', mapping each system letter to the
+             per-satellite arrays of decode_observation_lines.
+    """
+    lines = iter(lines)
+    for line in lines:
+        if not line.startswith(b">"):
+            continue  # Stray line outside an epoch block
+
+        epoch_flag, num_records = _epoch_flag_and_count(line)
+        block = [raw.rstrip(b"\r\n") for raw in itertools.islice(lines, num_records)]
+        if 2 <= epoch_flag <= 5:
+            continue  # Special event: the following records are header lines
+        record = _parse_epoch_record(line)
+
+        sat_lines_by_system = {}
+        for sat_line in block:
+            sat_lines_by_system.setdefault(sat_line[:1].decode("ascii"), []).append(
+                sat_line
+            )
+
+        systems = {}
+        for system, sat_lines in sat_lines_by_system.items():
+            if system not in obs_types:
+                print(
+                    f"Warning: GNSS system '{system}' not found in observation types."
+                )
+                continue
+            with stage("decode_fields"):
+                systems[system] = decode_observation_lines(
+                    sat_lines, len(obs_types[system])
+                )
+            count("decode_fields", observations=len(sat_lines) * len(obs_types[system]))
+
+        yield {
+            "time": calendar_to_datetime64(*record[:6])[()],
+            "flag": record[6],
+            "num_satellites": record[7],
+            "clock_offset": record[8],
+            "systems": systems,
+        }
+
+
+def iter_epochs(file_path):
+    """
+    Streams a RINEX observation file epoch by epoch.
+
+    :param file_path: Path to the RINEX file, plain or compressed (see open_rinex).
+    :return: Generator of decoded epochs, see iter_observation_epochs.
+    """
+    with open_rinex(file_path) as file:
+        _, obs_types = read_observation_header(file)
+        yield from iter_observation_epochs(file, obs_types)
+
+
+def max_obs_types(obs_types):
+    """Number of 16-char fields of the widest system, i.e. the decoded field count."""
+    return max((len(codes) for codes in obs_types.values()), default=0)
+
+
+def observation_code_table(prn, obs_types):
+    """
+    Maps every decoded field of every satellite line to its observation code.
+
+    Each system has its own field layout from SYS / # / OBS TYPES; lines of
+    systems with fewer codes than the widest system have trailing unused fields.
+
+    :param prn: PRN of each satellite line, e.g. observations["prn"].
+    :param obs_types: Observation codes per GNSS system.
+    :return: An object array of shape (len(prn), max_obs_types(obs_types)) holding
+             the code of each field, or "" for fields the line's system does not use.
+    """
+    width = max_obs_types(obs_types)
+    systems = list(obs_types)
+    table = np.full((len(systems) + 1, width), "", dtype=object)
+    for i, system in enumerate(systems):
+        table[i, : len(obs_types[system])] = obs_types[system]
+
+    # Lines of systems missing from the header map to the last, empty row
+    letters, line_systems = np.unique(
+        np.asarray(prn, dtype="U3").astype("U1"), return_inverse=True
+    )
+    rows = np.array(
+        [
+            systems.index(letter) if letter in obs_types else len(systems)
+            for letter in letters
+        ],
+        dtype=np.intp,
+    )
+    return table[rows[line_systems.reshape(-1)]]
+
+
+def decode_observation_body(body_lines, obs_types):
+    """
+    Decodes a run of complete epoch blocks into per-epoch and per-satellite-line arrays.
+
+    Lines of every GNSS system are decoded together in one pass, with as many
+    fields as the widest system (see observation_code_table for their codes).
 
-def parse_rinex_file(file_path):
-    metadata = {}
-    observation_data = []
-
-    with open(file_path, "r") as file:
-        lines = file.readlines()
-
-        header_end = False
-        obs_types = []
-        for i, line in enumerate(lines):
-            if "END OF HEADER" in line:
-                header_end = True
-                header_end_index = i + 1
-                break
-            elif "RINEX VERSION / TYPE" in line:
-                metadata["version"] = line[:9].strip()
-                metadata["file_type"] = line[20:40].strip()
-            elif "PGM / RUN BY / DATE" in line:
-                metadata["program"] = line[:20].strip()
-                metadata["run_by"] = line[20:40].strip()
-                metadata["date"] = line[40:60].strip()
-            elif "MARKER NAME" in line:
-                metadata["marker_name"] = line[:60].strip()
-            elif "MARKER NUMBER" in line:
-                metadata["marker_number"] = line[:60].strip()
-            elif "MARKER TYPE" in line:
-                metadata["marker_type"] = line[:60].strip()
-            elif "OBSERVER / AGENCY" in line:
-                metadata["observer"] = line[:20].strip()
-                metadata["agency"] = line[20:40].strip()
-            elif "REC # / TYPE / VERS" in line:
-                metadata["receiver_number"] = line[:20].strip()
-                metadata["receiver_type"] = line[20:40].strip()
-                metadata["receiver_version"] = line[40:60].strip()
-            elif "ANT # / TYPE" in line:
-                metadata["antenna_number"] = line[:20].strip()
-                metadata["antenna_type"] = line[20:40].strip()
-            elif "APPROX POSITION XYZ" in line:
-                metadata["approx_position_xyz"] = [float(x) for x in line.split()[:3]]
-            elif "ANTENNA: DELTA H/E/N" in line:
-                metadata["antenna_delta_hen"] = [float(x) for x in line.split()[:3]]
-            elif "SYS / # / OBS TYPES" in line:
-                parts = line.split()
-                num_obs_types = int(parts[1])
-                obs_types_line = parts[2:]
-                while len(obs_types_line) < num_obs_types:
-                    i += 1
-                    obs_types_line.extend(lines[i].split())
-                obs_types = obs_types_line[:num_obs_types]
-            elif "SIGNAL STRENGTH UNIT" in line:
-                metadata["signal_strength_unit"] = line[:60].strip()
-            elif "INTERVAL" in line:
-                metadata["interval"] = float(line[:10].strip())
-            elif "TIME OF FIRST OBS" in line:
-                metadata["time_of_first_obs"] = line[:40].strip()
-            elif "TIME OF LAST OBS" in line:
-                metadata["time_of_last_obs"] = line[:40].strip()
-
-        obs_types_specs = {
-            "C5C": (14, 1, 1),
-            "L5C": (16, 1, 1),
-            "D5C": (12, 1, 1),
-            "S5C": (14, 1, 1),
-            "C9C": (14, 1, 1),
-            "L9C": (16, 1, 1),
-            "D9C": (12, 1, 1),
-            "S9C": (14, 1, 1),
+    :param body_lines: Observation lines (bytes) starting at an epoch line.
+    :param obs_types: Observation codes per GNSS system, as from read_observation_header.
+    :return: A tuple (epochs, observations) of dictionaries of NumPy arrays.
+    """
+    with stage("epoch_lines"):
+        epoch_lines, sat_lines, sat_counts = split_epoch_blocks(body_lines)
+        epochs = decode_epoch_lines(epoch_lines)
+    count("epoch_lines", lines=len(body_lines), epochs=len(epoch_lines))
+
+    num_fields = max_obs_types(obs_types)
+    with stage("decode_fields"):
+        observations = decode_observation_lines(sat_lines, num_fields)
+    count("decode_fields", observations=len(sat_lines) * num_fields)
+    observations["epoch_index"] = np.repeat(
+        np.arange(len(sat_counts), dtype=np.int64), sat_counts
+    )
+    return epochs, observations
+
+
+def _chunk_bounds(mapped, start, num_chunks):
+    """Splits mapped[start:] into up to num_chunks byte ranges cut at '>' epoch lines."""
+    size = len(mapped)
+    bounds = [start]
+    for k in range(1, num_chunks):
+        target = start + (size - start) * k // num_chunks
+        cut = mapped.find(b"\n>", max(target, bounds[-1]) - 1)
+        if cut < 0:
+            break
+        if cut + 1 > bounds[-1]:
+            bounds.append(cut + 1)
+    bounds.append(size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+
+def _decode_chunk(file_path, start, end, obs_types):
+    """Decodes the epoch blocks in bytes [start, end) of a file; runs in a worker process."""
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            lines = mapped[start:end].splitlines()
+    return decode_observation_body(lines, obs_types)
+
+
+def _concatenate_chunks(chunks):
+    """Stitches decoded chunks back into one ordered (epochs, observations) pair."""
+    epoch_offsets = np.cumsum([0] + [len(epochs["time"]) for epochs, _ in chunks[:-1]])
+
+    epochs = {
+        key: np.concatenate([chunk_epochs[key] for chunk_epochs, _ in chunks])
+        for key in chunks[0][0]
+    }
+    observations = {
+        key: np.concatenate([chunk_obs[key] for _, chunk_obs in chunks])
+        for key in chunks[0][1]
+        if key != "epoch_index"
+    }
+    observations["epoch_index"] = np.concatenate(
+        [
+            chunk_obs["epoch_index"] + offset
+            for (_, chunk_obs), offset in zip(chunks, epoch_offsets)
+        ]
+    )
+    return epochs, observations
+
+
+def parse_rinex_arrays(file_path, num_workers=1):
+    """
+    Parse a RINEX observation file into typed NumPy arrays.
+
+    With num_workers > 1 the observation section is cut into chunks at epoch lines
+    and the chunks are decoded in parallel worker processes over a memory map of
+    the file. The header is parsed once here and passed to the workers. Compressed
+    files (see open_rinex) are decompressed as they are read and decoded in this
+    process; use parse_rinex_batch to decode many of them in parallel.
+
+    :param file_path: Path to the RINEX file, plain or compressed.
+    :param num_workers: Number of worker processes; None uses every CPU.
+    :return: A dictionary with 'metadata', 'obs_types' (observation codes per GNSS
+             system), per-epoch arrays under 'epochs' and per-satellite-line arrays
+             under 'observations'.
+    """
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+
+    with open_rinex(file_path) as file:
+        metadata, obs_types = read_observation_header(file)
+
+        num_workers = num_workers if is_memory_mappable(file) else 1
+        if num_workers > 1:
+            header_end = file.tell()
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                bounds = _chunk_bounds(mapped, header_end, num_workers)
+        else:
+            with stage("read"):
+                lines = file.read().splitlines()
+            count("read", bytes=file.tell())
+
+    if num_workers > 1:
+        with stage("parallel_decode"), ProcessPoolExecutor(
+            max_workers=min(num_workers, len(bounds))
+        ) as executor:
+            futures = [
+                executor.submit(_decode_chunk, file_path, start, end, obs_types)
+                for start, end in bounds
+            ]
+            epochs, observations = _concatenate_chunks(
+                [future.result() for future in futures]
+            )
+    else:
+        epochs, observations = decode_observation_body(lines, obs_types)
+
+    return {
+        "metadata": metadata,
+        "obs_types": obs_types,
+        "epochs": epochs,
+        "observations": observations,
+    }
+
+
+def _iter_body_lines(file, chunk_bytes):
+    """Yields the observation section of a file opened by open_rinex, in runs of whole epoch blocks."""
+    if is_memory_mappable(file):
+        header_end = file.tell()
+        size = os.fstat(file.fileno()).st_size
+        if size <= header_end:
+            return
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            num_chunks = max(1, -(-(size - header_end) // chunk_bytes))
+            for start, end in _chunk_bounds(mapped, header_end, num_chunks):
+                with stage("read"):
+                    lines = mapped[start:end].splitlines()
+                count("read", bytes=end - start)
+                yield lines
+        return
+
+    # Decompressed streams are read in order and cut after their last complete epoch
+    pending = b""
+    while True:
+        with stage("read"):
+            data = file.read(chunk_bytes)
+        count("read", bytes=len(data))
+        if not data:
+            break
+        data = pending + data
+        cut = data.rfind(b"\n>") + 1
+        if cut:
+            yield data[:cut].splitlines()
+            pending = data[cut:]
+        else:
+            pending = data
+    if pending:
+        yield pending.splitlines()
+
+
+def iter_observation_chunks(file_path, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Decodes a RINEX observation file in chunks of whole epoch blocks, in file order.
+
+    Only one chunk is decoded at a time, so memory stays bounded by chunk_bytes
+    whatever the length of the file.
+
+    :param file_path: Path to the RINEX file, plain or compressed (see open_rinex).
+    :param chunk_bytes: Approximate size of the observation text decoded per chunk.
+    :return: Generator of dictionaries shaped like parse_rinex_arrays' result, one
+             per chunk, with epoch_index relative to the chunk.
+    """
+    with open_rinex(file_path) as file:
+        metadata, obs_types = read_observation_header(file)
+        for lines in _iter_body_lines(file, chunk_bytes):
+            epochs, observations = decode_observation_body(lines, obs_types)
+            yield {
+                "metadata": metadata,
+                "obs_types": obs_types,
+                "epochs": epochs,
+                "observations": observations,
+            }
+
+
+def parse_rinex_batch(file_paths, num_workers=None):
+    """
+    Parses many (typically compressed) RINEX observation files, one per worker process.
+
+    :param file_paths: Paths of the RINEX files.
+    :param num_workers: Number of worker processes; None uses every CPU.
+    :return: A list of parse_rinex_arrays results aligned with file_paths.
+    """
+    file_paths = list(file_paths)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers == 1 or len(file_paths) < 2:
+        return [parse_rinex_arrays(file_path) for file_path in file_paths]
+
+    with stage("parallel_decode"), ProcessPoolExecutor(
+        max_workers=min(num_workers, len(file_paths))
+    ) as executor:
+        return list(executor.map(parse_rinex_arrays, file_paths))
+
+
+def _observation_rows(rinex_arrays):
+    """
+    Selects the (satellite line, field) pairs that hold an observation code.
+
+    :return: A tuple (line_index, fields, codes): the satellite line of each row, an
+             index into the raveled (n_lines, n_fields) arrays, and each row's code.
+    """
+    observations = rinex_arrays["observations"]
+    codes = observation_code_table(observations["prn"], rinex_arrays["obs_types"])
+    num_lines, num_fields = codes.shape
+
+    used = codes != ""
+    if used.all():
+        # Single-system files: every field is used, no selection needed
+        return (
+            np.repeat(np.arange(num_lines), num_fields),
+            slice(None),
+            codes.ravel(),
+        )
+    fields = np.flatnonzero(used.ravel())
+    return fields // max(num_fields, 1), fields, codes.ravel()[fields]
+
+
+def observations_to_dataframe(rinex_arrays):
+    """Builds the one-row-per-(PRN, obs type) DataFrame from parse_rinex_arrays' result."""
+    epochs = rinex_arrays["epochs"]
+    observations = rinex_arrays["observations"]
+
+    line_index, fields, codes = _observation_rows(rinex_arrays)
+    epoch_index = observations["epoch_index"][line_index]
+    epoch_strings = np.char.replace(
+        np.datetime_as_string(epochs["time"], unit="s"), "T", " "
+    )
+
+    # One row per (PRN, obs type), in file order
+    obs_df = pd.DataFrame(
+        {
+            "Epoch": epoch_strings[epoch_index],
+            "Epoch Flag": epochs["flag"][epoch_index],
+            "Epoch Satellite Number": epochs["num_satellites"][epoch_index],
+            "Receiver Clock Offset": epochs["clock_offset"][epoch_index],
+            "Obs_Type": codes,
+            "PRN": observations["prn"][line_index],
+            "Value": observations["value"].ravel()[fields],
+            "LoL": observations["lli"].ravel()[fields],
+            "SSI": observations["ssi"].ravel()[fields],
+        }
+    )
+    return obs_df
+
+
+def observations_to_compact_tables(rinex_arrays):
+    """
+    Builds the compact schema from parse_rinex_arrays' result.
+
+    :return: A tuple (obs_df, epochs_df). obs_df holds one row per (PRN, obs type)
+             with datetime64[ns] epochs, categorical PRN/Obs_Type, float64 values
+             (NaN for blanks) and int8 LLI/SSI; epochs_df holds the epoch flag,
+             satellite count and receiver clock offset once per epoch.
+    """
+    epochs = rinex_arrays["epochs"]
+    observations = rinex_arrays["observations"]
+
+    line_index, fields, codes = _observation_rows(rinex_arrays)
+    prns, prn_codes = np.unique(observations["prn"], return_inverse=True)
+
+    # Observation codes of every system, in header order
+    categories = list(
+        dict.fromkeys(
+            code
+            for codes_of_system in rinex_arrays["obs_types"].values()
+            for code in codes_of_system
+        )
+    )
+    code_dtype = np.int8 if len(categories) < 128 else np.int16
+    category_codes = pd.Categorical(codes, categories=categories).codes
+
+    obs_df = pd.DataFrame(
+        {
+            "Epoch": epochs["time"][observations["epoch_index"][line_index]],
+            "PRN": pd.Categorical.from_codes(
+                prn_codes.reshape(-1).astype(np.int16)[line_index], categories=prns
+            ),
+            "Obs_Type": pd.Categorical.from_codes(
+                category_codes.astype(code_dtype), categories=categories
+            ),
+            "Value": observations["value"].ravel()[fields],
+            "LoL": observations["lli"].ravel()[fields],
+            "SSI": observations["ssi"].ravel()[fields],
         }
+    )
+    epochs_df = pd.DataFrame(
+        {
+            "Epoch": epochs["time"],
+            "Epoch Flag": epochs["flag"],
+            "Epoch Satellite Number": epochs["num_satellites"],
+            "Receiver Clock Offset": epochs["clock_offset"],
+        }
+    )
+    return obs_df, epochs_df
+
+
+def parse_rinex_file(file_path, schema="legacy"):
+    """
+    Parse a RINEX observation file into DataFrames.
+
+    :param file_path: Path to the RINEX file.
+    :param schema: "legacy" for one wide row per (PRN, obs type) with the epoch fields
+                   repeated, or "compact" for typed observations plus a separate
+                   per-epoch table under 'epochs'.
+    :return: A dictionary with 'metadata' and 'observations' (and 'epochs' for compact).
+    """
+    if schema not in ("legacy", "compact"):
+        raise ValueError(f"Unknown schema '{schema}', expected 'legacy' or 'compact'")
+
+    with stage("parse_rinex_file"):
+        rinex_arrays = parse_rinex_arrays(file_path)
+        with stage("dataframe"):
+            if schema == "compact":
+                obs_df, epochs_df = observations_to_compact_tables(rinex_arrays)
+                result = {
+                    "metadata": rinex_arrays["metadata"],
+                    "observations": obs_df,
+                    "epochs": epochs_df,
+                }
+            else:
+                result = {
+                    "metadata": rinex_arrays["metadata"],
+                    "observations": observations_to_dataframe(rinex_arrays),
+                }
+        count("dataframe", rows=len(result["observations"]))
+    count("parse_rinex_file", files=1)
+    return result
 
-        if header_end:
-            observation_lines = lines[header_end_index:]
-            current_epoch = None
-
-            for line in observation_lines:
-                if re.match(r"^\s*>\s*", line):
-                    epoch_parts = line[1:].strip().split()
-                    year, month, day, hour, minute = epoch_parts[:5]
-                    second = float(epoch_parts[5])
-                    epoch_flag = int(epoch_parts[6])
-                    num_satellites = int(epoch_parts[7])
-                    receiver_clock_offset = (
-                        float(epoch_parts[8]) if len(epoch_parts) > 8 else None
-                    )
-                    current_epoch = f"{year}-{month.zfill(2)}-{day.zfill(2)} {hour.zfill(2)}:{minute.zfill(2)}:{second:02.0f}"
-                else:
-                    if current_epoch:
-                        index = 0
-                        prn = line[index : index + 3].strip()
-                        index += 3
-
-                        for obs_type in obs_types:
-                            value_length, lol_length, ssi_length = obs_types_specs[
-                                obs_type
-                            ]
-                            value = line[index : index + value_length].strip()
-                            value = value.lstrip("0")  # Remove leading zeros
-                            index += value_length
-                            lol = line[index : index + lol_length].strip()
-                            index += lol_length
-                            ssi = line[index : index + ssi_length].strip()
-                            index += ssi_length
-
-                            observation_data.append(
-                                {
-                                    "Epoch": current_epoch,
-                                    "Epoch Flag": epoch_flag,
-                                    "Epoch Satellite Number": num_satellites,
-                                    "Receiver Clock Offset": receiver_clock_offset,
-                                    "Obs_Type": obs_type,
-                                    "PRN": prn,
-                                    "Value": value,
-                                    "LoL": lol,
-                                    "SSI": ssi,
-                                }
-                            )
-
-    obs_df = pd.DataFrame(observation_data)
-    return {"metadata": metadata, "observations": obs_df}
-
-
-file_path = "ACCO0020.24O"
-rinex_data = parse_rinex_file(file_path)
-
-print("Metadata:")
-for key, value in rinex_data["metadata"].items():
-    if isinstance(value, list):
-        value = ", ".join(map(str, value))
-    elif isinstance(value, dict):
-        value = (
-            f"{value['system']} {value['num_obs_types']} {' '.join(value['obs_types'])}"
+
+def memory_report(rinex_data, file_path=None):
+    """
+    Reports how much memory the parsed tables use per observation.
+
+    :param rinex_data: Result of parse_rinex_file (either schema).
+    :param file_path: The parsed file, to compare against the raw text size.
+    :return: A dictionary with the observation count, table bytes and bytes per observation.
+    """
+    num_observations = len(rinex_data["observations"])
+    table_bytes = sum(
+        int(rinex_data[key].memory_usage(deep=True).sum())
+        for key in ("observations", "epochs")
+        if key in rinex_data
+    )
+    report = {
+        "observations": num_observations,
+        "table_bytes": table_bytes,
+        "bytes_per_observation": table_bytes / max(num_observations, 1),
+    }
+    if file_path is not None:
+        report["raw_bytes_per_observation"] = os.path.getsize(file_path) / max(
+            num_observations, 1
         )
-    print(f"{key.replace('_', ' ').title()}: {value}")
+    return report
+
+
+if __name__ == "__main__":
+    file_path = "ACCO0020.24O"
+    rinex_data = parse_rinex_file(file_path)
 
-print("\nObservations:")
-print(rinex_data["observations"].head())
+    print("Metadata:")
+    for key, value in rinex_data["metadata"].items():
+        if isinstance(value, list):
+            value = ", ".join(map(str, value))
+        elif isinstance(value, dict):
+            value = f"{value['system']} {value['num_obs_types']} {' '.join(value['obs_types'])}"
+        print(f"{key.replace('_', ' ').title()}: {value}")
+
+    print("\nObservations:")
+    print(rinex_data["observations"].head())
+
+    compact_data = parse_rinex_file(file_path, schema="compact")
+    for schema, data in (("legacy", rinex_data), ("compact", compact_data)):
+        report = memory_report(data, file_path)
+        print(
+            f"{schema.title()} schema: {report['bytes_per_observation']:.1f} bytes per observation "
+            f"(raw text: {report['raw_bytes_per_observation']:.1f})"
+        )
 
-output_file_path = "processed_rinex_data.csv"
-rinex_data["observations"].to_csv(output_file_path, index=False)
-print(f"\nProcessed observation data saved to {output_file_path}")
+    output_file_path = "processed_rinex_data.csv"
+    rinex_data["observations"].to_csv(output_file_path, index=False)
+    print(f"\nProcessed observation data saved to {output_file_path}")
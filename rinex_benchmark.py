@@ -0,0 +1,476 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+from processed_rinex_navigation_file import parse_rinex_nav_file
+from processed_rinex_observation_file import parse_rinex_arrays, parse_rinex_file
+from Receiver_class_new import Receiver
+from rinex_combinations import SPEED_OF_LIGHT, carrier_frequency
+from rinex_time import to_week_tow
+
+HISTORY_PATH = "benchmark_history.json"
+START_TIME = np.datetime64("2024-01-02T00:00:00", "ns")  # Same day as ACCO0020.24O
+
+# Observation codes written for each system (ACCO's codes for IRNSS)
+OBS_CODES = {
+    "I": ["C5C", "L5C", "D5C", "S5C", "C9C", "L9C", "D9C", "S9C"],
+    "G": ["C1C", "L1C", "D1C", "S1C", "C2W", "L2W", "D2W", "S2W"],
+    "E": ["C1C", "L1C", "D1C", "S1C", "C5Q", "L5Q", "D5Q", "S5Q"],
+    "C": ["C2I", "L2I", "D2I", "S2I", "C7I", "L7I", "D7I", "S7I"],
+    "J": ["C1C", "L1C", "D1C", "S1C", "C2L", "L2L", "D2L", "S2L"],
+    "R": ["C1C", "L1C", "D1C", "S1C", "C2C", "L2C", "D2C", "S2C"],
+}
+
+# sqrt(A) in m^0.5 of a typical orbit per system
+ORBIT_SQRT_A = {
+    "I": 6493.4,
+    "G": 5153.6,
+    "E": 5440.6,
+    "C": 5282.6,
+    "J": 6493.0,
+}
+
+MISSING_FRACTION = 0.02  # Share of blank observation fields
+NAV_RECORD_INTERVAL = 7200.0  # Seconds between broadcast ephemerides of a satellite
+
+
+def _header_line(content, label):
+    return f"{content:<60}{label:<20}\n"
+
+
+def _time_fields(time):
+    """Returns (year, month, day, hour, minute, seconds) of a datetime64."""
+    seconds_of_day = (time - time.astype("datetime64[D]")) / np.timedelta64(1, "s")
+    date = time.astype("datetime64[D]").item()
+    hour, rest = divmod(seconds_of_day, 3600)
+    minute, second = divmod(rest, 60)
+    return date.year, date.month, date.day, int(hour), int(minute), second
+
+
+def _obs_types_lines(system, codes):
+    """SYS / # / OBS TYPES records, 13 codes per line with continuation lines."""
+    lines = []
+    for i in range(0, len(codes), 13):
+        prefix = f"{system}  {len(codes):3d}" if i == 0 else " " * 6
+        content = prefix + "".join(f" {code}" for code in codes[i : i + 13])
+        lines.append(_header_line(content, "SYS / # / OBS TYPES"))
+    return lines
+
+
+def _observation_header(systems, interval, first, last):
+    file_system = systems[0] if len(systems) == 1 else "M"
+    time_system = {"G": "GPS", "E": "GAL", "C": "BDT", "I": "IRN", "J": "QZS"}.get(
+        file_system, "GPS"
+    )
+    lines = [
+        _header_line(
+            f"{'3.03':>9}{'':11}{'OBSERVATION DATA':<20}{file_system}",
+            "RINEX VERSION / TYPE",
+        ),
+        _header_line(
+            f"{'BENCH GEN':<20}{'npl-rinex':<20}{'02-JAN-24 00:00':<20}",
+            "PGM / RUN BY / DATE",
+        ),
+        _header_line("BENCH", "MARKER NAME"),
+        _header_line("0", "MARKER NUMBER"),
+        _header_line("Human", "MARKER TYPE"),
+        _header_line(f"{'Unknown':<20}Accord", "OBSERVER / AGENCY"),
+        _header_line(f"{'01':<20}{'NGS-C60 CV22':<20}1.0", "REC # / TYPE / VERS"),
+        _header_line(f"{'18730':<20}L5S1", "ANT # / TYPE"),
+        _header_line(
+            f"{1243909.445:14.4f}{5462556.008:14.4f}{3038758.0532:14.4f}",
+            "APPROX POSITION XYZ",
+        ),
+        _header_line(f"{0.0:14.4f}{0.0:14.4f}{0.0:14.4f}", "ANTENNA: DELTA H/E/N"),
+    ]
+    for system in systems:
+        lines.extend(_obs_types_lines(system, OBS_CODES[system]))
+    lines.append(_header_line("DBHZ", "SIGNAL STRENGTH UNIT"))
+    lines.append(_header_line(f"{interval:10.3f}", "INTERVAL"))
+    for time, label in ((first, "TIME OF FIRST OBS"), (last, "TIME OF LAST OBS")):
+        year, month, day, hour, minute, second = _time_fields(time)
+        lines.append(
+            _header_line(
+                f"{year:6d}{month:6d}{day:6d}{hour:6d}{minute:6d}{second:13.7f}"
+                f"     {time_system}",
+                label,
+            )
+        )
+    lines.append(_header_line("", "END OF HEADER"))
+    return lines
+
+
+def _satellite_model(system, num_satellites, rng):
+    """Per-satellite range, range rate and signal strength of the synthetic observations."""
+    ranges = rng.uniform(2.0e7, 4.0e7, num_satellites)
+    range_rates = rng.uniform(-800.0, 800.0, num_satellites)
+    snr = rng.uniform(30.0, 50.0, num_satellites)
+    return ranges, range_rates, snr
+
+
+def _code_frequency(system, code):
+    # GLONASS FDMA: frequency channel 0 is good enough for synthetic values
+    return carrier_frequency(system, code, glonass_channel=0)
+
+
+def generate_observation_file(
+    file_path,
+    days=1,
+    interval=30.0,
+    systems=("I",),
+    satellites_per_system=9,
+    seed=0,
+):
+    """
+    Writes a synthetic RINEX 3.03 observation file modelled on the ACCO files.
+
+    :param file_path: Path of the file to write.
+    :param days: Number of days covered.
+    :param interval: Observation interval in seconds (30, 1, 0.1, ...).
+    :param systems: GNSS system letters; more than one writes a mixed (M) file.
+    :param satellites_per_system: Satellites observed at every epoch, per system.
+    :param seed: Seed of the random generator, so files are reproducible.
+    :return: The number of epochs written.
+    """
+    rng = np.random.default_rng(seed)
+    num_epochs = int(round(days * 86400 / interval))
+    step = np.timedelta64(int(round(interval * 1e9)), "ns")
+    last = START_TIME + (num_epochs - 1) * step
+
+    models = {
+        system: _satellite_model(system, satellites_per_system, rng)
+        for system in systems
+    }
+    prns = {
+        system: [f"{system}{n:02d}" for n in range(1, satellites_per_system + 1)]
+        for system in systems
+    }
+    num_satellites = satellites_per_system * len(systems)
+
+    with open(file_path, "w") as file:
+        file.writelines(_observation_header(list(systems), interval, START_TIME, last))
+
+        for epoch in range(num_epochs):
+            time = START_TIME + epoch * step
+            t = epoch * interval
+            year, month, day, hour, minute, second = _time_fields(time)
+            lines = [
+                f"> {year:4d} {month:02d} {day:02d} {hour:02d} {minute:02d}"
+                f"{second:11.7f}  0{num_satellites:3d}      {1e-4 * np.sin(t / 3600):15.12f}\n"
+            ]
+            for system in systems:
+                ranges, range_rates, snr = models[system]
+                distance = ranges + range_rates * t
+                for k, prn in enumerate(prns[system]):
+                    fields = []
+                    ssi = min(9, max(1, int(snr[k] / 6)))
+                    for code in OBS_CODES[system]:
+                        if rng.random() < MISSING_FRACTION:
+                            fields.append(" " * 16)
+                            continue
+                        kind = code[0]
+                        if kind == "C":
+                            value = distance[k]
+                        elif kind == "L":
+                            value = (
+                                distance[k]
+                                * _code_frequency(system, code)
+                                / SPEED_OF_LIGHT
+                            )
+                        elif kind == "D":
+                            value = (
+                                -range_rates[k]
+                                * _code_frequency(system, code)
+                                / SPEED_OF_LIGHT
+                            )
+                        else:
+                            value = snr[k]
+                        fields.append(f"{value:14.3f} {ssi}")
+                    lines.append(f"{prn}{''.join(fields)}\n")
+            file.writelines(lines)
+    return num_epochs
+
+
+def _nav_field(value):
+    return f"{value:19.12e}"
+
+
+def generate_navigation_file(
+    file_path, days=1, systems=("I",), satellites_per_system=9, seed=0
+):
+    """
+    Writes a synthetic RINEX 3.03 navigation file with Keplerian (GPS/Galileo/BDS/
+    QZSS/IRNSS) broadcast ephemerides every NAV_RECORD_INTERVAL seconds.
+
+    :return: The number of navigation records written.
+    """
+    rng = np.random.default_rng(seed)
+    systems = [system for system in systems if system in ORBIT_SQRT_A]
+    file_system = systems[0] if len(systems) == 1 else "M"
+    num_records = int(days * 86400 / NAV_RECORD_INTERVAL)
+    week, week_seconds = (value.item() for value in to_week_tow(START_TIME))
+
+    lines = [
+        _header_line(
+            f"{'3.03':>9}{'':11}{'N: GNSS NAV DATA':<20}{file_system}",
+            "RINEX VERSION / TYPE",
+        ),
+        _header_line(
+            f"{'BENCH GEN':<20}{'npl-rinex':<20}{'02-JAN-24 00:00':<20}",
+            "PGM / RUN BY / DATE",
+        ),
+        _header_line(f"{18:6d}", "LEAP SECONDS"),
+        _header_line("", "END OF HEADER"),
+    ]
+    for i in range(num_records):
+        toe = week_seconds + i * NAV_RECORD_INTERVAL
+        time = START_TIME + np.timedelta64(int(i * NAV_RECORD_INTERVAL), "s")
+        year, month, day, hour, minute, second = _time_fields(time)
+        for system in systems:
+            for n in range(1, satellites_per_system + 1):
+                orbit = rng.uniform(-1.0, 1.0, 16)
+                fields = [
+                    1e-4 * orbit[0], 1e-11 * orbit[1], 0.0,
+                    float(i % 256), 100.0 * orbit[2], 1e-9 * orbit[3], np.pi * orbit[4],
+                    1e-5 * orbit[5], 0.002 * abs(orbit[6]), 1e-5 * orbit[7], ORBIT_SQRT_A[system],
+                    toe, 1e-7 * orbit[8], np.pi * orbit[9], 1e-7 * orbit[10],
+                    0.5 + 0.05 * orbit[11], 200.0 * orbit[12], np.pi * orbit[13], 1e-9 * orbit[14],
+                    1e-10 * orbit[15], 0.0, week, 0.0,
+                    2.0, 0.0, -1e-9, float(i % 256),
+                    toe + 12.0, 4.0, 0.0, 0.0,
+                ]  # fmt: skip
+                lines.append(
+                    f"{system}{n:02d} {year:4d} {month:02d} {day:02d} {hour:02d} "
+                    f"{minute:02d} {int(second):02d}"
+                    + "".join(_nav_field(value) for value in fields[:3])
+                    + "\n"
+                )
+                for start in range(3, len(fields), 4):
+                    lines.append(
+                        "    "
+                        + "".join(
+                            _nav_field(value) for value in fields[start : start + 4]
+                        )
+                        + "\n"
+                    )
+
+    with open(file_path, "w") as file:
+        file.writelines(lines)
+    return num_records * len(systems) * satellites_per_system
+
+
+def _import_receiver(file_path):
+    receiver = Receiver()
+    receiver.import_data(file_path)
+    return receiver
+
+
+# Parser name -> (function, kind of input file)
+BENCHMARKS = {
+    "parse_rinex_file": (parse_rinex_file, "observation"),
+    "parse_rinex_file[compact]": (
+        lambda file_path: parse_rinex_file(file_path, schema="compact"),
+        "observation",
+    ),
+    "parse_rinex_arrays": (parse_rinex_arrays, "observation"),
+    "Receiver.import_data": (_import_receiver, "observation"),
+    "parse_rinex_nav_file": (parse_rinex_nav_file, "navigation"),
+}
+
+
+def measure(function, file_path, repeat=1, memory=True):
+    """
+    Times function(file_path) and records the peak memory it allocates.
+
+    :return: A dictionary with the best 'seconds' of repeat runs and 'peak_bytes'
+             (traced in a separate run, None when memory is False).
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(file_path)
+        seconds.append(time.perf_counter() - start)
+
+    peak_bytes = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function(file_path)
+            peak_bytes = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return {"seconds": min(seconds), "peak_bytes": peak_bytes}
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(
+    days=1,
+    interval=30.0,
+    systems=("I",),
+    satellites_per_system=9,
+    parsers=None,
+    repeat=1,
+    memory=True,
+    work_dir=None,
+):
+    """
+    Generates synthetic files for a configuration and benchmarks the parsers on them.
+
+    :param parsers: Names from BENCHMARKS to run; all of them when omitted.
+    :param work_dir: Directory for the synthetic files; a temporary one when omitted.
+    :return: A run record: configuration, environment and per-parser results with
+             seconds, epochs/s (records/s for navigation), MB/s and peak memory.
+    """
+    config = {
+        "days": days,
+        "interval": interval,
+        "systems": list(systems),
+        "satellites_per_system": satellites_per_system,
+    }
+    with tempfile.TemporaryDirectory(dir=work_dir) as directory:
+        obs_path = os.path.join(directory, "BENC0020.24O")
+        nav_path = os.path.join(directory, "BENC0020.24N")
+        counts = {
+            "observation": generate_observation_file(
+                obs_path, days, interval, systems, satellites_per_system
+            ),
+            "navigation": generate_navigation_file(
+                nav_path, days, systems, satellites_per_system
+            ),
+        }
+        paths = {"observation": obs_path, "navigation": nav_path}
+        sizes = {kind: os.path.getsize(path) for kind, path in paths.items()}
+        config["observation_bytes"] = sizes["observation"]
+        config["navigation_bytes"] = sizes["navigation"]
+
+        results = {}
+        for name in parsers or BENCHMARKS:
+            function, kind = BENCHMARKS[name]
+            if kind == "navigation" and not counts[kind]:
+                continue
+            result = measure(function, paths[kind], repeat, memory)
+            result["items_per_second"] = counts[kind] / result["seconds"]
+            result["mb_per_second"] = sizes[kind] / 1e6 / result["seconds"]
+            results[name] = result
+            print(
+                f"{name:28s} {result['seconds']:8.3f} s "
+                f"{result['items_per_second']:12.0f} {'epochs' if kind == 'observation' else 'records'}/s "
+                f"{result['mb_per_second']:8.1f} MB/s"
+                + (
+                    f" {result['peak_bytes'] / 1e6:9.1f} MB peak"
+                    if result["peak_bytes"] is not None
+                    else ""
+                )
+            )
+
+    return {
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "config": config,
+        "results": results,
+    }
+
+
+def load_history(history_path=HISTORY_PATH):
+    """Returns the list of recorded runs, oldest first."""
+    try:
+        with open(history_path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return []
+
+
+def append_history(run, history_path=HISTORY_PATH):
+    """Adds a run record to the JSON history file."""
+    history = load_history(history_path)
+    history.append(run)
+    with open(history_path, "w") as file:
+        json.dump(history, file, indent=2)
+
+
+def compare_runs(baseline, current):
+    """
+    Compares the results of two run records parser by parser.
+
+    :return: A dictionary parser -> {'speedup': baseline/current seconds,
+             'memory_ratio': current/baseline peak bytes}.
+    """
+    if baseline["config"] != current["config"]:
+        print("Warning: the runs used different configurations")
+
+    comparison = {}
+    for name, result in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        memory_ratio = None
+        if result["peak_bytes"] and before["peak_bytes"]:
+            memory_ratio = result["peak_bytes"] / before["peak_bytes"]
+        comparison[name] = {
+            "speedup": before["seconds"] / result["seconds"],
+            "memory_ratio": memory_ratio,
+        }
+        print(
+            f"{name:28s} {comparison[name]['speedup']:6.2f}x speed"
+            + (f" {memory_ratio:6.2f}x memory" if memory_ratio is not None else "")
+        )
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the RINEX parsers")
+    parser.add_argument("--days", type=float, default=1)
+    parser.add_argument(
+        "--interval", type=float, default=30.0, help="Seconds, e.g. 30, 1 or 0.1"
+    )
+    parser.add_argument("--systems", default="I", help="System letters, e.g. GEI")
+    parser.add_argument("--satellites", type=int, default=9, help="Per system")
+    parser.add_argument("--parsers", nargs="*", choices=list(BENCHMARKS))
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--no-memory", action="store_true")
+    parser.add_argument("--history", default=HISTORY_PATH)
+    parser.add_argument(
+        "--compare", action="store_true", help="Compare with the previous run"
+    )
+    args = parser.parse_args()
+
+    run = run_benchmarks(
+        days=args.days,
+        interval=args.interval,
+        systems=tuple(args.systems.replace(",", "")),
+        satellites_per_system=args.satellites,
+        parsers=args.parsers,
+        repeat=args.repeat,
+        memory=not args.no_memory,
+    )
+    history = load_history(args.history)
+    if args.compare and history:
+        compare_runs(history[-1], run)
+    append_history(run, args.history)
+    print(f"Run recorded in {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+CACHE_VERSION = 4  # Bump when the parsers' output layout changes
+CACHE_DIR = os.environ.get(
+    "RINEX_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "npl-rinex")
+)
+DEFAULT_MAX_BYTES = 2 * 1024**3  # 2 GiB
+
+_MANIFEST = "manifest.json"
+_ENTRY_META = "meta.json"
+
+
+def _content_hash(file_path, chunk_size=1 << 20):
+    """Returns the BLAKE2b digest of a file's content."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _write_json(path, data):
+    """Writes JSON atomically so concurrent readers never see a partial file."""
+    temp_path = f"{path}.tmp-{os.getpid()}"
+    with open(temp_path, "w") as file:
+        json.dump(data, file)
+    os.replace(temp_path, path)
+
+
+def _to_storable(column):
+    """Converts a column to an array np.save can write without pickling."""
+    array = np.asarray(column)
+    if array.dtype == object or pd.api.types.is_string_dtype(array.dtype):
+        array = np.asarray(column, dtype=str)
+    return array
+
+
+class ParsedDataCache:
+    """
+    Content-addressed on-disk cache of parsed RINEX data.
+
+    Entries are keyed by the file's content hash (looked up through its path, size
+    and mtime) and the parser kind. Tables are stored column by column as .npy files
+    so later loads are memory-mapped reads. The cache is bounded in size and evicts
+    the least recently used entries first.
+    """
+
+    def __init__(self, cache_dir=CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _load_manifest(self):
+        try:
+            with open(os.path.join(self.cache_dir, _MANIFEST)) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def content_hash(self, file_path):
+        """Returns the content hash of file_path, rehashing only when its size or mtime changed."""
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        manifest = self._load_manifest()
+
+        known = manifest.get(path)
+        if (
+            known
+            and known["size"] == stat.st_size
+            and known["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return known["hash"]
+
+        content_hash = _content_hash(path)
+        manifest[path] = {
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "hash": content_hash,
+        }
+        _write_json(os.path.join(self.cache_dir, _MANIFEST), manifest)
+        return content_hash
+
+    def _entry_dir(self, content_hash, kind):
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", kind)
+        return os.path.join(self.cache_dir, f"{content_hash}-{slug}-v{CACHE_VERSION}")
+
+    def load(self, file_path, kind):
+        """Returns the cached parse result of file_path, or None on a miss."""
+        entry_dir = self._entry_dir(self.content_hash(file_path), kind)
+        meta_path = os.path.join(entry_dir, _ENTRY_META)
+        try:
+            with open(meta_path) as file:
+                meta = json.load(file)
+        except (OSError, ValueError):
+            return None
+
+        os.utime(meta_path)  # Mark as recently used
+
+        result = {}
+        for key, item in meta["items"].items():
+            if item["type"] == "value":
+                result[key] = item["value"]
+                continue
+
+            categorical = set(item.get("categorical", []))
+            columns = {}
+            for i, column in enumerate(item["columns"]):
+                values = np.load(
+                    os.path.join(entry_dir, f"{key}.{i}.npy"), mmap_mode="r"
+                )
+                if column in categorical:
+                    categories = np.load(
+                        os.path.join(entry_dir, f"{key}.{i}.categories.npy")
+                    )
+                    values = pd.Categorical.from_codes(values, categories=categories)
+                columns[column] = values
+            if item["type"] == "dataframe":
+                result[key] = pd.DataFrame(columns, copy=False)
+            else:
+                result[key] = columns
+        return result
+
+    def store(self, file_path, kind, result):
+        """
+        Stores a parse result for file_path.
+
+        :param result: Dictionary whose values are DataFrames, dictionaries of arrays
+                       or JSON-serialisable values (metadata, observation types).
+        """
+        entry_dir = self._entry_dir(self.content_hash(file_path), kind)
+        temp_dir = f"{entry_dir}.tmp-{os.getpid()}"
+        os.makedirs(temp_dir, exist_ok=True)
+
+        items = {}
+        for key, value in result.items():
+            categorical = []
+            if isinstance(value, pd.DataFrame):
+                columns = {}
+                for column in value.columns:
+                    if isinstance(value[column].dtype, pd.CategoricalDtype):
+                        # Stored as integer codes plus a separate categories file
+                        categorical.append(column)
+                        columns[column] = value[column].cat.codes.to_numpy()
+                    else:
+                        columns[column] = value[column].to_numpy()
+                item_type = "dataframe"
+            elif isinstance(value, dict) and all(
+                isinstance(column, np.ndarray) for column in value.values()
+            ):
+                columns = value
+                item_type = "arrays"
+            else:
+                items[key] = {"type": "value", "value": value}
+                continue
+
+            for i, (name, column) in enumerate(columns.items()):
+                np.save(os.path.join(temp_dir, f"{key}.{i}.npy"), _to_storable(column))
+                if name in categorical:
+                    np.save(
+                        os.path.join(temp_dir, f"{key}.{i}.categories.npy"),
+                        _to_storable(value[name].cat.categories),
+                    )
+            items[key] = {
+                "type": item_type,
+                "columns": [str(c) for c in columns],
+                "categorical": [str(c) for c in categorical],
+            }
+
+        _write_json(
+            os.path.join(temp_dir, _ENTRY_META),
+            {"source": os.path.abspath(file_path), "kind": kind, "items": items},
+        )
+
+        if os.path.exists(entry_dir):
+            shutil.rmtree(entry_dir, ignore_errors=True)
+        try:
+            os.replace(temp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(
+                temp_dir, ignore_errors=True
+            )  # Another process stored it first
+
+        self.evict(keep=entry_dir)
+
+    def _entries(self):
+        """Returns (last_used, size, path) for every complete cache entry."""
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            entry_dir = os.path.join(self.cache_dir, name)
+            meta_path = os.path.join(entry_dir, _ENTRY_META)
+            if not os.path.isfile(meta_path):
+                continue
+            size = sum(
+                entry.stat().st_size
+                for entry in os.scandir(entry_dir)
+                if entry.is_file()
+            )
+            entries.append((os.stat(meta_path).st_mtime_ns, size, entry_dir))
+        return entries
+
+    def evict(self, keep=None):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in entries:
+            if total <= self.max_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+
+    def invalidate(self, file_path):
+        """Drops every cached result of file_path."""
+        path = os.path.abspath(file_path)
+        manifest = self._load_manifest()
+        known = manifest.pop(path, None)
+        _write_json(os.path.join(self.cache_dir, _MANIFEST), manifest)
+
+        hashes = {known["hash"]} if known else set()
+        if os.path.exists(path):
+            hashes.add(_content_hash(path))
+
+        for name in os.listdir(self.cache_dir):
+            if name.split("-", 1)[0] in hashes:
+                shutil.rmtree(os.path.join(self.cache_dir, name), ignore_errors=True)
+
+    def clear(self):
+        """Removes every cache entry and the manifest."""
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            else:
+                os.remove(path)
+
+
+_default_cache = None
+
+
+def default_cache():
+    """Returns the process-wide cache in CACHE_DIR."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = ParsedDataCache()
+    return _default_cache
+
+
+def cached_parse(file_path, parse, kind, cache=None):
+    """
+    Returns parse(file_path), served from the parsed-data cache when possible.
+
+    :param file_path: Path to the RINEX file.
+    :param parse: Parser returning a dictionary of DataFrames, arrays and metadata.
+    :param kind: Name of the parse result, e.g. "observations" or "navigation".
+    :param cache: ParsedDataCache to use; the default cache when omitted.
+    """
+    if cache is None:
+        cache = default_cache()
+
+    result = cache.load(file_path, kind)
+    if result is None:
+        result = parse(file_path)
+        cache.store(file_path, kind, result)
+    return result
@@ -0,0 +1,270 @@
+import json
+import os
+import re
+import sqlite3
+
+import numpy as np
+
+from rinex_cache import CACHE_DIR
+from rinex_header import scan_headers
+
+CATALOG_PATH = os.environ.get(
+    "RINEX_CATALOG", os.path.join(CACHE_DIR, "catalog.sqlite")
+)
+
+# RINEX 2 short names (.24O, .24N, ...) and RINEX 3 long names (..._MO.rnx, ..._IN.rnx)
+RINEX_FILE_PATTERN = re.compile(
+    r"(\.\d\d[OoNnGgLlPpIiJjDd](\.(gz|Z|bz2|zip))?|_[A-Z][ON]\.(rnx|crx)(\.gz)?)$"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    file_type TEXT,
+    version REAL,
+    systems TEXT,
+    marker_name TEXT,
+    marker_number TEXT,
+    receiver_type TEXT,
+    antenna_type TEXT,
+    interval REAL,
+    time_first INTEGER,
+    time_last INTEGER,
+    time_system TEXT,
+    obs_types TEXT
+);
+CREATE INDEX IF NOT EXISTS files_marker_time ON files (marker_name, time_first);
+CREATE INDEX IF NOT EXISTS files_type_time ON files (file_type, time_first);
+"""
+
+_COLUMNS = (
+    "path",
+    "size",
+    "mtime_ns",
+    "file_type",
+    "version",
+    "systems",
+    "marker_name",
+    "marker_number",
+    "receiver_type",
+    "antenna_type",
+    "interval",
+    "time_first",
+    "time_last",
+    "time_system",
+    "obs_types",
+)
+
+
+def _time_ns(value):
+    """Converts anything np.datetime64 accepts to int64 nanoseconds, keeping None."""
+    if value is None:
+        return None
+    return int(np.datetime64(value, "ns").astype(np.int64))
+
+
+def file_kind(header):
+    """Returns "O" for observation files, "N" for navigation files, else the type letter."""
+    if header.obs_types or header.file_type.startswith("O"):
+        return "O"
+    if (
+        "NAV" in header.file_type
+        or header.ionospheric_corr
+        or header.time_system_corr
+        or re.search(r"(\.\d\d[NGLPIJ]|[A-Z]N\.rnx)$", header.file_path or "", re.I)
+    ):
+        return "N"
+    return header.file_type[:1]
+
+
+def _catalog_row(header, stat):
+    systems = "".join(header.obs_types) or header.satellite_system
+    return (
+        os.path.abspath(header.file_path),
+        stat.st_size,
+        stat.st_mtime_ns,
+        file_kind(header),
+        header.version,
+        systems,
+        header.marker_name,
+        header.marker_number,
+        header.receiver_type,
+        header.antenna_type,
+        header.interval,
+        _time_ns(header.time_of_first_obs),
+        _time_ns(header.time_of_last_obs),
+        header.time_system,
+        json.dumps(header.obs_types),
+    )
+
+
+def find_rinex_files(root):
+    """Yields the RINEX files below a directory."""
+    for directory, _, names in os.walk(root):
+        for name in sorted(names):
+            if RINEX_FILE_PATTERN.search(name):
+                yield os.path.join(directory, name)
+
+
+class RinexCatalog:
+    """
+    SQLite catalog of RINEX file headers, one row per file.
+
+    Rows hold the marker, receiver/antenna, interval, observation time span,
+    systems and observation types, so files can be picked without opening them.
+    Updates only rescan files whose size or mtime changed.
+    """
+
+    def __init__(self, db_path=CATALOG_PATH):
+        self.db_path = db_path
+        directory = os.path.dirname(os.path.abspath(db_path))
+        os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(db_path)
+        self.connection.executescript(_SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def update(self, paths, num_workers=1):
+        """
+        Adds new and changed files to the catalog and drops files that disappeared.
+
+        :param paths: Files and/or directories; directories are searched recursively
+                      for RINEX file names.
+        :param num_workers: Worker processes used to read headers, see scan_headers.
+        :return: A tuple (number of files (re)scanned, number of rows removed).
+        """
+        file_paths = []
+        roots = []
+        for path in paths:
+            if os.path.isdir(path):
+                roots.append(os.path.abspath(path))
+                file_paths.extend(find_rinex_files(path))
+            else:
+                file_paths.append(path)
+
+        known = {
+            path: (size, mtime_ns)
+            for path, size, mtime_ns in self.connection.execute(
+                "SELECT path, size, mtime_ns FROM files"
+            )
+        }
+
+        changed = []
+        stats = {}
+        for file_path in file_paths:
+            try:
+                stat = os.stat(file_path)
+            except OSError:
+                continue
+            stats[os.path.abspath(file_path)] = stat
+            if known.get(os.path.abspath(file_path)) != (
+                stat.st_size,
+                stat.st_mtime_ns,
+            ):
+                changed.append(file_path)
+
+        rows = [
+            _catalog_row(header, stats[os.path.abspath(header.file_path)])
+            for header in scan_headers(changed, num_workers=num_workers)
+            if header is not None
+        ]
+
+        # Files under a scanned directory that no longer exist
+        removed = [
+            path
+            for path in known
+            if path not in stats
+            and any(path.startswith(root + os.sep) for root in roots)
+            and not os.path.exists(path)
+        ]
+
+        with self.connection:
+            self.connection.executemany(
+                f"INSERT OR REPLACE INTO files ({', '.join(_COLUMNS)}) "
+                f"VALUES ({', '.join('?' * len(_COLUMNS))})",
+                rows,
+            )
+            self.connection.executemany(
+                "DELETE FROM files WHERE path = ?", [(path,) for path in removed]
+            )
+        return len(rows), len(removed)
+
+    def query(
+        self,
+        marker_name=None,
+        system=None,
+        start=None,
+        end=None,
+        interval=None,
+        file_type=None,
+        obs_code=None,
+    ):
+        """
+        Selects catalogued files.
+
+        :param marker_name: Station marker name.
+        :param system: GNSS system letter the file must contain, e.g. "I".
+        :param start: Keep files with observations at or after this time.
+        :param end: Keep files with observations before this time.
+        :param interval: Observation interval in seconds.
+        :param file_type: "O" for observation or "N" for navigation files.
+        :param obs_code: Observation code the file must contain, e.g. "L5C".
+        :return: A list of dictionaries, one per file, ordered by first observation.
+        """
+        conditions = []
+        params = []
+        if marker_name is not None:
+            conditions.append("marker_name = ?")
+            params.append(marker_name)
+        if system is not None:
+            conditions.append("instr(systems, ?) > 0")
+            params.append(system)
+        if start is not None:
+            conditions.append("COALESCE(time_last, time_first) >= ?")
+            params.append(_time_ns(start))
+        if end is not None:
+            conditions.append("time_first < ?")
+            params.append(_time_ns(end))
+        if interval is not None:
+            conditions.append("abs(interval - ?) < 1e-6")
+            params.append(float(interval))
+        if file_type is not None:
+            conditions.append("file_type = ?")
+            params.append(file_type)
+        if obs_code is not None:
+            conditions.append("instr(obs_types, ?) > 0")
+            params.append(json.dumps(obs_code))
+
+        sql = f"SELECT {', '.join(_COLUMNS)} FROM files"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY time_first, path"
+
+        records = []
+        for row in self.connection.execute(sql, params):
+            record = dict(zip(_COLUMNS, row))
+            record["obs_types"] = json.loads(record["obs_types"] or "{}")
+            for key in ("time_first", "time_last"):
+                if record[key] is not None:
+                    record[key] = np.datetime64(record[key], "ns")
+            records.append(record)
+        return records
+
+    def paths(self, **criteria):
+        """Returns only the paths of the files matching query(**criteria)."""
+        return [record["path"] for record in self.query(**criteria)]
+
+
+if __name__ == "__main__":
+    catalog = RinexCatalog()
+    scanned, removed = catalog.update(["."])
+    print(f"Catalog {catalog.db_path}: {scanned} files scanned, {removed} removed")
+
+    for record in catalog.query(system="I", file_type="O", interval=30):
+        print(
+            f"{record['path']}: {record['marker_name']} "
+            f"{record['time_first']} - {record['time_last']}"
+        )
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+
+SPEED_OF_LIGHT = 299_792_458.0  # m/s
+
+# Carrier frequencies in Hz per GNSS system and RINEX 3 band digit (second character of the obs code)
+FREQUENCIES = {
+    "I": {"5": 1176.45e6, "9": 2492.028e6},  # IRNSS/NavIC SPS L5 and S
+    "G": {"1": 1575.42e6, "2": 1227.60e6, "5": 1176.45e6},
+    "E": {
+        "1": 1575.42e6,
+        "5": 1176.45e6,
+        "7": 1207.14e6,
+        "8": 1191.795e6,
+        "6": 1278.75e6,
+    },
+    "C": {
+        "1": 1575.42e6,
+        "2": 1561.098e6,
+        "5": 1176.45e6,
+        "6": 1268.52e6,
+        "7": 1207.14e6,
+        "8": 1191.795e6,
+    },
+    "J": {"1": 1575.42e6, "2": 1227.60e6, "5": 1176.45e6, "6": 1278.75e6},
+    "S": {"1": 1575.42e6, "5": 1176.45e6},
+    "R": {"3": 1202.025e6, "4": 1600.995e6, "6": 1248.06e6},
+}
+
+# GLONASS FDMA bands: base frequency and channel spacing in Hz
+GLONASS_FDMA = {"1": (1602.0e6, 0.5625e6), "2": (1246.0e6, 0.4375e6)}
+
+# Default band pair per system for dual-frequency combinations
+DEFAULT_BANDS = {
+    "I": ("5", "9"),
+    "G": ("1", "2"),
+    "E": ("1", "5"),
+    "C": ("2", "7"),
+    "J": ("1", "2"),
+    "S": ("1", "5"),
+    "R": ("1", "2"),
+}
+
+
+def carrier_frequency(system, obs_code, glonass_channel=None):
+    """
+    Returns the carrier frequency in Hz of an observation code.
+
+    :param system: GNSS system letter, e.g. "I".
+    :param obs_code: RINEX 3 observation code or band digit, e.g. "L5C" or "5".
+    :param glonass_channel: GLONASS frequency channel number k for the FDMA bands;
+                            scalars or arrays (one channel per satellite) are accepted.
+    """
+    band = obs_code[1] if len(obs_code) > 1 else obs_code
+    if system == "R" and band in GLONASS_FDMA:
+        if glonass_channel is None:
+            raise ValueError(f"GLONASS band {band} needs a frequency channel number")
+        base, spacing = GLONASS_FDMA[band]
+        return base + np.asarray(glonass_channel) * spacing
+
+    try:
+        return FREQUENCIES[system][band]
+    except KeyError:
+        raise ValueError(f"Unknown carrier frequency for system {system} band {band}")
+
+
+def wavelength(frequency):
+    """Carrier wavelength in metres."""
+    return SPEED_OF_LIGHT / np.asarray(frequency)
+
+
+def phase_in_metres(phase_cycles, frequency):
+    """Converts carrier phase from cycles to metres (L = c * phi / f)."""
+    return np.asarray(phase_cycles) * wavelength(frequency)
+
+
+def ionosphere_free(obs1, obs2, f1, f2):
+    """First-order ionosphere-free combination (f1^2 * obs1 - f2^2 * obs2) / (f1^2 - f2^2)."""
+    g1, g2 = f1**2, f2**2
+    return (g1 * np.asarray(obs1) - g2 * np.asarray(obs2)) / (g1 - g2)
+
+
+def geometry_free(obs1, obs2):
+    """Geometry-free combination obs1 - obs2 (use L1 - L2 for phase, P2 - P1 for code)."""
+    return np.asarray(obs1) - np.asarray(obs2)
+
+
+def wide_lane(obs1, obs2, f1, f2):
+    """Wide-lane combination (f1 * obs1 - f2 * obs2) / (f1 - f2)."""
+    return (f1 * np.asarray(obs1) - f2 * np.asarray(obs2)) / (f1 - f2)
+
+
+def narrow_lane(obs1, obs2, f1, f2):
+    """Narrow-lane combination (f1 * obs1 + f2 * obs2) / (f1 + f2)."""
+    return (f1 * np.asarray(obs1) + f2 * np.asarray(obs2)) / (f1 + f2)
+
+
+def melbourne_wubbena(phase1, phase2, code1, code2, f1, f2):
+    """Melbourne-Wubbena combination: phase wide-lane minus code narrow-lane, in metres."""
+    return wide_lane(phase1, phase2, f1, f2) - narrow_lane(code1, code2, f1, f2)
+
+
+def _code_for_band(obs_codes, kind, band):
+    """Returns the first observation code of a kind ("L" or "C") on a band, or None."""
+    for obs_code in obs_codes:
+        if obs_code[0] == kind and obs_code[1] == band:
+            return obs_code
+    return None
+
+
+def compute_combinations(values, system, bands=None, glonass_channel=None):
+    """
+    Computes every dual-frequency combination for whole arrays at once.
+
+    :param values: Mapping of observation code to array (any shape, e.g. epoch x PRN).
+                   Phase is in cycles, code in metres, as in RINEX.
+    :param system: GNSS system letter of the observations.
+    :param bands: Band digits (band1, band2); DEFAULT_BANDS[system] when omitted.
+    :param glonass_channel: GLONASS frequency channel(s), broadcastable against values.
+    :return: A dictionary of arrays: phase1/phase2 in metres, and the ionosphere-free,
+             geometry-free, wide-lane and narrow-lane phase/code combinations plus the
+             Melbourne-Wubbena combination, for whichever inputs are present.
+    """
+    band1, band2 = bands or DEFAULT_BANDS[system]
+    f1 = carrier_frequency(system, band1, glonass_channel)
+    f2 = carrier_frequency(system, band2, glonass_channel)
+
+    phase_codes = (
+        _code_for_band(values, "L", band1),
+        _code_for_band(values, "L", band2),
+    )
+    code_codes = (
+        _code_for_band(values, "C", band1),
+        _code_for_band(values, "C", band2),
+    )
+
+    combinations = {}
+    if all(phase_codes):
+        phase1 = phase_in_metres(values[phase_codes[0]], f1)
+        phase2 = phase_in_metres(values[phase_codes[1]], f2)
+        combinations["phase1"] = phase1
+        combinations["phase2"] = phase2
+        combinations["phase_if"] = ionosphere_free(phase1, phase2, f1, f2)
+        combinations["phase_gf"] = geometry_free(phase1, phase2)
+        combinations["phase_wl"] = wide_lane(phase1, phase2, f1, f2)
+        combinations["phase_nl"] = narrow_lane(phase1, phase2, f1, f2)
+    if all(code_codes):
+        code1 = np.asarray(values[code_codes[0]])
+        code2 = np.asarray(values[code_codes[1]])
+        combinations["code_if"] = ionosphere_free(code1, code2, f1, f2)
+        combinations["code_gf"] = geometry_free(code2, code1)
+        combinations["code_wl"] = wide_lane(code1, code2, f1, f2)
+        combinations["code_nl"] = narrow_lane(code1, code2, f1, f2)
+    if all(phase_codes) and all(code_codes):
+        combinations["mw"] = combinations["phase_wl"] - combinations["code_nl"]
+    return combinations
+
+
+def combinations_from_receiver(receiver, system, bands=None):
+    """
+    Computes combinations from a Receiver's dense arrays.
+
+    :return: A tuple (epoch_times, satellites, combinations) where every combination
+             is an [epoch, satellite] array.
+    """
+    num_epochs = receiver.num_epochs
+    cube = receiver.obs_data[system]["value"][:num_epochs]
+    values = {
+        obs_code: cube[:, :, i]
+        for i, obs_code in enumerate(receiver.observation_codes[system])
+    }
+
+    glonass_channel = None
+    if system == "R":
+        glonass_channel = np.array(
+            [
+                receiver.glonass_slot_frq_num.get(int(prn[1:]), np.nan)
+                for prn in receiver.satellites[system]
+            ]
+        )
+
+    return (
+        receiver.epoch_times[:num_epochs],
+        list(receiver.satellites[system]),
+        compute_combinations(values, system, bands, glonass_channel),
+    )
+
+
+def _needs_glonass_channels(system, bands):
+    """Tells whether the bands combined for a system are GLONASS FDMA bands."""
+    return system == "R" and any(
+        band in GLONASS_FDMA for band in (bands or DEFAULT_BANDS[system])
+    )
+
+
+def _glonass_channels_of(prns, glonass_channels):
+    """
+    Returns the frequency channel of every satellite, NaN where it is unknown.
+
+    :param prns: PRNs, e.g. "R07", one per value.
+    :param glonass_channels: Mapping of PRN to frequency channel number.
+    """
+    prns, inverse = np.unique(np.asarray(prns).astype(str), return_inverse=True)
+    channels = np.array(
+        [glonass_channels.get(prn, np.nan) for prn in prns], dtype=np.float64
+    )
+    return channels[inverse]
+
+
+def combinations_from_arrays(
+    rinex_arrays, system=None, bands=None, glonass_channels=None
+):
+    """
+    Computes combinations from parse_rinex_arrays' result.
+
+    Each combination has one entry per satellite line, aligned with
+    rinex_arrays["observations"]["prn"] and ["epoch_index"]; lines of other
+    systems are NaN.
+
+    :param system: GNSS system letter; the system of the first satellite line
+                   when omitted.
+    :param glonass_channels: Mapping of GLONASS PRN (e.g. "R07") to frequency channel
+                             number; the header's GLONASS SLOT / FRQ # record when
+                             omitted. GLONASS FDMA combinations are skipped (an empty
+                             dictionary is returned) when neither is available.
+    """
+    observations = rinex_arrays["observations"]
+    prn = observations["prn"]
+    if system is None:
+        system = prn[0][0] if len(prn) else next(iter(rinex_arrays["obs_types"]))
+
+    glonass_channel = None
+    if _needs_glonass_channels(system, bands):
+        if glonass_channels is None:
+            glonass_channels = rinex_arrays["metadata"].get("glonass_channels")
+        if not glonass_channels:
+            print(
+                "Skipping GLONASS combinations: no GLONASS SLOT / FRQ # record in the "
+                "header and no glonass_channels given"
+            )
+            return {}
+        glonass_channel = _glonass_channels_of(prn, glonass_channels)
+
+    of_system = np.char.startswith(prn.astype(str), system)
+    values = {
+        obs_code: np.where(of_system, observations["value"][:, i], np.nan)
+        for i, obs_code in enumerate(rinex_arrays["obs_types"].get(system, []))
+    }
+    return compute_combinations(values, system, bands, glonass_channel)
+
+
+def combinations_from_table(obs_df, system, bands=None, glonass_channels=None):
+    """
+    Computes combinations from a parsed observation table (legacy or compact schema).
+
+    :param glonass_channels: Mapping of GLONASS PRN (e.g. "R07") to frequency channel
+                             number, e.g. the 'glonass_channels' of the file's
+                             metadata. Needed for GLONASS FDMA bands; without it those
+                             combinations are skipped.
+    :return: A DataFrame indexed by (Epoch, PRN) with one column per combination.
+    """
+    table = obs_df[obs_df["PRN"].astype(str).str.startswith(system)]
+    table = table.drop_duplicates(["Epoch", "PRN", "Obs_Type"], keep="last")
+    wide = table.pivot(index=["Epoch", "PRN"], columns="Obs_Type", values="Value")
+
+    glonass_channel = None
+    if _needs_glonass_channels(system, bands):
+        if not glonass_channels:
+            print("Skipping GLONASS combinations: no glonass_channels given")
+            return pd.DataFrame(index=wide.index)
+        glonass_channel = _glonass_channels_of(
+            wide.index.get_level_values("PRN"), glonass_channels
+        )
+
+    values = {str(obs_code): wide[obs_code].to_numpy() for obs_code in wide.columns}
+    return pd.DataFrame(
+        compute_combinations(values, system, bands, glonass_channel), index=wide.index
+    )
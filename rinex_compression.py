@@ -0,0 +1,361 @@
+import bz2
+import gzip
+import io
+import zipfile
+
+# Leading bytes of each supported compression format
+COMPRESSION_MAGIC = (
+    (b"\x1f\x8b", "gzip"),
+    (b"BZh", "bzip2"),
+    (b"PK\x03\x04", "zip"),
+    (b"\x1f\x9d", "compress"),  # Unix compress (.Z)
+)
+STREAM_CHUNK_BYTES = 1 << 20  # Decompressed bytes handed on at a time
+
+CRINEX_LABEL = "CRINEX VERS   / TYPE"
+_LZW_CLEAR = 256
+
+
+def detect_compression(file_path):
+    """Returns "gzip", "bzip2", "zip", "compress" or None, from the file's leading bytes."""
+    with open(file_path, "rb") as file:
+        magic = file.read(4)
+    for prefix, name in COMPRESSION_MAGIC:
+        if magic.startswith(prefix):
+            return name
+    return None
+
+
+class _ChunkStream(io.RawIOBase):
+    """Read-only raw stream over an iterator of byte chunks, e.g. a decoder's output."""
+
+    def __init__(self, chunks, close=None):
+        self._chunks = iter(chunks)
+        self._pending = memoryview(b"")
+        self._position = 0
+        self._close = close
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        # Fills the whole buffer if the chunks allow, so peek() sees complete lines
+        # even when a decoder yields a few bytes at a time
+        size = 0
+        while size < len(buffer):
+            if not len(self._pending):
+                chunk = next(self._chunks, None)
+                if chunk is None:
+                    break
+                self._pending = memoryview(chunk)
+                continue
+            count = min(len(buffer) - size, len(self._pending))
+            buffer[size : size + count] = self._pending[:count]
+            self._pending = self._pending[count:]
+            size += count
+        self._position += size
+        return size
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        if not self.closed and self._close is not None:
+            self._close()
+        super().close()
+
+
+def _stream(chunks, close=None):
+    return io.BufferedReader(_ChunkStream(chunks, close), STREAM_CHUNK_BYTES)
+
+
+def _read_chunks(file, chunk_bytes=STREAM_CHUNK_BYTES):
+    return iter(lambda: file.read(chunk_bytes), b"")
+
+
+def unlzw_chunks(file):
+    """
+    Decompresses a Unix compress (.Z) stream, yielding the output piece by piece.
+
+    Codes of 9 up to the header's maximum width are read in groups of eight (one
+    group of `width` bytes); whenever the width grows or the table is cleared the
+    rest of the current group is skipped, as compress writes it.
+
+    :param file: Binary file positioned at the start of the .Z data.
+    """
+    header = file.read(3)
+    if len(header) < 3 or header[:2] != b"\x1f\x9d":
+        raise ValueError("Not a Unix compress (.Z) stream")
+    max_width = header[2] & 0x1F
+    block_mode = bool(header[2] & 0x80)
+    if not 9 <= max_width <= 16:
+        raise ValueError(f"Unsupported .Z code width {max_width}")
+
+    first_code = _LZW_CLEAR + 1 if block_mode else _LZW_CLEAR
+    table = [bytes([byte]) for byte in range(256)] + [b""] * (first_code - 256)
+    width = 9
+    previous = None
+
+    while True:
+        group = file.read(width)
+        if not group:
+            return
+        bits = int.from_bytes(group, "little")
+        mask = (1 << width) - 1
+        output = []
+        for i in range(len(group) * 8 // width):
+            code = (bits >> (i * width)) & mask
+            if block_mode and code == _LZW_CLEAR:
+                del table[first_code:]
+                width = 9
+                previous = None
+                break  # The rest of the group is padding
+
+            if code < len(table):
+                entry = table[code]
+            elif code == len(table) and previous is not None:
+                entry = previous + previous[:1]
+            else:
+                raise ValueError("Corrupt .Z stream")
+            output.append(entry)
+
+            if previous is not None and len(table) < 1 << max_width:
+                table.append(previous + entry[:1])
+            previous = entry
+            if len(table) > mask and width < max_width:
+                width += 1
+                break  # The rest of the group is padding
+        yield b"".join(output)
+
+
+def open_decompressed(file_path):
+    """
+    Opens a file for streaming binary reads, decompressing gzip, bzip2, zip (first
+    member) and Unix compress (.Z) content on the fly.
+    """
+    compression = detect_compression(file_path)
+    if compression is None:
+        return open(file_path, "rb")
+    if compression == "gzip":
+        inner = gzip.open(file_path, "rb")
+    elif compression == "bzip2":
+        inner = bz2.open(file_path, "rb")
+    elif compression == "zip":
+        archive = zipfile.ZipFile(file_path)
+        members = [info for info in archive.infolist() if not info.is_dir()]
+        if not members:
+            archive.close()
+            raise ValueError(f"{file_path} holds no file")
+        inner = archive.open(members[0])
+        return _stream(_read_chunks(inner), lambda: (inner.close(), archive.close()))
+    else:
+        inner = open(file_path, "rb")
+        return _stream(unlzw_chunks(inner), inner.close)
+    return _stream(_read_chunks(inner), inner.close)
+
+
+def _apply_text_diff(old, diff):
+    """Applies a CRINEX text difference: blanks keep old characters, '&' clears them."""
+    if not diff.strip():
+        return old
+    chars = list(old.ljust(len(diff)))
+    for i, char in enumerate(diff):
+        if char != " ":
+            chars[i] = " " if char == "&" else char
+    return "".join(chars)
+
+
+def _undifference(arc, token):
+    """
+    Restores one value from its CRINEX token.
+
+    :param arc: Difference levels of the series, [max_order, y, dy, d2y, ...], or
+                None when the series must be (re)initialized.
+    :param token: "order&value" to initialize, otherwise the highest difference.
+    :return: A tuple (value, arc).
+    """
+    if "&" in token:
+        order, value = token.split("&")
+        return int(value), [int(order), int(value)]
+    if arc is None:
+        raise ValueError(f"CRINEX value '{token}' continues an uninitialized series")
+    if len(arc) - 1 <= arc[0]:
+        arc.append(int(token))
+    else:
+        arc[-1] = int(token)
+    for level in range(len(arc) - 2, 0, -1):
+        arc[level] += arc[level + 1]
+    return arc[1], arc
+
+
+def _format_fixed(value, decimals, width):
+    """Formats an integer count of 10**-decimals units as a fixed-point field."""
+    whole, fraction = divmod(abs(value), 10**decimals)
+    sign = "-" if value < 0 else ""
+    return f"{sign}{whole}.{fraction:0{decimals}d}".rjust(width)
+
+
+def _header_obs_counts(header_lines, rinex_version):
+    """Number of observation types per system letter (" " for RINEX 2 files)."""
+    counts = {}
+    for line in header_lines:
+        label = line[60:].strip()
+        if rinex_version >= 3 and label == "SYS / # / OBS TYPES" and line[:1] != " ":
+            counts[line[:1]] = int(line[3:6])
+        elif rinex_version < 3 and label == "# / TYPES OF OBSERV" and line[:6].strip():
+            counts[" "] = int(line[:6])
+    return counts
+
+
+def crinex_lines(lines):
+    """
+    Decodes Compact RINEX (Hatanaka) 1.0 or 3.0 text into RINEX 2 or 3 text.
+
+    Epoch lines and LLI/SSI flags are restored from their character differences,
+    observations and clock offsets from their arithmetic differences of up to the
+    order given at each "order&value" initialization.
+
+    :param lines: Iterator of CRINEX lines (bytes).
+    :return: Generator of RINEX lines (bytes, newline terminated).
+    """
+    lines = (line.decode("ascii", "replace").rstrip("\r\n") for line in lines)
+    first = next(lines, "")
+    if first[60:].strip() != CRINEX_LABEL:
+        raise ValueError("Not a Compact RINEX file")
+    crinex_version = float(first[:9])
+    next(lines, None)  # CRINEX PROG / DATE
+
+    header = []
+    for line in lines:
+        header.append(line)
+        yield f"{line}\n".encode()
+        if line[60:].strip() == "END OF HEADER":
+            break
+    rinex_version = float(header[0][:9]) if header else 3.0
+    obs_counts = _header_obs_counts(header, rinex_version)
+
+    if crinex_version >= 3:
+        init_char, flag_column, sat_list_column, clock_decimals = ">", 31, 41, 12
+    else:
+        init_char, flag_column, sat_list_column, clock_decimals = "&", 28, 32, 9
+
+    epoch_text = ""
+    clock_arc = None
+    arcs = {}  # PRN -> list of arcs, one per observation type
+    flags = {}  # PRN -> LLI/SSI characters of the previous epoch
+    for line in lines:
+        if line.startswith(init_char):
+            text = line if crinex_version >= 3 else " " + line[1:]
+        else:
+            text = _apply_text_diff(epoch_text, line)
+
+        epoch_flag = int(text[flag_column].strip() or 0)
+        num_records = int(text[flag_column + 1 : flag_column + 4])
+        if 2 <= epoch_flag <= 5:
+            # Event records are copied as they are
+            yield f"{text[: flag_column + 4]}\n".encode()
+            for _ in range(num_records):
+                yield f"{next(lines)}\n".encode()
+            continue
+        epoch_text = text
+
+        clock_token = next(lines).strip()
+        clock = None
+        if clock_token:
+            clock, clock_arc = _undifference(clock_arc, clock_token)
+        else:
+            clock_arc = None
+
+        prns = [
+            text[i : i + 3]
+            for i in range(sat_list_column, sat_list_column + 3 * num_records, 3)
+        ]
+        out = []
+        if crinex_version >= 3:
+            epoch_line = text[: flag_column + 4]
+            if clock is not None:
+                epoch_line += " " * 6 + _format_fixed(clock, clock_decimals, 15)
+            out.append(epoch_line)
+        else:
+            epoch_line = text[:sat_list_column] + "".join(prns[:12])
+            if clock is not None:
+                epoch_line = epoch_line.ljust(68) + _format_fixed(
+                    clock, clock_decimals, 12
+                )
+            out.append(epoch_line)
+            for i in range(12, len(prns), 12):
+                out.append(" " * 32 + "".join(prns[i : i + 12]))
+
+        new_arcs, new_flags = {}, {}
+        for prn in prns:
+            num_types = obs_counts.get(prn[0] if rinex_version >= 3 else " ", 0)
+            tokens = next(lines).split(" ", num_types)
+            previous = arcs.get(prn, [None] * num_types)
+            prn_arcs = []
+            fields = []
+            for k in range(num_types):
+                token = tokens[k] if k < len(tokens) else ""
+                if token:
+                    value, arc = _undifference(previous[k], token)
+                    fields.append(_format_fixed(value, 3, 14))
+                else:
+                    arc = None
+                    fields.append(" " * 14)
+                prn_arcs.append(arc)
+
+            prn_flags = _apply_text_diff(
+                flags.get(prn, ""), tokens[num_types] if len(tokens) > num_types else ""
+            ).ljust(2 * num_types)
+            new_arcs[prn] = prn_arcs
+            new_flags[prn] = prn_flags
+            fields = [
+                field + prn_flags[2 * k : 2 * k + 2] for k, field in enumerate(fields)
+            ]
+
+            if rinex_version >= 3:
+                out.append((prn + "".join(fields)).rstrip())
+            else:
+                for i in range(0, num_types, 5):
+                    out.append("".join(fields[i : i + 5]).rstrip())
+        arcs, flags = new_arcs, new_flags
+
+        yield ("\n".join(out) + "\n").encode()
+
+
+def is_crinex(stream):
+    """Tells whether a buffered binary stream starts with a CRINEX header line."""
+    first_line = stream.peek(81)[:81].split(b"\n", 1)[0]
+    return first_line[60:].decode("ascii", "replace").strip() == CRINEX_LABEL
+
+
+def open_rinex(file_path):
+    """
+    Opens a RINEX file for streaming binary reads, whatever its packaging.
+
+    gzip, bzip2, zip and Unix compress (.Z) content is decompressed and Hatanaka
+    compressed (CRINEX) text decoded on the fly, without temporary files, so the
+    result reads like the plain RINEX file.
+
+    :return: A binary file object positioned at the start of the RINEX text.
+    """
+    stream = open_decompressed(file_path)
+    if is_crinex(stream):
+        return _stream(crinex_lines(stream), stream.close)
+    return stream
+
+
+def is_memory_mappable(file):
+    """Tells whether a file object opened by open_rinex is the plain file itself."""
+    try:
+        file.fileno()
+    except (OSError, io.UnsupportedOperation):
+        return False
+    return True
+
+
+def is_plain_rinex(file_path):
+    """Tells whether a file is uncompressed RINEX text, i.e. its bytes can be indexed."""
+    if detect_compression(file_path) is not None:
+        return False
+    with open(file_path, "rb") as file:
+        return not is_crinex(file)
@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+
+DOWNSAMPLE_METHODS = ("minmax", "lttb")
+
+
+def _as_float(x):
+    """Returns x as float64, datetime64 as nanoseconds."""
+    x = np.asarray(x)
+    if x.dtype.kind == "M":
+        return x.astype("datetime64[ns]").astype(np.int64).astype(np.float64)
+    return x.astype(np.float64)
+
+
+def minmax_indices(x, y, num_buckets):
+    """
+    Picks the lowest and highest point of each of num_buckets equal-width x buckets.
+
+    Keeps the envelope of the series (spikes and cycle slips included) with at most
+    2 * num_buckets + 2 points.
+
+    :param x: Ascending x values (numbers or datetime64).
+    :param y: y values without NaN.
+    :return: Sorted indices of the points to keep.
+    """
+    num_points = len(y)
+    if num_points <= 2 * num_buckets + 2:
+        return np.arange(num_points)
+
+    x = _as_float(x)
+    span = x[-1] - x[0]
+    if span <= 0:
+        buckets = np.zeros(num_points, dtype=np.int64)
+    else:
+        buckets = np.minimum(
+            ((x - x[0]) / span * num_buckets).astype(np.int64), num_buckets - 1
+        )
+
+    # Within each bucket, the first point in y order is the minimum, the last the maximum
+    order = np.lexsort((y, buckets))
+    ordered_buckets = buckets[order]
+    starts = np.flatnonzero(np.diff(ordered_buckets, prepend=-1))
+    ends = np.append(starts[1:], num_points) - 1
+    keep = np.concatenate([order[starts], order[ends], [0, num_points - 1]])
+    return np.unique(keep)
+
+
+def lttb_indices(x, y, threshold):
+    """
+    Largest-Triangle-Three-Buckets downsampling to threshold points.
+
+    Slower than minmax_indices (one step per bucket) but keeps the visual shape of
+    smooth series with fewer points.
+
+    :param x: Ascending x values (numbers or datetime64).
+    :param y: y values without NaN.
+    :return: Sorted indices of the points to keep.
+    """
+    num_points = len(y)
+    if threshold >= num_points or threshold < 3:
+        return np.arange(num_points)
+
+    x = _as_float(x)
+    y = np.asarray(y, dtype=np.float64)
+    every = (num_points - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = num_points - 1
+
+    selected = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, num_points)
+        average_x = x[end:next_end].mean() if next_end > end else x[-1]
+        average_y = y[end:next_end].mean() if next_end > end else y[-1]
+
+        # Point of the bucket forming the largest triangle with the previous pick
+        # and the average of the next bucket
+        areas = np.abs(
+            (x[selected] - average_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (average_y - y[selected])
+        )
+        selected = start + int(np.argmax(areas))
+        indices[i + 1] = selected
+    return indices
+
+
+def downsample(x, y, max_points, method="minmax"):
+    """
+    Reduces a series to about max_points points, skipping NaN values.
+
+    :param x: Ascending x values (numbers or datetime64).
+    :param y: y values.
+    :param max_points: Point budget of the series.
+    :param method: "minmax" (per-bucket extremes) or "lttb".
+    :return: Indices into x/y of the points to draw.
+    """
+    valid = np.flatnonzero(~np.isnan(np.asarray(y, dtype=np.float64)))
+    x = np.asarray(x)[valid]
+    y = np.asarray(y, dtype=np.float64)[valid]
+    if method == "minmax":
+        kept = minmax_indices(x, y, max(1, (max_points - 2) // 2))
+    elif method == "lttb":
+        kept = lttb_indices(x, y, max_points)
+    else:
+        raise ValueError(
+            f"Unknown downsampling method '{method}', expected one of "
+            f"{DOWNSAMPLE_METHODS}"
+        )
+    return valid[kept]
+
+
+def visible_range(relayout_data):
+    """
+    Returns the zoomed x range of a Dash graph's relayoutData.
+
+    :return: A tuple (start, end) of datetime64[ns], or None when the graph shows
+             the full range (no zoom yet, autorange or a reset).
+    """
+    if not relayout_data or relayout_data.get("xaxis.autorange"):
+        return None
+    if "xaxis.range[0]" in relayout_data and "xaxis.range[1]" in relayout_data:
+        bounds = relayout_data["xaxis.range[0]"], relayout_data["xaxis.range[1]"]
+    elif "xaxis.range" in relayout_data:
+        bounds = relayout_data["xaxis.range"]
+    else:
+        return None
+    start, end = (pd.Timestamp(bound).to_datetime64() for bound in bounds)
+    return np.datetime64(start, "ns"), np.datetime64(end, "ns")
@@ -0,0 +1,154 @@
+import mmap
+import os
+import re
+
+import numpy as np
+
+from processed_rinex_observation_file import (
+    _epoch_flag_and_count,
+    decode_epoch_lines,
+    decode_observation_body,
+    read_observation_header,
+)
+from rinex_compression import is_plain_rinex
+
+INDEX_SUFFIX = ".idx.npz"  # Sidecar written next to the observation file
+
+_EPOCH_LINE = re.compile(rb"^>[^\r\n]*", re.MULTILINE)
+
+
+def index_path_for(file_path):
+    """Returns the sidecar path holding the epoch index of file_path."""
+    return f"{file_path}{INDEX_SUFFIX}"
+
+
+def build_epoch_index(file_path, save=True):
+    """
+    Scans a memory-mapped RINEX observation file once and records every '>' epoch line.
+
+    Event blocks (flags 2-5) are left out: they hold no observations and may leave
+    the time blank, and the index times must stay sorted for read_range.
+
+    :param file_path: Path to the RINEX observation file.
+    :param save: Write the index as a sidecar next to the file.
+    :return: A dictionary with the byte 'offset', 'time' (datetime64[ns]), 'flag' and
+             'num_satellites' of each epoch line, plus 'header_end', 'file_size' and
+             'file_mtime_ns' of the indexed file.
+    """
+    if not is_plain_rinex(file_path):
+        raise ValueError(
+            f"{file_path} is compressed; only plain RINEX files can be indexed by offset"
+        )
+    stat = os.stat(file_path)
+
+    with open(file_path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            header_label = mapped.find(b"END OF HEADER")
+            header_end = (
+                mapped.find(b"\n", header_label) + 1 if header_label >= 0 else 0
+            )
+
+            offsets = []
+            epoch_lines = []
+            first_line = None
+            for match in _EPOCH_LINE.finditer(mapped, header_end):
+                if first_line is None:
+                    first_line = match.start()
+                line = match.group().rstrip(b"\r")
+                epoch_flag, _ = _epoch_flag_and_count(line)
+                if 2 <= epoch_flag <= 5:
+                    # Event blocks hold no observations and may leave the time blank;
+                    # range reads still cover them and the decoders skip them
+                    continue
+                offsets.append(match.start())
+                epoch_lines.append(line)
+            if header_label < 0 and first_line is not None:
+                # No END OF HEADER: the header ends at the first epoch line
+                header_end = first_line
+
+    epochs = decode_epoch_lines(epoch_lines)
+    index = {
+        "offset": np.array(offsets, dtype=np.int64),
+        "time": epochs["time"],
+        "flag": epochs["flag"],
+        "num_satellites": epochs["num_satellites"],
+        "header_end": np.int64(header_end),
+        "file_size": np.int64(stat.st_size),
+        "file_mtime_ns": np.int64(stat.st_mtime_ns),
+    }
+
+    if save:
+        np.savez(index_path_for(file_path), **index)
+    return index
+
+
+def load_epoch_index(file_path):
+    """Loads the sidecar index of file_path, rebuilding it when missing or stale."""
+    sidecar = index_path_for(file_path)
+    if os.path.exists(sidecar):
+        stat = os.stat(file_path)
+        with np.load(sidecar) as data:
+            index = {key: data[key] for key in data.files}
+        if (
+            index["file_size"] == stat.st_size
+            and index["file_mtime_ns"] == stat.st_mtime_ns
+        ):
+            return index
+    return build_epoch_index(file_path)
+
+
+def read_range(file_path, start, end, prns=None, index=None):
+    """
+    Decodes only the epochs of a RINEX observation file inside a time window.
+
+    :param file_path: Path to the RINEX observation file.
+    :param start: First epoch to include (anything np.datetime64 accepts).
+    :param end: Epochs at or after this time are excluded.
+    :param prns: Optional list of PRNs to keep, e.g. ["I02", "I06"].
+    :param index: Epoch index to use; loaded from the sidecar when omitted.
+    :return: A dictionary shaped like parse_rinex_arrays' result.
+    """
+    if index is None:
+        index = load_epoch_index(file_path)
+
+    times = index["time"]
+    first = np.searchsorted(times, np.datetime64(start, "ns"), side="left")
+    last = np.searchsorted(times, np.datetime64(end, "ns"), side="left")
+
+    with open(file_path, "rb") as file:
+        metadata, obs_types = read_observation_header(file)
+
+        if first < last:
+            begin_offset = int(index["offset"][first])
+            end_offset = (
+                int(index["offset"][last])
+                if last < len(times)
+                else int(index["file_size"])
+            )
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                lines = mapped[begin_offset:end_offset].splitlines()
+        else:
+            lines = []
+
+    epochs, observations = decode_observation_body(lines, obs_types)
+
+    if prns is not None:
+        keep = np.isin(observations["prn"], list(prns))
+        observations = {key: column[keep] for key, column in observations.items()}
+
+    return {
+        "metadata": metadata,
+        "obs_types": obs_types,
+        "epochs": epochs,
+        "observations": observations,
+    }
+
+
+if __name__ == "__main__":
+    file_path = "ACCO0020.24O"
+    index = load_epoch_index(file_path)
+    print(f"Indexed {len(index['offset'])} epochs of {file_path}")
+
+    window = read_range(file_path, "2024-01-02T06:00", "2024-01-02T07:00", prns=["I02"])
+    print(f"Epochs in window: {len(window['epochs']['time'])}")
+    print(f"Satellite lines in window: {len(window['observations']['prn'])}")
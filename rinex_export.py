@@ -0,0 +1,212 @@
+import gzip
+import io
+import os
+
+from processed_rinex_observation_file import (
+    OBS_FIELD_WIDTH,
+    iter_observation_chunks,
+    observations_to_dataframe,
+)
+from rinex_header import read_header_file
+from rinex_profiling import count, stage
+
+DEFAULT_MEMORY_BUDGET = 256 * 1024**2  # Bytes held by one chunk while it is exported
+EXPORT_ROW_BYTES = 256  # Approximate memory of one exported row in a chunk
+
+EXPORT_FORMATS = ("tsv", "csv", "parquet", "arrow")
+
+# Output format and compression by file extension
+_FORMAT_EXTENSIONS = {
+    ".txt": "tsv",
+    ".tsv": "tsv",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".pq": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".ipc": "arrow",
+}
+_COMPRESSION_EXTENSIONS = {".gz": "gzip", ".zst": "zstd"}
+
+
+def chunk_rows(memory_budget=DEFAULT_MEMORY_BUDGET):
+    """Number of exported rows that fit in memory_budget bytes."""
+    return max(1, int(memory_budget) // EXPORT_ROW_BYTES)
+
+
+def export_format(path):
+    """
+    Infers the output format and compression from a file name.
+
+    :return: A tuple (format, compression), e.g. ("csv", "gzip") for "out.csv.gz";
+             names without a known extension are written as TSV.
+    """
+    root, extension = os.path.splitext(path.lower())
+    compression = _COMPRESSION_EXTENSIONS.get(extension)
+    if compression is not None:
+        root, extension = os.path.splitext(root)
+    return _FORMAT_EXTENSIONS.get(extension, "tsv"), compression
+
+
+def _open_text(path, compression):
+    """Opens a text output stream, compressed with gzip or zstd when requested."""
+    if compression is None:
+        return open(path, "w", newline="")
+    if compression == "gzip":
+        return gzip.open(path, "wt", newline="")
+    if compression == "zstd":
+        import zstandard
+
+        raw = open(path, "wb")
+        return io.TextIOWrapper(
+            zstandard.ZstdCompressor().stream_writer(raw), newline=""
+        )
+    raise ValueError(f"Unknown compression '{compression}', expected gzip or zstd")
+
+
+class ObservationWriter:
+    """
+    Writes an observation table to one file, chunk by chunk.
+
+    Chunks are appended as they are written, so the rows end up in the order the
+    chunks arrive and no more than one chunk is ever held in memory. TSV/CSV output
+    may be gzip or zstd compressed; Parquet and Arrow IPC output (which need pyarrow)
+    use the compression as their codec.
+    """
+
+    def __init__(self, path, format=None, compression=None):
+        inferred_format, inferred_compression = export_format(path)
+        self.path = path
+        self.format = format or inferred_format
+        self.compression = compression or inferred_compression
+        if self.format not in EXPORT_FORMATS:
+            raise ValueError(
+                f"Unknown format '{self.format}', expected one of {EXPORT_FORMATS}"
+            )
+        self.rows = 0
+        self._file = None
+        self._writer = None
+        self._schema = None
+
+    def write(self, df):
+        """Appends the rows of a DataFrame chunk."""
+        if df.empty:
+            return
+        with stage("write_chunk"):
+            if self.format in ("tsv", "csv"):
+                if self._file is None:
+                    self._file = _open_text(self.path, self.compression)
+                df.to_csv(
+                    self._file,
+                    index=False,
+                    header=self.rows == 0,
+                    sep="\t" if self.format == "tsv" else ",",
+                )
+            else:
+                self._write_arrow(df)
+        self.rows += len(df)
+        count("write_chunk", rows=len(df))
+
+    def _write_arrow(self, df):
+        import pyarrow as pa
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._writer is None:
+            self._schema = table.schema
+            if self.format == "parquet":
+                import pyarrow.parquet as pq
+
+                self._writer = pq.ParquetWriter(
+                    self.path, self._schema, compression=self.compression or "snappy"
+                )
+            else:
+                import pyarrow.ipc
+
+                self._writer = pa.ipc.new_file(
+                    self.path,
+                    self._schema,
+                    options=pa.ipc.IpcWriteOptions(compression=self.compression),
+                )
+        self._writer.write_table(table.cast(self._schema))
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def export_rinex_files(
+    file_paths,
+    output_path=None,
+    per_file_suffix="_processed.txt",
+    format=None,
+    compression=None,
+    memory_budget=DEFAULT_MEMORY_BUDGET,
+):
+    """
+    Streams RINEX observation files to per-file and combined observation tables.
+
+    Each file is decoded one chunk of epochs at a time and every chunk is written to
+    the file's own table and to the combined table, in epoch order, so memory stays
+    within memory_budget however long the files are.
+
+    :param file_paths: Paths of the RINEX observation files.
+    :param output_path: Combined table of every file, or None to skip it.
+    :param per_file_suffix: Suffix appended to each file's name for its own table
+                            (always TSV, as before), or None to skip them.
+    :param format: Format of the combined table, see EXPORT_FORMATS; inferred from
+                   output_path when omitted.
+    :param compression: "gzip" or "zstd" for text output, the codec for Parquet/Arrow.
+    :param memory_budget: Approximate bytes held per chunk.
+    :return: A list with the metadata of every file, in file_paths order.
+    """
+    # Every 16-char observation field of the file becomes one exported row
+    chunk_bytes = chunk_rows(memory_budget) * OBS_FIELD_WIDTH
+    all_metadata = []
+    combined = (
+        ObservationWriter(output_path, format, compression) if output_path else None
+    )
+    try:
+        for file_path in file_paths:
+            file_name = os.path.basename(file_path)
+            per_file = (
+                ObservationWriter(f"{file_name}{per_file_suffix}", "tsv")
+                if per_file_suffix
+                else None
+            )
+            metadata = None
+            with stage("export_rinex_files"):
+                for chunk in iter_observation_chunks(file_path, chunk_bytes):
+                    metadata = chunk["metadata"]
+                    with stage("dataframe"):
+                        observations = observations_to_dataframe(chunk)
+                        observations["File Name"] = file_name
+                    count("dataframe", rows=len(observations))
+                    if per_file is not None:
+                        per_file.write(observations)
+                    if combined is not None:
+                        combined.write(observations)
+            if per_file is not None:
+                per_file.close()
+                print(
+                    f"Processed observation data for {file_name} saved to {per_file.path}"
+                )
+            if metadata is None:
+                metadata = read_header_file(file_path).to_metadata()
+            all_metadata.append({"file_name": file_name, **metadata})
+    finally:
+        if combined is not None:
+            combined.close()
+
+    if combined is not None:
+        print(f"{combined.rows} observations saved to {output_path}")
+    return all_metadata
@@ -0,0 +1,252 @@
+from collections import OrderedDict
+import hashlib
+import json
+import os
+import re
+import time
+
+from rinex_cache import CACHE_DIR
+
+DEFAULT_MEMO_ENTRIES = 64  # Figures kept in memory by each worker
+DEFAULT_SHARED_ENTRIES = 1024  # Figures kept in a shared store
+DEFAULT_SHARED_BYTES = 512 * 1024**2  # Bytes of figures kept in a shared directory
+
+# Shared figure store of every worker: a directory or a redis:// URL; unset keeps
+# the memo in-process
+FIGURE_CACHE_URL = os.environ.get("RINEX_FIGURE_CACHE")
+
+_REDIS_SCHEMES = ("redis://", "rediss://", "unix://")
+
+
+def normalize_selection(value):
+    """
+    Returns a JSON-serialisable form of a callback selection.
+
+    Lists and sets (multi-select dropdown values) become sorted lists without
+    duplicates, so the order of picking does not matter. Tuples keep their order,
+    dictionaries are sorted by key and other values (datetimes, NumPy scalars)
+    become strings.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, dict):
+        return [[str(key), normalize_selection(value[key])] for key in sorted(value)]
+    if isinstance(value, tuple):
+        return [normalize_selection(item) for item in value]
+    if isinstance(value, (list, set, frozenset)):
+        items = {
+            json.dumps(normalize_selection(item), sort_keys=True) for item in value
+        }
+        return [json.loads(item) for item in sorted(items)]
+    return str(value)
+
+
+def _figure_to_json(figure):
+    """Serialises a plotly figure (or its dictionary form) to JSON bytes."""
+    if hasattr(figure, "to_json"):
+        return figure.to_json().encode()
+    return json.dumps(figure).encode()
+
+
+class DirectoryFigureStore:
+    """
+    Figures shared through a directory, one JSON file per key.
+
+    Files are written atomically, so workers on the same machine (or mounting the
+    same directory) can read while another one writes. The directory is bounded in
+    size and loses the least recently used figures first.
+    """
+
+    def __init__(
+        self,
+        directory=os.path.join(CACHE_DIR, "figures"),
+        max_bytes=DEFAULT_SHARED_BYTES,
+    ):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as file:
+                data = file.read()
+        except OSError:
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass  # Evicted by another worker meanwhile
+        return data
+
+    def set(self, key, data):
+        path = self._path(key)
+        temp_path = f"{path}.tmp-{os.getpid()}"
+        with open(temp_path, "wb") as file:
+            file.write(data)
+        os.replace(temp_path, path)
+        self.evict(keep=path)
+
+    def evict(self, keep=None):
+        """Removes least recently used figures until the directory fits in max_bytes."""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".json"):
+                os.remove(entry.path)
+
+
+class RedisFigureStore:
+    """
+    Figures shared through Redis or any server speaking its protocol.
+
+    Keys are tracked in a sorted set by last use, so the store keeps at most
+    max_entries figures and drops the least recently used first, whatever the
+    server's own eviction policy. Needs the redis package.
+    """
+
+    def __init__(self, url, max_entries=DEFAULT_SHARED_ENTRIES, prefix="npl-rinex"):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self.max_entries = max_entries
+        self.prefix = prefix
+        self._recent = f"{prefix}:figures:recent"
+
+    def _key(self, key):
+        return f"{self.prefix}:figure:{key}"
+
+    def get(self, key):
+        data = self.client.get(self._key(key))
+        if data is not None:
+            self.client.zadd(self._recent, {key: time.time()})
+        return data
+
+    def set(self, key, data):
+        pipeline = self.client.pipeline()
+        pipeline.set(self._key(key), data)
+        pipeline.zadd(self._recent, {key: time.time()})
+        pipeline.execute()
+        self.evict()
+
+    def evict(self):
+        """Removes least recently used figures beyond max_entries."""
+        excess = self.client.zcard(self._recent) - self.max_entries
+        if excess <= 0:
+            return
+        stale = [key for key, _ in self.client.zpopmin(self._recent, excess)]
+        self.client.delete(
+            *[
+                self._key(key.decode() if isinstance(key, bytes) else key)
+                for key in stale
+            ]
+        )
+
+    def clear(self):
+        keys = [
+            self._key(key.decode() if isinstance(key, bytes) else key)
+            for key in self.client.zrange(self._recent, 0, -1)
+        ]
+        self.client.delete(self._recent, *keys)
+
+
+def shared_store(url=FIGURE_CACHE_URL):
+    """
+    Returns the shared figure store named by url, or None when url is empty.
+
+    :param url: "redis://host:port/db" (also rediss:// and unix://) for a
+                Redis-compatible server, otherwise a directory (optionally "file://").
+    """
+    if not url:
+        return None
+    if url.startswith(_REDIS_SCHEMES):
+        return RedisFigureStore(url)
+    if url.startswith("file://"):
+        url = url[len("file://") :]
+    return DirectoryFigureStore(url)
+
+
+class FigureMemo:
+    """
+    LRU memo of built figures, keyed by the normalized callback selection.
+
+    Each worker keeps its most recent figures in memory. With a shared store, a
+    figure built by one worker is served to the others from the store, as the JSON
+    dictionary Dash accepts in place of a figure.
+    """
+
+    def __init__(self, namespace, max_entries=DEFAULT_MEMO_ENTRIES, shared=None):
+        """
+        :param namespace: Identifies the app and its data, e.g. "obs_plot-<content
+                          hash>", so changed files never hit stale figures.
+        :param shared: DirectoryFigureStore, RedisFigureStore or None.
+        """
+        self.namespace = re.sub(r"[^A-Za-z0-9]+", "_", namespace)
+        self.max_entries = max_entries
+        self.shared = shared
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+
+    def key(self, *selection):
+        digest = hashlib.blake2b(
+            json.dumps(normalize_selection(selection), sort_keys=True).encode(),
+            digest_size=16,
+        ).hexdigest()
+        return f"{self.namespace}-{digest}"
+
+    def _remember(self, key, figure):
+        self._figures[key] = figure
+        if len(self._figures) > self.max_entries:
+            self._figures.popitem(last=False)
+
+    def get_or_build(self, selection, build):
+        """
+        Returns the figure of selection, calling build() only on a miss.
+
+        :param selection: Tuple of the callback inputs the figure depends on.
+        :param build: Function without arguments returning the figure.
+        """
+        key = self.key(*selection)
+        if key in self._figures:
+            self._figures.move_to_end(key)
+            self.hits += 1
+            return self._figures[key]
+
+        if self.shared is not None:
+            data = self.shared.get(key)
+            if data is not None:
+                figure = json.loads(data)
+                self._remember(key, figure)
+                self.hits += 1
+                return figure
+
+        self.misses += 1
+        figure = build()
+        self._remember(key, figure)
+        if self.shared is not None:
+            self.shared.set(key, _figure_to_json(figure))
+        return figure
@@ -0,0 +1,248 @@
+import os
+import threading
+import time
+
+import numpy as np
+
+from processed_rinex_observation_file import (
+    _epoch_flag_and_count,
+    _observation_rows,
+    decode_observation_body,
+)
+from rinex_header import END_OF_HEADER, HEADER_LABEL_START, read_header
+from rinex_profiling import count, stage
+
+DEFAULT_POLL_INTERVAL = 1.0  # Seconds between checks for newly written epochs
+LIVE_INITIAL_CAPACITY = 1 << 16  # Rows preallocated by LiveObservations
+
+
+def complete_blocks_end(data):
+    """
+    Finds where the complete epoch blocks of freshly written observation text end.
+
+    A receiver writes blocks in order, so every block followed by another '>' line
+    is complete; the last one is complete once all the satellite (or event record)
+    lines its epoch line announces have been written in full.
+
+    :param data: Observation text (bytes) starting at an epoch line.
+    :return: Number of leading bytes of data holding complete epoch blocks.
+    """
+    end = data.rfind(b"\n") + 1  # Lines still being written are never consumed
+    if not end:
+        return 0
+    last = data.rfind(b"\n>", 0, end - 1) + 1
+    if not last and not data.startswith(b">"):
+        return 0
+
+    line_end = data.index(b"\n", last)
+    _, num_records = _epoch_flag_and_count(data[last:line_end].rstrip(b"\r"))
+    if data.count(b"\n", line_end + 1, end) >= num_records:
+        return end
+    return last
+
+
+class ObservationFollower:
+    """
+    Follows a RINEX observation file while the receiver is still writing it.
+
+    Only the bytes after the last consumed epoch block are read on every poll, and
+    only complete epoch blocks are decoded, so the cost of each poll is proportional
+    to the newly written data. New epochs are pushed to the subscribers as
+    dictionaries shaped like parse_rinex_arrays' result.
+    """
+
+    def __init__(self, file_path, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.file_path = file_path
+        self.poll_interval = poll_interval
+        self.offset = None  # First unconsumed byte, None until the header is complete
+        self.metadata = None
+        self.obs_types = None
+        self.num_epochs = 0
+        self._size = -1  # File size at the last poll
+        self._subscribers = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def subscribe(self, callback):
+        """
+        Calls callback(chunk) with every batch of new epochs.
+
+        :return: A function removing the subscription.
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def _read_header(self, file):
+        """Reads the header once it is complete; returns False while it is being written."""
+        for line in file:
+            if not line.endswith(b"\n"):
+                return False
+            if (
+                line.startswith(b">")
+                or line[HEADER_LABEL_START:].strip() == END_OF_HEADER.encode()
+            ):
+                break
+        else:
+            return False
+
+        file.seek(0)
+        header = read_header(file)
+        self.metadata = header.to_metadata()
+        self.obs_types = header.obs_types
+        self.offset = file.tell() - len(header.first_data_line or b"")
+        return True
+
+    def poll(self):
+        """
+        Decodes the epoch blocks completed since the last poll and notifies the
+        subscribers.
+
+        :return: The new epochs, shaped like parse_rinex_arrays' result, or None
+                 when no complete block was added.
+        """
+        try:
+            size = os.path.getsize(self.file_path)
+        except FileNotFoundError:
+            return None
+        if size == self._size:
+            return None
+        if self.offset is not None and size < self.offset:
+            # Truncated or replaced: start over from the new file's header
+            print(f"{self.file_path} shrank, reading it again from the start")
+            self.offset = None
+            self.num_epochs = 0
+        self._size = size
+
+        with open(self.file_path, "rb") as file:
+            if self.offset is None and not self._read_header(file):
+                return None
+            file.seek(self.offset)
+            with stage("read"):
+                data = file.read()
+            count("read", bytes=len(data))
+
+        end = complete_blocks_end(data)
+        if not end:
+            return None
+        epochs, observations = decode_observation_body(
+            data[:end].splitlines(), self.obs_types
+        )
+        self.offset += end
+        if not len(epochs["time"]):
+            return None  # Only event records were added
+
+        self.num_epochs += len(epochs["time"])
+        chunk = {
+            "metadata": self.metadata,
+            "obs_types": self.obs_types,
+            "epochs": epochs,
+            "observations": observations,
+        }
+        for callback in list(self._subscribers):
+            callback(chunk)
+        return chunk
+
+    def follow(self):
+        """Yields batches of new epochs as they are written, until stop() is called."""
+        while not self._stop.is_set():
+            chunk = self.poll()
+            if chunk is not None:
+                yield chunk
+            self._stop.wait(self.poll_interval)
+
+    def start(self):
+        """Polls in a background thread, pushing new epochs to the subscribers."""
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        for _ in self.follow():
+            pass  # The subscribers already received the epochs
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+class LiveObservations:
+    """
+    Followed observations as growing (time, PRN, Obs_Type, value) arrays.
+
+    Subscribe it to an ObservationFollower. Readers keep a cursor (the number of
+    rows they have seen) and ask only for the rows added since, so each update
+    costs as much as the new data.
+    """
+
+    def __init__(self, capacity=LIVE_INITIAL_CAPACITY):
+        self.size = 0
+        self._lock = threading.Lock()
+        self._columns = {
+            "time": np.empty(capacity, dtype="datetime64[ns]"),
+            "prn": np.empty(capacity, dtype="U3"),
+            "obs_type": np.empty(capacity, dtype="U3"),
+            "value": np.empty(capacity, dtype=np.float64),
+        }
+
+    def __call__(self, chunk):
+        epochs = chunk["epochs"]
+        observations = chunk["observations"]
+        line_index, fields, codes = _observation_rows(chunk)
+        rows = {
+            "time": epochs["time"][observations["epoch_index"][line_index]],
+            "prn": observations["prn"][line_index],
+            "obs_type": codes,
+            "value": observations["value"].ravel()[fields],
+        }
+
+        num_rows = len(codes)
+        with self._lock:
+            needed = self.size + num_rows
+            if needed > len(self._columns["time"]):
+                # Grow geometrically so appends stay amortized O(new rows)
+                capacity = max(needed, 2 * len(self._columns["time"]))
+                for name, column in self._columns.items():
+                    grown = np.empty(capacity, dtype=column.dtype)
+                    grown[: self.size] = column[: self.size]
+                    self._columns[name] = grown
+            for name, column in self._columns.items():
+                column[self.size : needed] = rows[name]
+            self.size = needed
+
+    def since(self, cursor=0, obs_types=None, prns=None):
+        """
+        Returns the rows added after cursor.
+
+        :param cursor: Rows already seen, e.g. the cursor returned by the last call.
+        :param obs_types: Observation codes to keep; None keeps all.
+        :param prns: PRNs to keep; None keeps all.
+        :return: A tuple (rows, cursor): a dictionary of the new rows' arrays, and
+                 the cursor to pass next time.
+        """
+        with self._lock:
+            size = self.size
+            rows = {name: column[cursor:size] for name, column in self._columns.items()}
+
+        selected = np.ones(size - cursor, dtype=bool)
+        if obs_types is not None:
+            selected &= np.isin(rows["obs_type"], list(obs_types))
+        if prns is not None:
+            selected &= np.isin(rows["prn"], list(prns))
+        if not selected.all():
+            rows = {name: column[selected] for name, column in rows.items()}
+        return rows, size
+
+
+if __name__ == "__main__":
+    follower = ObservationFollower("ACCO0020.24O")
+    live = LiveObservations()
+    follower.subscribe(live)
+    follower.start()
+    try:
+        while True:
+            time.sleep(10)
+            print(f"{follower.num_epochs} epochs, {live.size} observations")
+    except KeyboardInterrupt:
+        follower.stop()
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+
+class GroupIndex:
+    """
+    Row ranges of every group of a table, e.g. every (Obs_Type, PRN) pair.
+
+    Rows are sorted by group once with a stable sort, so each group keeps the
+    table's order (time order for parsed observations), and the rows of a group are
+    then the slice order[offsets[k]:offsets[k + 1]]. Looking a group up costs two
+    dictionary lookups instead of a boolean mask over the whole table.
+    """
+
+    def __init__(self, *keys):
+        """
+        :param keys: One array or Series per grouping level, all of the same length.
+        """
+        self.names = []
+        self._positions = []
+        combined = np.zeros(len(keys[0]) if keys else 0, dtype=np.int64)
+        for key in keys:
+            codes, names = pd.factorize(np.asarray(key))
+            combined = combined * len(names) + codes
+            self.names.append(names)
+            self._positions.append({name: i for i, name in enumerate(names)})
+
+        self.order = np.argsort(combined, kind="stable")
+        num_groups = int(np.prod([len(names) for names in self.names]))
+        self.offsets = np.searchsorted(combined[self.order], np.arange(num_groups + 1))
+
+    def rows(self, *labels):
+        """Returns the table rows of one group, in table order (empty when unknown)."""
+        code = 0
+        for positions, names, label in zip(self._positions, self.names, labels):
+            if label not in positions:
+                return self.order[:0]
+            code = code * len(names) + positions[label]
+        return self.order[self.offsets[code] : self.offsets[code + 1]]
+
+    def groups(self, *selections):
+        """
+        Yields (labels, rows) for every non-empty group of the selected labels.
+
+        Groups come in index order (first appearance in the table), whatever the
+        order of the selections, so the same selection always yields the same groups.
+
+        :param selections: One collection of labels per level; None selects all.
+        """
+        chosen = []
+        for names, selection in zip(self.names, selections):
+            if selection is None:
+                chosen.append(list(names))
+            else:
+                selection = set(selection)
+                chosen.append([name for name in names if name in selection])
+
+        def expand(level, labels):
+            if level == len(chosen):
+                rows = self.rows(*labels)
+                if len(rows):
+                    yield labels, rows
+                return
+            for label in chosen[level]:
+                yield from expand(level + 1, labels + (label,))
+
+        yield from expand(0, ())
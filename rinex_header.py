@@ -0,0 +1,409 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from rinex_compression import open_rinex
+from rinex_time import calendar_to_datetime64
+
+HEADER_LABEL_START = 60  # Header labels occupy columns 61-80
+END_OF_HEADER = "END OF HEADER"
+
+SYSTEM_NAMES = {
+    "G": "GPS",
+    "R": "GLONASS",
+    "S": "SBAS",
+    "E": "Galileo",
+    "J": "QZSS",
+    "C": "BDS",
+    "I": "IRNSS",
+    "M": "Mixed",
+}
+
+
+class RinexHeader:
+    """Header records of a RINEX 3 observation or navigation file."""
+
+    def __init__(self):
+        self.file_path = None
+        self.version = None  # RINEX format version, e.g. 3.03
+        self.file_type = ""  # e.g. "OBSERVATION DATA" or "N: GNSS NAV DATA"
+        self.satellite_system = ""  # System letter of the file, "M" for mixed
+        self.program = ""
+        self.run_by = ""
+        self.date = ""
+        self.comments = []
+        self.marker_name = ""
+        self.marker_number = ""
+        self.marker_type = ""
+        self.observer = ""
+        self.agency = ""
+        self.receiver_number = ""
+        self.receiver_type = ""
+        self.receiver_version = ""
+        self.antenna_number = ""
+        self.antenna_type = ""
+        self.approx_position_xyz = None  # (x, y, z) in metres
+        self.antenna_delta_hen = None  # (height, east, north) in metres
+        self.antenna_phase_center = {}  # system -> obs code -> north/east/up
+        self.obs_types = {}  # system -> observation codes from SYS / # / OBS TYPES
+        self.signal_strength_unit = ""
+        self.interval = None  # Seconds
+        self.time_of_first_obs = None  # datetime64[ns]
+        self.time_of_last_obs = None
+        self.time_system = ""  # Time system of the epochs, e.g. "GPS" or "IRN"
+        self.rcv_clock_offs_appl = 0
+        self.scale_factors = {}  # system -> scale factor
+        self.phase_shifts = {}  # system -> obs code -> phase_shift/satellites
+        self.glonass_slot_frq_num = {}  # GLONASS slot -> frequency channel
+        self.glonass_code_phase_bias = {}  # GLONASS signal -> code/phase bias (m)
+        self.leap_seconds = None
+        self.num_satellites = None
+        self.prn_obs_counts = {}  # PRN -> observation code -> count
+        self.ionospheric_corr = (
+            {}
+        )  # Correction type (e.g. "GPSA", "IRNB") -> parameters
+        self.time_system_corr = {}  # Correction type (e.g. "GPUT") -> a0/a1/t/week
+        self.first_data_line = (
+            None  # Epoch line that ended a header without END OF HEADER
+        )
+
+        # Records continued over several lines
+        self._obs_types_system = None
+        self._obs_types_count = 0
+        self._prn = None
+        self._prn_counts = []
+
+    @property
+    def system_name(self):
+        """Full name of the file's satellite system, e.g. "IRNSS"."""
+        return SYSTEM_NAMES.get(self.satellite_system, self.satellite_system)
+
+    def to_metadata(self):
+        """Returns the header as the plain metadata dictionary used by the parsers."""
+        metadata = {}
+        if self.version is not None:
+            metadata["version"] = f"{self.version:.2f}"
+            metadata["file_type"] = self.file_type
+        if self.program or self.run_by or self.date:
+            metadata["program"] = self.program
+            metadata["run_by"] = self.run_by
+            metadata["date"] = self.date
+        for name in (
+            "marker_name",
+            "marker_number",
+            "marker_type",
+            "observer",
+            "agency",
+            "receiver_number",
+            "receiver_type",
+            "receiver_version",
+            "antenna_number",
+            "antenna_type",
+            "signal_strength_unit",
+        ):
+            if getattr(self, name):
+                metadata[name] = getattr(self, name)
+        if self.approx_position_xyz is not None:
+            metadata["approx_position_xyz"] = list(self.approx_position_xyz)
+        if self.antenna_delta_hen is not None:
+            metadata["antenna_delta_hen"] = list(self.antenna_delta_hen)
+        if self.interval is not None:
+            metadata["interval"] = self.interval
+        if self.time_of_first_obs is not None:
+            metadata["time_of_first_obs"] = str(self.time_of_first_obs)
+            metadata["time_system"] = self.time_system
+        if self.time_of_last_obs is not None:
+            metadata["time_of_last_obs"] = str(self.time_of_last_obs)
+        if self.leap_seconds is not None:
+            metadata["leap_seconds"] = self.leap_seconds
+        if self.ionospheric_corr:
+            metadata["ionospheric_corr"] = self.ionospheric_corr
+        if self.time_system_corr:
+            metadata["time_system_corr"] = self.time_system_corr
+        if self.glonass_slot_frq_num:
+            # Keyed by PRN so the metadata stays JSON-serialisable as it is
+            metadata["glonass_channels"] = {
+                f"R{slot:02d}": channel
+                for slot, channel in self.glonass_slot_frq_num.items()
+            }
+        return metadata
+
+
+def _header_float(text):
+    """Converts a header field to float, accepting Fortran D exponents."""
+    return float(text.strip().replace("D", "E").replace("d", "e"))
+
+
+def _header_time(line):
+    """Parses the calendar fields of TIME OF FIRST/LAST OBS into datetime64[ns]."""
+    year, month, day, hour, minute = (int(x) for x in line[:30].split())
+    seconds = float(line[30:43])
+    return calendar_to_datetime64(year, month, day, hour, minute, seconds)[()]
+
+
+def _parse_version_type(header, line):
+    header.version = float(line[:9])
+    header.file_type = line[20:40].strip()
+    # Navigation files of some receivers put the system in the file type field
+    header.satellite_system = line[40:60].strip()[:1] or line[20:21].strip()
+
+
+def _parse_program(header, line):
+    header.program = line[:20].strip()
+    header.run_by = line[20:40].strip()
+    header.date = line[40:60].strip()
+
+
+def _parse_comment(header, line):
+    header.comments.append(line[:60].rstrip())
+
+
+def _parse_marker_name(header, line):
+    header.marker_name = line[:60].strip()
+
+
+def _parse_marker_number(header, line):
+    header.marker_number = line[:60].strip()
+
+
+def _parse_marker_type(header, line):
+    header.marker_type = line[:60].strip()
+
+
+def _parse_observer_agency(header, line):
+    header.observer = line[:20].strip()
+    header.agency = line[20:60].strip()
+
+
+def _parse_receiver(header, line):
+    header.receiver_number = line[:20].strip()
+    header.receiver_type = line[20:40].strip()
+    header.receiver_version = line[40:60].strip()
+
+
+def _parse_antenna(header, line):
+    header.antenna_number = line[:20].strip()
+    header.antenna_type = line[20:40].strip()
+
+
+def _parse_approx_position(header, line):
+    # Split rather than 3F14.4 columns: some receivers write wider fields
+    header.approx_position_xyz = tuple(float(x) for x in line[:60].split()[:3])
+
+
+def _parse_antenna_delta(header, line):
+    header.antenna_delta_hen = tuple(float(x) for x in line[:60].split()[:3])
+
+
+def _parse_antenna_phase_center(header, line):
+    parts = line[:60].split()
+    if len(parts) < 5:
+        return
+    header.antenna_phase_center.setdefault(parts[0], {})[parts[1]] = {
+        "north": float(parts[2]),
+        "east": float(parts[3]),
+        "up": float(parts[4]),
+    }
+
+
+def _parse_obs_types(header, line):
+    # Continuation lines leave the system letter and count blank
+    if line[:1].strip():
+        header._obs_types_system = line[0]
+        header._obs_types_count = int(line[3:6])
+        header.obs_types[line[0]] = []
+    system = header._obs_types_system
+    if system is not None:
+        codes = header.obs_types[system]
+        codes.extend(line[7:60].split()[: header._obs_types_count - len(codes)])
+
+
+def _parse_signal_strength_unit(header, line):
+    header.signal_strength_unit = line[:60].strip()
+
+
+def _parse_interval(header, line):
+    header.interval = float(line[:10])
+
+
+def _parse_time_of_first_obs(header, line):
+    header.time_of_first_obs = _header_time(line)
+    header.time_system = line[48:51].strip()
+
+
+def _parse_time_of_last_obs(header, line):
+    header.time_of_last_obs = _header_time(line)
+
+
+def _parse_rcv_clock_offs_appl(header, line):
+    header.rcv_clock_offs_appl = int(line[:6])
+
+
+def _parse_scale_factor(header, line):
+    if line[:1].strip():
+        header.scale_factors[line[0]] = int(line[2:6])
+
+
+def _parse_phase_shift(header, line):
+    parts = line[:60].split()
+    if not parts:
+        return  # Blank records mean no phase shift corrections were applied
+    if not line[:1].strip():
+        # Continuation of the satellite list of the previous record
+        if header.phase_shifts:
+            last_system = list(header.phase_shifts)[-1]
+            last_code = list(header.phase_shifts[last_system])[-1]
+            header.phase_shifts[last_system][last_code]["satellites"].extend(parts)
+        return
+    phase_shift = _header_float(line[6:14]) if line[6:14].strip() else 0.0
+    header.phase_shifts.setdefault(line[0], {})[line[2:5].strip()] = {
+        "phase_shift": phase_shift,
+        "satellites": line[18:60].split(),
+    }
+
+
+def _parse_glonass_slots(header, line):
+    parts = line[4:60].split()
+    for slot, channel in zip(parts[::2], parts[1::2]):
+        header.glonass_slot_frq_num[int(slot[1:])] = int(channel)
+
+
+def _parse_glonass_code_phase_bias(header, line):
+    parts = line[:60].split()
+    for signal, bias in zip(parts[::2], parts[1::2]):
+        header.glonass_code_phase_bias[signal] = float(bias)
+
+
+def _parse_leap_seconds(header, line):
+    header.leap_seconds = int(line[:6])
+
+
+def _parse_num_satellites(header, line):
+    header.num_satellites = int(line[:6])
+
+
+def _parse_prn_obs_counts(header, line):
+    if line[3:6].strip():
+        header._prn = line[3:6].strip()
+        header._prn_counts = []
+    if header._prn is None:
+        return
+    header._prn_counts.extend(int(x) for x in line[6:60].split())
+    codes = header.obs_types.get(header._prn[0], [])
+    header.prn_obs_counts[header._prn] = dict(zip(codes, header._prn_counts))
+
+
+def _parse_ionospheric_corr(header, line):
+    header.ionospheric_corr[line[:4].strip()] = [
+        _header_float(x) for x in line[4:60].split()[:4]
+    ]
+
+
+def _parse_time_system_corr(header, line):
+    a0, a1, t, week = line[4:60].split()[:4]
+    header.time_system_corr[line[:4].strip()] = {
+        "a0": _header_float(a0),
+        "a1": _header_float(a1),
+        "t": int(t),
+        "week": int(week),
+    }
+
+
+# Header label (columns 61-80) -> record parser
+HEADER_RECORDS = {
+    "RINEX VERSION / TYPE": _parse_version_type,
+    "PGM / RUN BY / DATE": _parse_program,
+    "COMMENT": _parse_comment,
+    "MARKER NAME": _parse_marker_name,
+    "MARKER NUMBER": _parse_marker_number,
+    "MARKER TYPE": _parse_marker_type,
+    "OBSERVER / AGENCY": _parse_observer_agency,
+    "REC # / TYPE / VERS": _parse_receiver,
+    "ANT # / TYPE": _parse_antenna,
+    "APPROX POSITION XYZ": _parse_approx_position,
+    "ANTENNA: DELTA H/E/N": _parse_antenna_delta,
+    "ANTENNA: PHASECENTER": _parse_antenna_phase_center,
+    "SYS / # / OBS TYPES": _parse_obs_types,
+    "SIGNAL STRENGTH UNIT": _parse_signal_strength_unit,
+    "INTERVAL": _parse_interval,
+    "TIME OF FIRST OBS": _parse_time_of_first_obs,
+    "TIME OF LAST OBS": _parse_time_of_last_obs,
+    "RCV CLOCK OFFS APPL": _parse_rcv_clock_offs_appl,
+    "SYS / SCALE FACTOR": _parse_scale_factor,
+    "SYS / PHASE SHIFT": _parse_phase_shift,
+    "SYS / PHASE SHIFTS": _parse_phase_shift,
+    "GLONASS SLOT / FRQ #": _parse_glonass_slots,
+    "GLONASS COD/PHS/BIS": _parse_glonass_code_phase_bias,
+    "LEAP SECONDS": _parse_leap_seconds,
+    "# OF SATELLITES": _parse_num_satellites,
+    "PRN / # OF OBS": _parse_prn_obs_counts,
+    "IONOSPHERIC CORR": _parse_ionospheric_corr,
+    "TIME SYSTEM CORR": _parse_time_system_corr,
+}
+
+
+def read_header(lines):
+    """
+    Reads header records from an iterator of lines (bytes) up to END OF HEADER.
+
+    Nothing after the header is read, so the iterator is left positioned on the first
+    data line and the same file object can be handed to the data decoders. Some
+    files omit END OF HEADER; their header ends at the first '>' epoch line, which
+    buffered files (anything with peek, e.g. open(..., "rb") or open_rinex) leave
+    unread. Other iterators have to consume it; it is then kept in
+    header.first_data_line.
+
+    :param lines: Iterator of lines, e.g. a file opened in binary mode.
+    :return: A RinexHeader.
+    """
+    header = RinexHeader()
+    peek = getattr(lines, "peek", None)
+    for raw_line in lines:
+        if raw_line.startswith(b">"):
+            header.first_data_line = raw_line
+            break
+        line = raw_line.decode("ascii", "replace").rstrip("\r\n")
+        label = line[HEADER_LABEL_START:].strip()
+        if label == END_OF_HEADER:
+            break
+        parse = HEADER_RECORDS.get(label)
+        if parse is not None:
+            parse(header, line)
+        if peek is not None and peek(1)[:1] == b">":
+            break  # No END OF HEADER: leave the first epoch line to the decoders
+    return header
+
+
+def read_header_file(file_path):
+    """Reads the header of a RINEX file, plain or compressed (see open_rinex)."""
+    with open_rinex(file_path) as file:
+        header = read_header(file)
+    header.file_path = file_path
+    return header
+
+
+def _scan_header(file_path):
+    try:
+        return read_header_file(file_path)
+    except (OSError, ValueError) as e:
+        print(f"Skipping {file_path}: {e}")
+        return None
+
+
+def scan_headers(file_paths, num_workers=1):
+    """
+    Reads the headers of many RINEX files, e.g. to inventory an archive.
+
+    :param file_paths: Paths of the files to scan.
+    :param num_workers: Number of worker processes; None uses every CPU.
+    :return: A list of RinexHeader aligned with file_paths; None for files that could
+             not be read.
+    """
+    file_paths = list(file_paths)
+    if num_workers is None:
+        num_workers = os.cpu_count() or 1
+    if num_workers == 1 or len(file_paths) < 2:
+        return [_scan_header(file_path) for file_path in file_paths]
+
+    chunk_size = max(1, len(file_paths) // (4 * num_workers))
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        return list(executor.map(_scan_header, file_paths, chunksize=chunk_size))
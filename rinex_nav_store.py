@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+from processed_rinex_navigation_file import parse_rinex_nav_file
+from rinex_cache import cached_parse
+from rinex_orbits import (
+    ephemeris_arrays,
+    gnss_seconds,
+    satellite_states,
+)
+
+MAX_EPHEMERIS_AGE = 4 * 3600.0  # Seconds an ephemeris is used away from its Toe
+DEFAULT_ORBIT_CACHE_SIZE = (
+    64  # Evaluated (PRNs, times) requests kept by NavigationStore
+)
+
+# Spacing between PRNs in the composite (PRN, Toe) search key; larger than any Toe in seconds
+_KEY_STRIDE = 1e10
+
+
+class NavigationStore:
+    """
+    Broadcast ephemerides indexed by PRN and Toe.
+
+    Records are deduplicated and sorted by (PRN, Toe) once, so large batches of
+    (PRN, time) queries are answered with a single searchsorted call. Evaluated
+    orbits are kept in a small LRU cache.
+    """
+
+    def __init__(
+        self,
+        nav_df,
+        include_unhealthy=False,
+        max_age=MAX_EPHEMERIS_AGE,
+        cache_size=DEFAULT_ORBIT_CACHE_SIZE,
+    ):
+        eph = ephemeris_arrays(nav_df)
+
+        # The same ephemeris is repeated across consecutive files and broadcasts
+        keep = (
+            ~pd.DataFrame(
+                {"prn": eph["prn"], "toe": eph["toe_abs"], "iode": eph["iode"]}
+            )
+            .duplicated(keep="first")
+            .to_numpy()
+        )
+        if not include_unhealthy:
+            keep &= eph["health"] == 0
+
+        self.prns = sorted(set(eph["prn"][keep].tolist()))
+        self._prn_codes = {prn: code for code, prn in enumerate(self.prns)}
+        codes = np.array([self._prn_codes.get(prn, -1) for prn in eph["prn"]])
+
+        order = np.flatnonzero(keep)
+        order = order[np.lexsort((eph["toe_abs"][order], codes[order]))]
+        self.eph = {name: values[order] for name, values in eph.items()}
+        self._codes = codes[order]
+        self._keys = self._codes * _KEY_STRIDE + self.eph["toe_abs"]
+
+        self.max_age = max_age
+        self.cache_size = cache_size
+        self._orbit_cache = OrderedDict()
+
+    @classmethod
+    def from_files(cls, file_paths, **kwargs):
+        """Builds one store from several navigation files, e.g. consecutive days."""
+        nav_dfs = [
+            cached_parse(file_path, parse_rinex_nav_file, "navigation")["navigation"]
+            for file_path in file_paths
+        ]
+        return cls(pd.concat(nav_dfs, ignore_index=True), **kwargs)
+
+    def records(self, prn):
+        """Returns the sorted ephemeris arrays of one PRN as views."""
+        code = self._prn_codes[prn]
+        start, stop = np.searchsorted(self._codes, [code, code + 1])
+        return {name: values[start:stop] for name, values in self.eph.items()}
+
+    def select(self, prns, t):
+        """
+        Picks the valid ephemeris for every (PRN, time) pair.
+
+        The latest record with Toe <= t is used; before a PRN's first Toe its first
+        record is used. Records further than max_age from t are rejected.
+
+        :param prns: PRNs, shape (n_prns,).
+        :param t: Seconds since the GPS epoch, shape (n_times,).
+        :return: Row indices into self.eph, shape (n_prns, n_times); -1 where no
+                 valid ephemeris exists.
+        """
+        t = np.asarray(t, dtype=np.float64)
+        codes = np.array([self._prn_codes.get(prn, -1) for prn in prns])[:, np.newaxis]
+        num_records = len(self._keys)
+        if num_records == 0:
+            return np.full((len(codes), t.size), -1, dtype=np.int64)
+
+        rows = np.searchsorted(self._keys, codes * _KEY_STRIDE + t, side="right") - 1
+        rows = np.clip(rows, 0, num_records - 1)
+
+        # Before the first Toe of a PRN the search lands on the previous PRN
+        first = np.clip(rows + 1, 0, num_records - 1)
+        before_first = (self._codes[rows] != codes) & (self._codes[first] == codes)
+        rows = np.where(before_first, first, rows)
+
+        valid = (
+            (codes >= 0)
+            & (self._codes[rows] == codes)
+            & (np.abs(t - self.eph["toe_abs"][rows]) <= self.max_age)
+        )
+        return np.where(valid, rows, -1)
+
+    def evaluate(self, prns, times):
+        """
+        Satellite states for every PRN at every time, see rinex_orbits.satellite_states.
+
+        :param prns: PRNs to evaluate.
+        :param times: datetime64 epochs (GPS/IRNSS time).
+        :return: A dictionary of (n_prns, n_times) arrays; NaN without a valid ephemeris.
+        """
+        t = gnss_seconds(times)
+        key = (tuple(prns), hashlib.blake2b(t.tobytes(), digest_size=16).digest())
+        if key in self._orbit_cache:
+            self._orbit_cache.move_to_end(key)
+            return self._orbit_cache[key]
+
+        rows = self.select(prns, t)
+        missing = rows < 0
+        selected = {
+            name: np.where(missing, np.nan, values[np.maximum(rows, 0)])
+            for name, values in self.eph.items()
+            if name != "prn"
+        }
+        states = satellite_states(selected, t[np.newaxis, :])
+
+        self._orbit_cache[key] = states
+        if len(self._orbit_cache) > self.cache_size:
+            self._orbit_cache.popitem(last=False)
+        return states
+
+
+if __name__ == "__main__":
+    store = NavigationStore.from_files(["ACCO0010.24N", "ACCO0020.24N"])
+    print(f"{len(store.eph['prn'])} ephemerides for {len(store.prns)} PRNs")
+
+    times = np.arange(
+        np.datetime64("2024-01-01T23:00", "ns"),
+        np.datetime64("2024-01-02T01:00", "ns"),
+        np.timedelta64(30, "s"),
+    )
+    states = store.evaluate(store.prns, times)
+    radius = np.linalg.norm(states["position"], axis=-1)
+    print(
+        f"Orbit radius across the day boundary: {np.nanmin(radius) / 1e3:.0f} - {np.nanmax(radius) / 1e3:.0f} km"
+    )
@@ -0,0 +1,325 @@
+import numpy as np
+import pandas as pd
+
+from processed_rinex_navigation_file import NAV_RECORD_FIELDS
+from rinex_time import (
+    GPS_EPOCH,
+    NANOSECONDS_PER_SECOND,
+    SYSTEM_TIME_SYSTEMS,
+    TIME_SYSTEM_OFFSETS,
+    WEEK_EPOCHS,
+)
+
+GM = 3.986005e14  # Earth's gravitational constant (m^3/s^2), GPS/IRNSS ICD value
+OMEGA_E_DOT = 7.2921151467e-5  # Earth rotation rate (rad/s)
+SPEED_OF_LIGHT = 299792458.0  # m/s
+SECONDS_PER_WEEK = 604800.0
+
+# Earth's gravitational constant and rotation rate of each system's ICD
+SYSTEM_GM = {
+    "G": GM,
+    "J": GM,
+    "I": GM,
+    "E": 3.986004418e14,
+    "C": 3.986004418e14,
+}
+SYSTEM_OMEGA_E_DOT = {
+    "G": OMEGA_E_DOT,
+    "J": OMEGA_E_DOT,
+    "I": OMEGA_E_DOT,
+    "E": OMEGA_E_DOT,
+    "C": 7.292115e-5,
+}
+
+# BeiDou GEO satellites (C01-C05, C59 onwards) are computed in an inclined frame
+# rotated back to ECEF by Rz(omega_e * tk) Rx(-5 deg)
+BDS_GEO_INCLINATION = np.radians(-5.0)
+
+KEPLER_ITERATIONS = 8  # Newton steps; converged to machine precision for e < 0.1
+
+# Systems broadcasting Keplerian elements; GLONASS and SBAS broadcast state vectors
+KEPLERIAN_SYSTEMS = ("G", "J", "E", "C", "I")
+
+# Navigation table columns used by the orbit engine, and their names in ephemeris arrays
+EPHEMERIS_COLUMNS = {
+    "SV Clock Bias": "af0",
+    "SV Clock Drift": "af1",
+    "SV Clock Drift Rate": "af2",
+    "Crs": "crs",
+    "Delta n": "delta_n",
+    "M0": "m0",
+    "Cuc": "cuc",
+    "e": "e",
+    "Cus": "cus",
+    "sqrt(A)": "sqrt_a",
+    "Toe": "toe",
+    "Cic": "cic",
+    "OMEGA0": "omega0",
+    "Cis": "cis",
+    "i0": "i0",
+    "Crc": "crc",
+    "omega": "omega",
+    "OMEGA DOT": "omega_dot",
+    "IDOT": "idot",
+    "Transmission Time": "transmission_time",
+}
+
+# Fields named differently by each system (e.g. "GPS Week" / "BDT Week", "IODE" /
+# "IODnav" / "AODE"), by their position in NAV_RECORD_FIELDS. Galileo's group delay
+# is BGD E5a/E1 and BeiDou's is TGD1.
+_SYSTEM_FIELD_POSITIONS = {"iode": 3, "week": 21, "health": 24, "tgd": 25}
+SYSTEM_EPHEMERIS_COLUMNS = {
+    system: {
+        NAV_RECORD_FIELDS[system][position]: name
+        for name, position in _SYSTEM_FIELD_POSITIONS.items()
+    }
+    for system in KEPLERIAN_SYSTEMS
+}
+
+
+def gnss_seconds(times):
+    """Converts datetime64 epochs (in GPS/IRNSS time) to seconds since the GPS epoch."""
+    times = np.asarray(times, dtype="datetime64[ns]")
+    return (times - GPS_EPOCH).astype(np.int64) / 1e9
+
+
+def _gps_time_shift(system):
+    """
+    Seconds to add to a time of the system's own scale, counted from the GPS epoch,
+    to get GPS time: e.g. 14 s for BeiDou time.
+    """
+    return -TIME_SYSTEM_OFFSETS[SYSTEM_TIME_SYSTEMS[system]]
+
+
+def _week_origin(system):
+    """Start of week 0 of the system's week numbering, in seconds since the GPS epoch."""
+    origin = WEEK_EPOCHS[SYSTEM_TIME_SYSTEMS[system]] - GPS_EPOCH
+    return origin.astype(np.int64) / NANOSECONDS_PER_SECOND
+
+
+def _is_bds_geo(prns):
+    """Flags BeiDou GEO PRNs (C01-C05 and C59 onwards) in an array of PRN strings."""
+    prns = np.asarray(prns, dtype=str)
+    numbers = np.array([int(prn[1:]) for prn in prns], dtype=int)
+    return (np.char.startswith(prns, "C")) & ((numbers <= 5) | (numbers >= 59))
+
+
+def ephemeris_arrays(nav_df):
+    """
+    Converts a navigation table from parse_rinex_nav_file into float64 ephemeris arrays.
+
+    The table may hold one system or several (the 'navigation' table); records of
+    GLONASS and SBAS, which broadcast no Keplerian elements, are skipped. Times of
+    every system are referenced to GPS time, e.g. BeiDou weeks count from GPS week
+    1356 and BeiDou time lags GPS time by 14 s.
+
+    :return: A dictionary of arrays, one entry per navigation record, with 'prn', the
+             Keplerian/clock parameters named as in EPHEMERIS_COLUMNS, 'week',
+             'iode', 'health' and 'tgd' from the system's own columns (see
+             SYSTEM_EPHEMERIS_COLUMNS), 'toe_abs' / 'toc_abs' / 'transmission_abs'
+             as continuous seconds since the GPS epoch in GPS time, and the system's
+             'gm' / 'omega_e_dot' with a 'geo' flag (1.0 for BeiDou GEO satellites).
+    """
+    systems = nav_df["PRN"].astype(str).str[:1].to_numpy()
+    keplerian = np.isin(systems, KEPLERIAN_SYSTEMS)
+    if not keplerian.all():
+        skipped = ", ".join(sorted(set(systems[~keplerian].tolist())))
+        print(f"Skipping navigation records without Keplerian elements: {skipped}")
+        nav_df = nav_df[keplerian]
+        systems = systems[keplerian]
+
+    eph = {
+        name: nav_df[column].to_numpy(dtype=np.float64)
+        for column, name in EPHEMERIS_COLUMNS.items()
+    }
+    eph["prn"] = nav_df["PRN"].to_numpy(dtype=str)
+
+    num_records = len(nav_df)
+    for name in _SYSTEM_FIELD_POSITIONS:
+        eph[name] = np.full(num_records, np.nan)
+    eph["gm"] = np.zeros(num_records)
+    eph["omega_e_dot"] = np.zeros(num_records)
+    eph["geo"] = _is_bds_geo(eph["prn"]).astype(np.float64)
+    week_origin = np.zeros(num_records)
+    time_shift = np.zeros(num_records)
+    for system in dict.fromkeys(systems.tolist()):
+        rows = systems == system
+        for column, name in SYSTEM_EPHEMERIS_COLUMNS[system].items():
+            eph[name][rows] = nav_df[column].to_numpy(dtype=np.float64)[rows]
+        eph["gm"][rows] = SYSTEM_GM[system]
+        eph["omega_e_dot"][rows] = SYSTEM_OMEGA_E_DOT[system]
+        week_origin[rows] = _week_origin(system)
+        time_shift[rows] = _gps_time_shift(system)
+
+    week_start = week_origin + eph["week"] * SECONDS_PER_WEEK + time_shift
+    eph["toe_abs"] = week_start + eph["toe"]
+    eph["transmission_abs"] = week_start + eph.pop("transmission_time")
+    eph["toc_abs"] = (
+        gnss_seconds(pd.to_datetime(nav_df["Epoch"]).to_numpy()) + time_shift
+    )
+    return eph
+
+
+def _solve_kepler(mean_anomaly, e):
+    """Solves M = E - e sin E for the eccentric anomaly E with vectorized Newton steps."""
+    eccentric_anomaly = mean_anomaly.copy()
+    for _ in range(KEPLER_ITERATIONS):
+        eccentric_anomaly -= (
+            eccentric_anomaly - e * np.sin(eccentric_anomaly) - mean_anomaly
+        ) / (1.0 - e * np.cos(eccentric_anomaly))
+    return eccentric_anomaly
+
+
+def _rotate_bds_geo(geo, theta, omega_e_dot, position, velocity):
+    """
+    Rotates BeiDou GEO positions and velocities from the inclined frame to ECEF,
+    Rz(theta) Rx(-5 deg); other records are returned unchanged.
+
+    :param geo: Boolean mask of the GEO records.
+    :param theta: Earth rotation angle since Toe, omega_e_dot * tk (rad).
+    :return: Tuple (x, y, z, vx, vy, vz).
+    """
+    x, y, z = position
+    vx, vy, vz = velocity
+    sin_p, cos_p = np.sin(BDS_GEO_INCLINATION), np.cos(BDS_GEO_INCLINATION)
+    sin_t, cos_t = np.sin(theta), np.cos(theta)
+
+    # Rx(-5 deg)
+    y1, z1 = cos_p * y + sin_p * z, -sin_p * y + cos_p * z
+    vy1, vz1 = cos_p * vy + sin_p * vz, -sin_p * vy + cos_p * vz
+
+    # Rz(theta), whose angle grows at the Earth rotation rate
+    x_geo = cos_t * x + sin_t * y1
+    y_geo = -sin_t * x + cos_t * y1
+    vx_geo = cos_t * vx + sin_t * vy1 + omega_e_dot * y_geo
+    vy_geo = -sin_t * vx + cos_t * vy1 - omega_e_dot * x_geo
+
+    return (
+        np.where(geo, x_geo, x),
+        np.where(geo, y_geo, y),
+        np.where(geo, z1, z),
+        np.where(geo, vx_geo, vx),
+        np.where(geo, vy_geo, vy),
+        np.where(geo, vz1, vz),
+    )
+
+
+def satellite_states(eph, t):
+    """
+    Evaluates broadcast ephemerides at the given times, all at once.
+
+    Ephemeris arrays and t are broadcast against each other, so (n_sat, 1)
+    ephemerides with (n_times,) times yield (n_sat, n_times) results.
+
+    Each record uses its system's GM and Earth rotation rate; BeiDou GEO records are
+    rotated from their inclined frame as in the BeiDou ICD.
+
+    :param eph: Ephemeris arrays as returned by ephemeris_arrays (or a selection of them).
+    :param t: Seconds since the GPS epoch (see gnss_seconds).
+    :return: A dictionary with 'position' and 'velocity' (ECEF, m and m/s, trailing axis
+             of size 3), 'clock_bias' (s, relativistic term included), 'relativistic'
+             (s) and 'tgd' (s).
+    """
+    t = np.asarray(t, dtype=np.float64)
+    e = eph["e"]
+    gm = eph.get("gm", GM)
+    omega_e_dot = eph.get("omega_e_dot", OMEGA_E_DOT)
+    geo = np.asarray(eph.get("geo", 0.0)) > 0
+
+    a = eph["sqrt_a"] ** 2
+    n = np.sqrt(gm / a**3) + eph["delta_n"]
+    tk = t - eph["toe_abs"]
+
+    mean_anomaly = eph["m0"] + n * tk
+    eccentric_anomaly = _solve_kepler(np.asarray(mean_anomaly, dtype=np.float64), e)
+    sin_e, cos_e = np.sin(eccentric_anomaly), np.cos(eccentric_anomaly)
+    one_minus_ecos = 1.0 - e * cos_e
+
+    true_anomaly = np.arctan2(np.sqrt(1.0 - e**2) * sin_e, cos_e - e)
+    phi = true_anomaly + eph["omega"]
+    sin_2phi, cos_2phi = np.sin(2.0 * phi), np.cos(2.0 * phi)
+
+    # Second harmonic perturbations
+    u = phi + eph["cus"] * sin_2phi + eph["cuc"] * cos_2phi
+    r = a * one_minus_ecos + eph["crs"] * sin_2phi + eph["crc"] * cos_2phi
+    i = eph["i0"] + eph["idot"] * tk + eph["cis"] * sin_2phi + eph["cic"] * cos_2phi
+
+    x_orb, y_orb = r * np.cos(u), r * np.sin(u)
+    # GEO nodes are taken in inertial space, the Earth's rotation is applied below
+    omega_dot = np.where(geo, eph["omega_dot"], eph["omega_dot"] - omega_e_dot)
+    omega = eph["omega0"] + omega_dot * tk - omega_e_dot * eph["toe"]
+    sin_o, cos_o = np.sin(omega), np.cos(omega)
+    sin_i, cos_i = np.sin(i), np.cos(i)
+
+    x = x_orb * cos_o - y_orb * cos_i * sin_o
+    y = x_orb * sin_o + y_orb * cos_i * cos_o
+    z = y_orb * sin_i
+
+    # Time derivatives of the orbital elements
+    e_dot = n / one_minus_ecos
+    phi_dot = e_dot * np.sqrt(1.0 - e**2) / one_minus_ecos
+    u_dot = phi_dot * (1.0 + 2.0 * (eph["cus"] * cos_2phi - eph["cuc"] * sin_2phi))
+    r_dot = a * e * sin_e * e_dot + 2.0 * phi_dot * (
+        eph["crs"] * cos_2phi - eph["crc"] * sin_2phi
+    )
+    i_dot = eph["idot"] + 2.0 * phi_dot * (
+        eph["cis"] * cos_2phi - eph["cic"] * sin_2phi
+    )
+
+    x_orb_dot = r_dot * np.cos(u) - y_orb * u_dot
+    y_orb_dot = r_dot * np.sin(u) + x_orb * u_dot
+
+    vx = (
+        x_orb_dot * cos_o
+        - y_orb_dot * cos_i * sin_o
+        + y_orb * sin_i * sin_o * i_dot
+        - y * omega_dot
+    )
+    vy = (
+        x_orb_dot * sin_o
+        + y_orb_dot * cos_i * cos_o
+        - y_orb * sin_i * cos_o * i_dot
+        + x * omega_dot
+    )
+    vz = y_orb_dot * sin_i + y_orb * cos_i * i_dot
+
+    if geo.any():
+        x, y, z, vx, vy, vz = _rotate_bds_geo(
+            geo, omega_e_dot * tk, omega_e_dot, (x, y, z), (vx, vy, vz)
+        )
+
+    # Satellite clock correction
+    relativistic = -2.0 * np.sqrt(gm) / SPEED_OF_LIGHT**2 * e * eph["sqrt_a"] * sin_e
+    dt = t - eph["toc_abs"]
+    clock_bias = eph["af0"] + eph["af1"] * dt + eph["af2"] * dt**2 + relativistic
+
+    return {
+        "position": np.stack([x, y, z], axis=-1),
+        "velocity": np.stack([vx, vy, vz], axis=-1),
+        "clock_bias": clock_bias,
+        "relativistic": relativistic,
+        "tgd": np.broadcast_to(eph["tgd"], clock_bias.shape),
+    }
+
+
+def propagate(nav_df, times, prns=None, **store_options):
+    """
+    Computes satellite states for every PRN at every time from a navigation table.
+
+    Ephemerides are selected by NavigationStore.select: the latest record with
+    Toe <= t (the first one before a PRN's first Toe), rejected beyond max_age.
+
+    :param nav_df: Navigation table from parse_rinex_nav_file.
+    :param times: datetime64 epochs (GPS/IRNSS time).
+    :param prns: PRNs to evaluate; every PRN of the store when omitted.
+    :param store_options: Passed to NavigationStore, e.g. max_age or include_unhealthy.
+    :return: A tuple (prns, states) where states holds (n_prns, n_times) arrays as in
+             satellite_states; NaN where no valid ephemeris exists.
+    """
+    # Imported here: the store is built on this module
+    from rinex_nav_store import NavigationStore
+
+    store = NavigationStore(nav_df, **store_options)
+    if prns is None:
+        prns = store.prns
+    return prns, store.evaluate(prns, times)
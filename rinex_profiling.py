@@ -0,0 +1,232 @@
+import argparse
+import contextlib
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+import tracemalloc
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_active = None  # Profiler collecting stage statistics, None when profiling is off
+
+# ru_maxrss is reported in kilobytes on Linux and in bytes on macOS
+_MAXRSS_UNIT = 1 if sys.platform == "darwin" else 1024
+
+
+def peak_rss_bytes():
+    """
+    Returns the process's peak resident set size in bytes.
+
+    Uses getrusage on Unix and psutil's peak working set on Windows; returns None
+    when neither is available.
+    """
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * _MAXRSS_UNIT
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return getattr(psutil.Process().memory_info(), "peak_wset", None)
+
+
+class Profiler:
+    """
+    Per-stage statistics of the parse/export pipeline.
+
+    Every stage records its number of calls, wall time, any counts reported by the
+    instrumented code (lines, epochs, observations, rows, ...) and memory
+    high-water marks: the process's peak resident size, and the peak traced
+    allocation when tracemalloc is running.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self._peaks = []  # Running traced peak of every open stage, innermost last
+
+    def _stage_stats(self, name):
+        if name not in self.stages:
+            self.stages[name] = {"calls": 0, "seconds": 0.0, "counts": {}}
+        return self.stages[name]
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            # Fold the peak so far into the enclosing stage before resetting it
+            if self._peaks:
+                self._peaks[-1] = max(
+                    self._peaks[-1], tracemalloc.get_traced_memory()[1]
+                )
+            tracemalloc.reset_peak()
+            self._peaks.append(0)
+
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stats = self._stage_stats(name)
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            stats["max_rss_bytes"] = peak_rss_bytes()
+            if tracing:
+                peak = max(self._peaks.pop(), tracemalloc.get_traced_memory()[1])
+                stats["peak_traced_bytes"] = max(
+                    stats.get("peak_traced_bytes", 0), peak
+                )
+                if self._peaks:
+                    self._peaks[-1] = max(self._peaks[-1], peak)
+
+    def count(self, name, **counts):
+        stage_counts = self._stage_stats(name)["counts"]
+        for key, value in counts.items():
+            stage_counts[key] = stage_counts.get(key, 0) + int(value)
+
+    def report(self):
+        """Returns the statistics as a dictionary: stage name -> statistics."""
+        report = {}
+        for name, stats in self.stages.items():
+            entry = {"calls": stats["calls"], "seconds": stats["seconds"]}
+            entry.update(stats["counts"])
+            for key in ("max_rss_bytes", "peak_traced_bytes"):
+                if key in stats:
+                    entry[key] = stats[key]
+            if stats["seconds"] > 0:
+                for key, value in stats["counts"].items():
+                    entry[f"{key}_per_second"] = value / stats["seconds"]
+            report[name] = entry
+        return report
+
+    def format_report(self):
+        """Returns the statistics as a text table, one line per stage."""
+        lines = [f"{'stage':40s} {'calls':>6s} {'seconds':>9s} {'peak MB':>9s}  counts"]
+        for name, stats in self.stages.items():
+            peak = stats.get("peak_traced_bytes", stats.get("max_rss_bytes"))
+            counts = ", ".join(f"{k}={v}" for k, v in stats["counts"].items())
+            lines.append(
+                f"{name:40s} {stats['calls']:6d} {stats['seconds']:9.3f} "
+                f"{(peak or 0) / 1e6:9.1f}  {counts}"
+            )
+        return "\n".join(lines)
+
+
+def stage(name):
+    """
+    Context manager timing one stage of the pipeline.
+
+    Costs nothing beyond a function call when no profile() is active.
+    """
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.stage(name)
+
+
+def count(name, **counts):
+    """Adds counts (lines=..., epochs=..., observations=...) to a stage when profiling."""
+    if _active is not None:
+        _active.count(name, **counts)
+
+
+@contextlib.contextmanager
+def profile(capture=None):
+    """
+    Collects stage statistics for the code run inside the block.
+
+    :param capture: None for stage statistics only, "tracemalloc" to also trace
+                    allocations (per-stage peaks plus the top allocation sites), or
+                    "cprofile" to also record a cProfile of the block.
+    :return: The Profiler; after the block, profiler.capture holds the cProfile
+             statistics or tracemalloc snapshot text when requested.
+    """
+    global _active
+    profiler = Profiler()
+    profiler.capture = None
+    previous, _active = _active, profiler
+
+    python_profile = None
+    started_tracing = False
+    if capture == "cprofile":
+        python_profile = cProfile.Profile()
+        python_profile.enable()
+    elif capture == "tracemalloc" and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        started_tracing = True
+    elif capture not in (None, "tracemalloc"):
+        raise ValueError(
+            f"Unknown capture '{capture}', expected 'cprofile' or 'tracemalloc'"
+        )
+
+    try:
+        yield profiler
+    finally:
+        _active = previous
+        if python_profile is not None:
+            python_profile.disable()
+            output = io.StringIO()
+            pstats.Stats(python_profile, stream=output).sort_stats(
+                "cumulative"
+            ).print_stats(30)
+            profiler.capture = output.getvalue()
+        elif started_tracing:
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            profiler.capture = "\n".join(
+                str(statistic) for statistic in snapshot.statistics("lineno")[:30]
+            )
+
+
+def main():
+    from processed_rinex_observation_file import parse_rinex_file
+    from Receiver_class_new import Receiver, export_irnss_data_to_file
+
+    parser = argparse.ArgumentParser(
+        description="Profile the RINEX parse/export pipeline stage by stage"
+    )
+    parser.add_argument("files", nargs="+", help="RINEX observation files")
+    parser.add_argument(
+        "--target",
+        choices=["parse", "process", "receiver"],
+        default="parse",
+        help="parse_rinex_file, process_rinex_files, or Receiver.import_data "
+        "followed by export_irnss_data_to_file",
+    )
+    parser.add_argument("--capture", choices=["cprofile", "tracemalloc"])
+    parser.add_argument("--json", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    with profile(args.capture) as profiler:
+        if args.target == "parse":
+            for file_path in args.files:
+                parse_rinex_file(file_path)
+        elif args.target == "process":
+            # The batch module's file name is not importable with a plain import
+            import importlib
+
+            multiple = importlib.import_module("Processed_rinex_data _multiple")
+            multiple.process_rinex_files(args.files)
+        else:
+            for file_path in args.files:
+                receiver = Receiver()
+                receiver.import_data(file_path)
+                export_irnss_data_to_file(receiver, f"{file_path}_irnss.txt")
+
+    print(profiler.format_report())
+    if profiler.capture:
+        print(profiler.capture)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(profiler.report(), file, indent=2)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    # Run through the importable module so the instrumented modules share its state
+    from rinex_profiling import main
+
+    main()
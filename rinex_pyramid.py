@@ -0,0 +1,313 @@
+import numpy as np
+import pandas as pd
+
+from processed_rinex_observation_file import (
+    DEFAULT_CHUNK_BYTES,
+    _observation_rows,
+    iter_observation_chunks,
+)
+from rinex_cache import cached_parse
+from rinex_profiling import count, stage
+from rinex_time import NANOSECONDS_PER_SECOND
+
+PYRAMID_LEVELS = (30, 300, 3600, 86400)  # Bucket widths in seconds, finest first
+PYRAMID_STATISTICS = ("min", "max", "mean", "count")
+
+# (PRN, Obs_Type) of the receiver clock offset series, kept once per epoch
+CLOCK_OFFSET_SERIES = ("", "Receiver Clock Offset")
+
+
+def _reduce(series, times, mins, maxs, sums, counts):
+    """Merges rows with the same (series, bucket time) into one, sorted by both."""
+    if not len(series):
+        return series, times, mins, maxs, sums, counts
+    order = np.lexsort((times, series))
+    series, times = series[order], times[order]
+    starts = np.flatnonzero(
+        np.concatenate(
+            ([True], (series[1:] != series[:-1]) | (times[1:] != times[:-1]))
+        )
+    )
+    return (
+        series[starts],
+        times[starts],
+        np.minimum.reduceat(mins[order], starts),
+        np.maximum.reduceat(maxs[order], starts),
+        np.add.reduceat(sums[order], starts),
+        np.add.reduceat(counts[order], starts),
+    )
+
+
+def _coarsen(level, width):
+    """Aggregates a finer level into buckets of width seconds."""
+    series, times, mins, maxs, sums, counts = level
+    bucket_ns = width * NANOSECONDS_PER_SECOND
+    return _reduce(series, times - times % bucket_ns, mins, maxs, sums, counts)
+
+
+def _to_stored(level):
+    series, times, mins, maxs, sums, counts = level
+    return {
+        "series": series.astype(np.int32),
+        "time": times.view("datetime64[ns]"),
+        "min": mins,
+        "max": maxs,
+        "mean": sums / counts,
+        "count": counts,
+    }
+
+
+def _from_stored(level):
+    counts = np.asarray(level["count"], dtype=np.int64)
+    return (
+        np.asarray(level["series"], dtype=np.int64),
+        np.asarray(level["time"]).view(np.int64),
+        np.asarray(level["min"], dtype=np.float64),
+        np.asarray(level["max"], dtype=np.float64),
+        np.asarray(level["mean"], dtype=np.float64) * counts,
+        counts,
+    )
+
+
+class PyramidBuilder:
+    """
+    Builds min/max/mean/count aggregates of every (PRN, Obs_Type) series at several
+    time resolutions.
+
+    Samples are aggregated into the finest level as they are added, chunk by chunk,
+    and every coarser level is then built from the level below it, so the raw
+    samples are touched once.
+    """
+
+    def __init__(self, levels=PYRAMID_LEVELS):
+        self.levels = tuple(sorted(levels))
+        self._series = {}  # (PRN, Obs_Type) -> series number, in order of appearance
+        self._parts = []
+
+    def _series_numbers(self, prns, obs_types):
+        prn_codes, prn_names = pd.factorize(np.asarray(prns))
+        type_codes, type_names = pd.factorize(np.asarray(obs_types))
+        pairs, inverse = np.unique(
+            prn_codes.astype(np.int64) * len(type_names) + type_codes,
+            return_inverse=True,
+        )
+        numbers = np.array(
+            [
+                self._series.setdefault(
+                    (
+                        str(prn_names[pair // len(type_names)]),
+                        str(type_names[pair % len(type_names)]),
+                    ),
+                    len(self._series),
+                )
+                for pair in pairs
+            ],
+            dtype=np.int64,
+        )
+        return numbers[inverse.reshape(-1)]
+
+    def add(self, times, prns, obs_types, values):
+        """
+        Adds samples of any series, in any order.
+
+        :param times: datetime64 times or int64 nanoseconds of every sample.
+        :param prns: PRN of every sample.
+        :param obs_types: Observation code of every sample.
+        :param values: Sample values; NaN samples are skipped.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = np.flatnonzero(~np.isnan(values))
+        if not len(valid):
+            return
+        times = np.asarray(times)
+        if times.dtype.kind == "M":
+            times = times.astype("datetime64[ns]").view(np.int64)
+        bucket_ns = self.levels[0] * NANOSECONDS_PER_SECOND
+        times = times[valid]
+        self._parts.append(
+            _reduce(
+                self._series_numbers(
+                    np.asarray(prns)[valid], np.asarray(obs_types)[valid]
+                ),
+                times - times % bucket_ns,
+                values[valid],
+                values[valid],
+                values[valid],
+                np.ones(len(valid), dtype=np.int64),
+            )
+        )
+
+    def add_chunk(self, rinex_arrays):
+        """Adds the observations and clock offsets of a parse_rinex_arrays result."""
+        epochs = rinex_arrays["epochs"]
+        observations = rinex_arrays["observations"]
+        line_index, fields, codes = _observation_rows(rinex_arrays)
+        self.add(
+            epochs["time"][observations["epoch_index"][line_index]],
+            observations["prn"][line_index],
+            codes,
+            observations["value"].ravel()[fields],
+        )
+
+        num_epochs = len(epochs["time"])
+        self.add(
+            epochs["time"],
+            np.full(num_epochs, CLOCK_OFFSET_SERIES[0]),
+            np.full(num_epochs, CLOCK_OFFSET_SERIES[1]),
+            epochs["clock_offset"],
+        )
+
+    def result(self):
+        """
+        Returns the pyramid, with one dictionary of arrays per level.
+
+        :return: A dictionary with 'levels' (bucket widths in seconds), 'series'
+                 (PRN and Obs_Type of every series number) and 'level_<width>' with
+                 the series number, bucket start time, min, max, mean and count of
+                 every non-empty bucket, sorted by series and time.
+        """
+        if self._parts:
+            level = _reduce(*(np.concatenate(arrays) for arrays in zip(*self._parts)))
+        else:
+            empty = np.empty(0, dtype=np.int64)
+            level = (empty, empty, *(np.empty(0) for _ in range(3)), empty)
+        self._parts = [level]
+
+        labels = list(self._series)
+        pyramid = {
+            "levels": list(self.levels),
+            "series": {
+                "prn": np.array([prn for prn, _ in labels], dtype=str),
+                "obs_type": np.array([obs_type for _, obs_type in labels], dtype=str),
+            },
+        }
+        for i, width in enumerate(self.levels):
+            if i:
+                level = _coarsen(level, width)
+            pyramid[f"level_{width}"] = _to_stored(level)
+        return pyramid
+
+
+def build_pyramid(file_path, levels=PYRAMID_LEVELS, chunk_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Builds the pyramid of a RINEX observation file, streaming it chunk by chunk.
+
+    :return: See PyramidBuilder.result.
+    """
+    builder = PyramidBuilder(levels)
+    with stage("build_pyramid"):
+        for chunk in iter_observation_chunks(file_path, chunk_bytes):
+            builder.add_chunk(chunk)
+        pyramid = builder.result()
+    count("build_pyramid", buckets=len(pyramid[f"level_{builder.levels[0]}"]["time"]))
+    return pyramid
+
+
+def cached_pyramid(file_path, cache=None):
+    """Returns the pyramid of file_path, stored in the parsed-data cache."""
+    return cached_parse(file_path, build_pyramid, "pyramid", cache)
+
+
+def merge_pyramids(pyramids):
+    """
+    Combines the pyramids of several files (e.g. consecutive days) into one.
+
+    Buckets split across files are merged, so the result equals the pyramid of the
+    files' concatenated observations.
+    """
+    levels = list(pyramids[0]["levels"])
+    if any(list(pyramid["levels"]) != levels for pyramid in pyramids):
+        raise ValueError("Pyramids with different levels can't be merged")
+
+    builder = PyramidBuilder(levels)
+    numbers = [
+        builder._series_numbers(pyramid["series"]["prn"], pyramid["series"]["obs_type"])
+        for pyramid in pyramids
+    ]
+
+    merged = {"levels": levels}
+    for width in levels:
+        parts = []
+        for pyramid, series_numbers in zip(pyramids, numbers):
+            series, *statistics = _from_stored(pyramid[f"level_{width}"])
+            parts.append((series_numbers[series], *statistics))
+        merged[f"level_{width}"] = _to_stored(
+            _reduce(*(np.concatenate(arrays) for arrays in zip(*parts)))
+        )
+
+    labels = list(builder._series)
+    merged["series"] = {
+        "prn": np.array([prn for prn, _ in labels], dtype=str),
+        "obs_type": np.array([obs_type for _, obs_type in labels], dtype=str),
+    }
+    return merged
+
+
+def choose_level(levels, start, end, num_pixels):
+    """
+    Picks the coarsest level that still has a bucket for every pixel of the span.
+
+    :param levels: Bucket widths in seconds.
+    :param start: Start of the displayed span (datetime64).
+    :param end: End of the displayed span (datetime64).
+    :param num_pixels: Width of the plot in pixels.
+    :return: The bucket width in seconds, or None when even the finest level is too
+             coarse and raw samples should be drawn.
+    """
+    span = (np.datetime64(end, "ns") - np.datetime64(start, "ns")) / np.timedelta64(
+        1, "s"
+    )
+    fitting = [width for width in levels if span / width >= num_pixels]
+    return max(fitting) if fitting else None
+
+
+def pyramid_series(pyramid, width, obs_types=None, prns=None, x_range=None):
+    """
+    Yields the buckets of the selected series at one level.
+
+    :param width: Bucket width in seconds, one of pyramid["levels"].
+    :param obs_types: Observation codes to select; None selects all.
+    :param prns: PRNs to select; None selects all.
+    :param x_range: Optional (start, end) window; the buckets overlapping it are
+                    yielded.
+    :return: Generator of (prn, obs_type, buckets), buckets being a dictionary of
+             array views with the time, min, max, mean and count of each bucket.
+    """
+    level = pyramid[f"level_{width}"]
+    series_prns = pyramid["series"]["prn"]
+    series_types = pyramid["series"]["obs_type"]
+    selected = np.ones(len(series_prns), dtype=bool)
+    if obs_types is not None:
+        selected &= np.isin(series_types, list(obs_types))
+    if prns is not None:
+        selected &= np.isin(series_prns, list(prns))
+
+    # Buckets are sorted by series, then time, so each series is one slice
+    numbers = np.flatnonzero(selected)
+    bounds = np.searchsorted(level["series"], np.stack([numbers, numbers + 1]))
+    for number, start, stop in zip(numbers, bounds[0], bounds[1]):
+        if x_range is not None:
+            # Buckets starting after x_range[0] - width overlap the window,
+            # including the one that starts before x_range[0] and covers it
+            times = level["time"][start:stop]
+            earliest = np.datetime64(x_range[0], "ns") - np.timedelta64(width, "s")
+            stop = start + np.searchsorted(
+                times, np.datetime64(x_range[1], "ns"), "right"
+            )
+            start += np.searchsorted(times, earliest, "right")
+        if stop > start:
+            yield str(series_prns[number]), str(series_types[number]), {
+                name: level[name][start:stop] for name in ("time", *PYRAMID_STATISTICS)
+            }
+
+
+if __name__ == "__main__":
+    file_paths = ["ACCO0010.24O", "ACCO0020.24O"]
+    pyramid = merge_pyramids([cached_pyramid(file_path) for file_path in file_paths])
+    print(f"{len(pyramid['series']['prn'])} series in {', '.join(file_paths)}")
+    for width in pyramid["levels"]:
+        print(f"{width:>6} s buckets: {len(pyramid[f'level_{width}']['time'])}")
+
+    start, end = np.datetime64("2024-01-01"), np.datetime64("2024-01-03")
+    width = choose_level(pyramid["levels"], start, end, 1200)
+    print(f"Two days on 1200 pixels: {width} s level")
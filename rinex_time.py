@@ -0,0 +1,289 @@
+import numpy as np
+
+NANOSECONDS_PER_SECOND = 1_000_000_000
+SECONDS_PER_WEEK = 604800
+GPS_EPOCH = np.datetime64("1980-01-06T00:00:00", "ns")
+
+# Start of week 0 of each time system, in that time system. RINEX 3 aligns the
+# Galileo, QZSS and IRNSS week numbers with the GPS week.
+WEEK_EPOCHS = {
+    "GPS": GPS_EPOCH,
+    "GAL": GPS_EPOCH,
+    "QZS": GPS_EPOCH,
+    "IRN": GPS_EPOCH,
+    "BDT": np.datetime64("2006-01-01T00:00:00", "ns"),
+}
+
+# Offset of each time system from GPS time in seconds (system time = GPS time + offset).
+# UTC and GLONASS time (UTC(SU) in RINEX) additionally lag GPS time by the leap seconds.
+TIME_SYSTEM_OFFSETS = {
+    "GPS": 0,
+    "GAL": 0,
+    "QZS": 0,
+    "IRN": 0,
+    "BDT": -14,
+    "TAI": 19,
+    "UTC": 0,
+    "GLO": 0,
+}
+UTC_TIME_SYSTEMS = ("UTC", "GLO")
+
+# Time system of single-system files without one in TIME OF FIRST OBS
+SYSTEM_TIME_SYSTEMS = {
+    "G": "GPS",
+    "R": "GLO",
+    "E": "GAL",
+    "C": "BDT",
+    "J": "QZS",
+    "I": "IRN",
+    "S": "GPS",
+}
+
+# GPS - UTC in seconds from each UTC date on; used when a file has no LEAP SECONDS
+LEAP_SECONDS = (
+    ("1981-07-01", 1),
+    ("1982-07-01", 2),
+    ("1983-07-01", 3),
+    ("1985-07-01", 4),
+    ("1988-01-01", 5),
+    ("1990-01-01", 6),
+    ("1991-01-01", 7),
+    ("1992-07-01", 8),
+    ("1993-07-01", 9),
+    ("1994-07-01", 10),
+    ("1996-01-01", 11),
+    ("1997-07-01", 12),
+    ("1999-01-01", 13),
+    ("2006-01-01", 14),
+    ("2009-01-01", 15),
+    ("2012-07-01", 16),
+    ("2015-07-01", 17),
+    ("2017-01-01", 18),
+)
+_LEAP_DATES = np.array([date for date, _ in LEAP_SECONDS], dtype="datetime64[ns]")
+_LEAP_VALUES = np.array([0] + [value for _, value in LEAP_SECONDS], dtype=np.int64)
+
+# Columns of the calendar fields of a RINEX 3 '>' epoch line
+EPOCH_TIME_WIDTH = 29  # "> yyyy mm dd hh mm ss.sssssss"
+_EPOCH_FIELDS = {
+    "year": (2, 6),
+    "month": (7, 9),
+    "day": (10, 12),
+    "hour": (13, 15),
+    "minute": (16, 18),
+    "second": (18, 21),
+    "fraction": (22, 29),  # Seven decimals, i.e. units of 100 ns
+}
+
+
+def _fixed_width_ints(rows, start, stop):
+    """Converts one fixed-width column of a uint8 line buffer to int64."""
+    text = np.ascontiguousarray(rows[:, start:stop]).view(f"S{stop - start}").ravel()
+    return text.astype(np.int64)
+
+
+def _as_ns(times):
+    """Returns datetime64 times (or int64 nanoseconds) as an int64 nanosecond array."""
+    times = np.asarray(times)
+    if times.dtype.kind == "M":
+        return times.astype("datetime64[ns]").view(np.int64)
+    return times.astype(np.int64)
+
+
+def calendar_to_ns(years, months, days, hours=0, minutes=0, seconds=0.0):
+    """
+    Converts calendar fields to int64 nanoseconds since 1970-01-01, all arrays at once.
+
+    :param seconds: Seconds of the minute; fractional seconds are kept to the nanosecond.
+    :return: An int64 array broadcast from the inputs.
+    """
+    years = np.asarray(years, dtype=np.int64)
+    dates = (
+        (years - 1970).astype("datetime64[Y]")
+        + (np.asarray(months, dtype=np.int64) - 1).astype("timedelta64[M]")
+    ).astype("datetime64[D]") + (np.asarray(days, dtype=np.int64) - 1).astype(
+        "timedelta64[D]"
+    )
+    nanoseconds = (
+        np.asarray(hours, dtype=np.int64) * 3600 * NANOSECONDS_PER_SECOND
+        + np.asarray(minutes, dtype=np.int64) * 60 * NANOSECONDS_PER_SECOND
+        + np.round(
+            np.asarray(seconds, dtype=np.float64) * NANOSECONDS_PER_SECOND
+        ).astype(np.int64)
+    )
+    return dates.astype("datetime64[ns]").view(np.int64) + nanoseconds
+
+
+def calendar_to_datetime64(years, months, days, hours=0, minutes=0, seconds=0.0):
+    """Same as calendar_to_ns, returned as datetime64[ns]."""
+    return calendar_to_ns(years, months, days, hours, minutes, seconds).view(
+        "datetime64[ns]"
+    )
+
+
+def ns_to_calendar(times):
+    """
+    Splits times into calendar fields.
+
+    :param times: datetime64 times or int64 nanoseconds since 1970-01-01.
+    :return: A tuple (years, months, days, hours, minutes, seconds) of arrays;
+             seconds is float64 and holds the fraction of the second.
+    """
+    times = _as_ns(times).view("datetime64[ns]")
+    dates = times.astype("datetime64[D]")
+    months = times.astype("datetime64[M]")
+    years = times.astype("datetime64[Y]")
+    nanoseconds = (times - dates).view(np.int64)
+    minutes_of_day, nanoseconds = np.divmod(nanoseconds, 60 * NANOSECONDS_PER_SECOND)
+    return (
+        years.astype(np.int64) + 1970,
+        (months - years.astype("datetime64[M]")).astype(np.int64) + 1,
+        (dates - months.astype("datetime64[D]")).astype(np.int64) + 1,
+        minutes_of_day // 60,
+        minutes_of_day % 60,
+        nanoseconds / NANOSECONDS_PER_SECOND,
+    )
+
+
+def epoch_lines_to_ns(epoch_lines):
+    """
+    Converts RINEX 3 '>' epoch lines to int64 nanoseconds in one vectorized step.
+
+    Seconds are read as integer digits (F11.7), so sub-second epochs of high-rate
+    files are exact to 100 ns.
+
+    :param epoch_lines: Epoch lines (bytes), e.g. every '>' line of a file.
+    :return: An int64 array of nanoseconds since 1970-01-01, in the file's time system.
+    """
+    if not epoch_lines:
+        return np.empty(0, dtype=np.int64)
+    buffer = np.frombuffer(
+        b"".join(
+            line[:EPOCH_TIME_WIDTH].ljust(EPOCH_TIME_WIDTH) for line in epoch_lines
+        ),
+        dtype=np.uint8,
+    ).reshape(len(epoch_lines), EPOCH_TIME_WIDTH)
+    fields = {
+        name: _fixed_width_ints(buffer, start, stop)
+        for name, (start, stop) in _EPOCH_FIELDS.items()
+    }
+    return calendar_to_ns(
+        fields["year"],
+        fields["month"],
+        fields["day"],
+        fields["hour"],
+        fields["minute"],
+        fields["second"],
+    ) + fields["fraction"] * (NANOSECONDS_PER_SECOND // 10_000_000)
+
+
+def leap_seconds_at(times, time_system="UTC"):
+    """
+    Returns GPS - UTC in seconds at each time, from the LEAP_SECONDS table.
+
+    :param time_system: Time system of times; a leap second counts for GNSS times
+                        from the instant UTC reaches its date, e.g. from GPS time
+                        2017-01-01 00:00:18 on for the leap second of 2017.
+    """
+    times = _as_ns(times)
+    dates = _LEAP_DATES.view(np.int64)
+    if time_system not in UTC_TIME_SYSTEMS:
+        times = times - TIME_SYSTEM_OFFSETS[time_system] * NANOSECONDS_PER_SECOND
+        dates = dates + _LEAP_VALUES[1:] * NANOSECONDS_PER_SECOND
+    return _LEAP_VALUES[np.searchsorted(dates, times, "right")]
+
+
+def header_time_system(header):
+    """Returns the time system of a RinexHeader, e.g. "IRN", defaulting by satellite system."""
+    return header.time_system or SYSTEM_TIME_SYSTEMS.get(header.satellite_system, "GPS")
+
+
+def convert_time_system(times, from_system, to_system, leap_seconds=None):
+    """
+    Converts times between GNSS time systems, UTC and TAI.
+
+    :param times: datetime64 times or int64 nanoseconds in from_system.
+    :param from_system: Time system of times, e.g. "IRN", "GPS", "BDT" or "UTC".
+    :param to_system: Time system to convert to.
+    :param leap_seconds: GPS - UTC in seconds, e.g. the header's LEAP SECONDS; taken
+                         from the LEAP_SECONDS table when omitted and UTC is involved.
+    :return: datetime64[ns] times in to_system.
+    """
+    for system in (from_system, to_system):
+        if system not in TIME_SYSTEM_OFFSETS:
+            raise ValueError(f"Unknown time system '{system}'")
+
+    times = _as_ns(times)
+    offset = (
+        TIME_SYSTEM_OFFSETS[to_system] - TIME_SYSTEM_OFFSETS[from_system]
+    ) * NANOSECONDS_PER_SECOND
+    if (from_system in UTC_TIME_SYSTEMS) != (to_system in UTC_TIME_SYSTEMS):
+        if leap_seconds is None:
+            leap_seconds = leap_seconds_at(times, from_system)
+        leap = np.asarray(leap_seconds, dtype=np.int64) * NANOSECONDS_PER_SECOND
+        offset = offset + (leap if from_system in UTC_TIME_SYSTEMS else -leap)
+    return (times + offset).view("datetime64[ns]")
+
+
+def to_utc(times, time_system, leap_seconds=None):
+    """Converts times in time_system to UTC, see convert_time_system."""
+    return convert_time_system(times, time_system, "UTC", leap_seconds)
+
+
+def from_utc(times, time_system, leap_seconds=None):
+    """Converts UTC times to time_system, see convert_time_system."""
+    return convert_time_system(times, "UTC", time_system, leap_seconds)
+
+
+def to_week_tow(times, time_system="GPS"):
+    """
+    Converts times to week number and time of week.
+
+    :param times: datetime64 times or int64 nanoseconds in time_system.
+    :param time_system: "GPS", "IRN", "GAL", "QZS" or "BDT".
+    :return: A tuple (weeks, tows): int64 week numbers and float64 seconds of week.
+    """
+    if time_system not in WEEK_EPOCHS:
+        raise ValueError(f"Time system '{time_system}' has no week numbering")
+    elapsed = _as_ns(times) - WEEK_EPOCHS[time_system].view(np.int64)
+    weeks, nanoseconds = np.divmod(elapsed, SECONDS_PER_WEEK * NANOSECONDS_PER_SECOND)
+    return weeks, nanoseconds / NANOSECONDS_PER_SECOND
+
+
+def from_week_tow(weeks, tows, time_system="GPS"):
+    """
+    Converts week numbers and times of week to datetime64[ns] times in time_system.
+
+    :param tows: Seconds of week; fractions are kept to the nanosecond.
+    """
+    if time_system not in WEEK_EPOCHS:
+        raise ValueError(f"Time system '{time_system}' has no week numbering")
+    nanoseconds = np.asarray(weeks, dtype=np.int64) * (
+        SECONDS_PER_WEEK * NANOSECONDS_PER_SECOND
+    ) + np.round(np.asarray(tows, dtype=np.float64) * NANOSECONDS_PER_SECOND).astype(
+        np.int64
+    )
+    return (WEEK_EPOCHS[time_system].view(np.int64) + nanoseconds).view(
+        "datetime64[ns]"
+    )
+
+
+if __name__ == "__main__":
+    from rinex_header import read_header_file
+
+    file_path = "ACCO0020.24O"
+    header = read_header_file(file_path)
+    time_system = header_time_system(header)
+
+    with open(file_path, "rb") as file:
+        epoch_lines = [line for line in file if line.startswith(b">")]
+    times = epoch_lines_to_ns(epoch_lines).view("datetime64[ns]")
+    weeks, tows = to_week_tow(
+        times, time_system if time_system in WEEK_EPOCHS else "GPS"
+    )
+
+    print(f"{len(times)} epochs in {time_system}, {times[0]} - {times[-1]}")
+    print(f"First epoch: week {weeks[0]}, TOW {tows[0]:.3f} s")
+    print(
+        f"First epoch in UTC: {to_utc(times[:1], time_system, header.leap_seconds)[0]}"
+    )
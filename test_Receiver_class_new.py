@@ -0,0 +1,23 @@
+import numpy as np
+import pandas as pd
+
+from Receiver_class_new import Receiver, export_observations_to_file
+
+
+def test_export_after_out_of_order_append(tmp_path):
+    receiver = Receiver()
+    times = ["2024-01-02T00:01:00", "2024-01-02T00:00:00", "2024-01-02T00:00:30"]
+    for value, time in enumerate(times):
+        receiver.append_observation(float(value), time, "I", "L5C", "I02")
+        receiver.append_observation(float(value) + 0.5, time, "I", "L5C", "I05")
+    receiver.append_observation(9.0, "2024-01-02T00:00:15", "I", "L5C", "I02")
+    receiver.delete_observation("2024-01-02T00:00:15")
+
+    output = tmp_path / "observations.txt"
+    assert export_observations_to_file(receiver, str(output))
+
+    exported = pd.read_csv(output, sep="\t")
+    epochs = pd.to_datetime(exported["Epoch"]).to_numpy()
+    assert (np.diff(epochs) >= np.timedelta64(0)).all()
+    assert exported["PRN"].tolist() == ["I02", "I05"] * 3
+    assert exported["Value"].tolist() == [1.0, 1.5, 2.0, 2.5, 0.0, 0.5]
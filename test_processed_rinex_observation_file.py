@@ -0,0 +1,126 @@
+import gzip
+import os
+
+import numpy as np
+import pytest
+
+from Receiver_class_new import Receiver
+from processed_rinex_observation_file import (
+    decode_epoch_lines,
+    iter_epochs,
+    iter_observation_chunks,
+    parse_rinex_arrays,
+)
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "ACCO0020.24O")
+SAMPLE_EPOCHS = 40
+
+# Flag 4 (header records follow) with the date left blank, and its one record
+EVENT_BLOCK = b">" + b" " * 30 + b"4  1\n" + b"ANTENNA CHANGED".ljust(60) + b"COMMENT\n"
+
+
+def _sample_text():
+    """Header and first SAMPLE_EPOCHS epoch blocks of the sample observation file."""
+    with open(SAMPLE_FILE, "rb") as file:
+        data = file.read()
+    end = 0
+    for _ in range(SAMPLE_EPOCHS + 1):
+        end = data.index(b"\n>", end) + 1
+    return data[:end]
+
+
+def _without_end_of_header(data):
+    return b"".join(
+        line for line in data.splitlines(keepends=True) if b"END OF HEADER" not in line
+    )
+
+
+def _concatenate(chunks):
+    return {
+        "time": np.concatenate([chunk["epochs"]["time"] for chunk in chunks]),
+        "prn": np.concatenate([chunk["observations"]["prn"] for chunk in chunks]),
+        "value": np.concatenate([chunk["observations"]["value"] for chunk in chunks]),
+    }
+
+
+def _assert_same(result, expected):
+    assert len(result["time"]) == SAMPLE_EPOCHS
+    np.testing.assert_array_equal(result["time"], expected["time"])
+    np.testing.assert_array_equal(result["prn"], expected["prn"])
+    np.testing.assert_array_equal(result["value"], expected["value"])
+
+
+@pytest.fixture
+def sample_files(tmp_path):
+    data = _sample_text()
+    paths = {
+        "plain": tmp_path / "with_end.24O",
+        "no_end": tmp_path / "no_end.24O",
+        "no_end_gz": tmp_path / "no_end.24O.gz",
+    }
+    paths["plain"].write_bytes(data)
+    paths["no_end"].write_bytes(_without_end_of_header(data))
+    paths["no_end_gz"].write_bytes(gzip.compress(_without_end_of_header(data)))
+    return {name: str(path) for name, path in paths.items()}
+
+
+def _arrays(result):
+    return {
+        "time": result["epochs"]["time"],
+        "prn": result["observations"]["prn"],
+        "value": result["observations"]["value"],
+    }
+
+
+@pytest.mark.parametrize("name", ["no_end", "no_end_gz"])
+@pytest.mark.parametrize("num_workers", [1, 2])
+def test_parse_rinex_arrays_without_end_of_header(sample_files, name, num_workers):
+    expected = _arrays(parse_rinex_arrays(sample_files["plain"]))
+    result = parse_rinex_arrays(sample_files[name], num_workers=num_workers)
+    _assert_same(_arrays(result), expected)
+
+
+@pytest.mark.parametrize("name", ["no_end", "no_end_gz"])
+@pytest.mark.parametrize("chunk_bytes", [2000, 1 << 20])
+def test_iter_observation_chunks_without_end_of_header(sample_files, name, chunk_bytes):
+    expected = _arrays(parse_rinex_arrays(sample_files["plain"]))
+    chunks = list(iter_observation_chunks(sample_files[name], chunk_bytes))
+    _assert_same(_concatenate(chunks), expected)
+
+
+def test_iter_epochs_without_end_of_header(sample_files):
+    expected = list(iter_epochs(sample_files["plain"]))
+    result = list(iter_epochs(sample_files["no_end"]))
+    assert len(result) == len(expected) == SAMPLE_EPOCHS
+    assert result[0]["time"] == expected[0]["time"]
+
+
+def test_decode_epoch_lines_without_clock_field():
+    epochs = decode_epoch_lines(
+        [
+            b"> 2024 01 02 00 00  0.0000000  0  2",
+            b"> 2024 01 02 00 00 30.0000000  0  2       0.000000000123",
+        ]
+    )
+    np.testing.assert_array_equal(epochs["num_satellites"], [2, 2])
+    assert np.isnan(epochs["clock_offset"][0])
+    assert epochs["clock_offset"][1] == 1.23e-10
+
+    single = decode_epoch_lines([b"> 2024 01 02 00 00  0.0000000  0  2"])
+    assert np.isnan(single["clock_offset"][0])
+
+
+def test_iter_epochs_skips_blank_time_event(tmp_path):
+    data = _sample_text()
+    insert = data.index(b"\n>", data.index(b"\n>") + 1) + 1  # Before the 2nd epoch
+    path = tmp_path / "event.24O"
+    path.write_bytes(data[:insert] + EVENT_BLOCK + data[insert:])
+
+    expected = parse_rinex_arrays(str(path))["epochs"]
+    epochs = list(iter_epochs(str(path)))
+    assert len(epochs) == len(expected["time"]) == SAMPLE_EPOCHS
+    assert [epoch["time"] for epoch in epochs] == list(expected["time"])
+
+    receiver = Receiver()
+    receiver.import_data(str(path))
+    assert receiver.num_epochs == SAMPLE_EPOCHS
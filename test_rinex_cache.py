@@ -0,0 +1,152 @@
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import rinex_cache
+from rinex_cache import ParsedDataCache, cached_parse
+
+
+def _result(value):
+    """A parse result mixing a table, arrays and nested metadata."""
+    return {
+        "metadata": {
+            "marker_name": "ACCO",
+            "approx_position_xyz": [1.5, -2.5, 3.5],
+            "glonass_channels": {"R01": 1, "R02": -4},
+        },
+        "obs_types": {"G": ["C1C", "L1C"], "R": ["C1C"]},
+        "epochs": {
+            "time": np.array(["2024-01-02T00:00", "2024-01-02T00:00:30"], "M8[ns]"),
+            "clock_offset": np.array([np.nan, value]),
+        },
+        "observations": pd.DataFrame(
+            {
+                "PRN": pd.Categorical(["G01", "R01", "G01"]),
+                "Obs_Type": ["C1C", "C1C", "L1C"],
+                "Value": [value, 2.0, 3.0],
+            }
+        ),
+    }
+
+
+class _Parser:
+    """Counts the parses the cache could not spare."""
+
+    def __init__(self, value=1.0):
+        self.value = value
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return _result(self.value)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ParsedDataCache(str(tmp_path / "cache"))
+
+
+@pytest.fixture
+def rinex_file(tmp_path):
+    path = tmp_path / "ACCO0020.24O"
+    path.write_bytes(b"observations\n")
+    return str(path)
+
+
+def _entries(cache):
+    return sorted(os.path.basename(path) for _, _, path in cache._entries())
+
+
+def test_nested_result_round_trip(cache, rinex_file):
+    parse = _Parser()
+    expected = _result(1.0)
+    cached_parse(rinex_file, parse, "observations", cache)
+    result = cached_parse(rinex_file, parse, "observations", cache)
+    assert parse.calls == 1
+
+    assert result["metadata"] == expected["metadata"]
+    assert result["obs_types"] == expected["obs_types"]
+    for name, values in expected["epochs"].items():
+        assert result["epochs"][name].dtype == values.dtype
+        np.testing.assert_array_equal(result["epochs"][name], values)
+    pd.testing.assert_frame_equal(result["observations"], expected["observations"])
+
+
+def test_manifest_keys_hash_by_path_size_and_mtime(cache, rinex_file, monkeypatch):
+    hashed = []
+    content_hash = rinex_cache._content_hash
+    monkeypatch.setattr(
+        rinex_cache,
+        "_content_hash",
+        lambda path: hashed.append(path) or content_hash(path),
+    )
+
+    first = cache.content_hash(rinex_file)
+    assert cache.content_hash(rinex_file) == first
+    assert len(hashed) == 1
+
+    stat = os.stat(rinex_file)
+    manifest = cache._load_manifest()[os.path.abspath(rinex_file)]
+    assert manifest == {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": first,
+    }
+
+    # Touched: rehashed, same content and so the same key
+    os.utime(rinex_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    assert cache.content_hash(rinex_file) == first
+    assert len(hashed) == 2
+
+    # A copy elsewhere has its own manifest entry but shares the content key
+    copy = os.path.join(os.path.dirname(rinex_file), "copy.24O")
+    with open(copy, "wb") as file:
+        file.write(b"observations\n")
+    assert cache.content_hash(copy) == first
+    assert len(hashed) == 3
+
+
+def test_changed_file_is_parsed_again(cache, rinex_file):
+    parse = _Parser(1.0)
+    cached_parse(rinex_file, parse, "observations", cache)
+
+    stat = os.stat(rinex_file)
+    with open(rinex_file, "ab") as file:
+        file.write(b"more observations\n")
+    os.utime(rinex_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    parse.value = 5.0
+
+    result = cached_parse(rinex_file, parse, "observations", cache)
+    assert parse.calls == 2
+    assert result["observations"]["Value"][0] == 5.0
+
+    content_hash = cache.content_hash(rinex_file)
+    cache.invalidate(rinex_file)
+    assert not any(name.startswith(content_hash) for name in _entries(cache))
+    assert cache.load(rinex_file, "observations") is None
+
+
+def test_least_recently_used_entries_are_evicted(cache, tmp_path):
+    paths = []
+    for name in ("A", "B", "C"):
+        path = tmp_path / f"{name}.24O"
+        path.write_bytes(name.encode())
+        paths.append(str(path))
+
+    cached_parse(paths[0], _Parser(), "observations", cache)
+    entry_bytes = sum(size for _, size, _ in cache._entries())
+    cache.max_bytes = int(2.5 * entry_bytes)
+
+    cached_parse(paths[1], _Parser(), "observations", cache)
+    time.sleep(0.05)
+    assert cache.load(paths[0], "observations") is not None  # A is now the newest
+    time.sleep(0.05)
+    cached_parse(paths[2], _Parser(), "observations", cache)
+
+    assert cache.load(paths[1], "observations") is None
+    assert cache.load(paths[0], "observations") is not None
+    assert cache.load(paths[2], "observations") is not None
+    assert sum(size for _, size, _ in cache._entries()) <= cache.max_bytes
@@ -0,0 +1,73 @@
+import numpy as np
+import pytest
+
+from processed_rinex_observation_file import parse_rinex_arrays, parse_rinex_file
+from rinex_combinations import (
+    carrier_frequency,
+    combinations_from_arrays,
+    combinations_from_table,
+)
+
+GLONASS_CHANNELS = {"R01": 1, "R02": -4}
+
+
+def _header_line(content, label):
+    return f"{content:60s}{label:20s}\n"
+
+
+def _glonass_file(tmp_path, with_slots=True):
+    lines = [
+        _header_line(
+            "     3.04           OBSERVATION DATA    R", "RINEX VERSION / TYPE"
+        ),
+        _header_line("R    4 C1C L1C C2C L2C", "SYS / # / OBS TYPES"),
+    ]
+    if with_slots:
+        lines.append(_header_line("  2 R01  1 R02 -4", "GLONASS SLOT / FRQ #"))
+    lines.append(_header_line("", "END OF HEADER"))
+
+    for second, offset in ((0, 0.0), (30, 100.0)):
+        lines.append(f"> 2024 01 02 00 00 {second:10.7f}  0  2\n")
+        for prn, value in (("R01", 20000000.0), ("R02", 21000000.0)):
+            values = (value + offset, value / 0.19 + offset, value + 3.0, value / 0.24)
+            lines.append(prn + "".join(f"{v:14.3f}  " for v in values) + "\n")
+
+    path = tmp_path / ("with_slots.24O" if with_slots else "no_slots.24O")
+    path.write_text("".join(lines))
+    return str(path)
+
+
+def test_combinations_from_arrays_uses_header_channels(tmp_path):
+    rinex_arrays = parse_rinex_arrays(_glonass_file(tmp_path))
+    assert rinex_arrays["metadata"]["glonass_channels"] == GLONASS_CHANNELS
+
+    combinations = combinations_from_arrays(rinex_arrays, "R")
+    prn = rinex_arrays["observations"]["prn"]
+    f1 = carrier_frequency("R", "1", np.array([GLONASS_CHANNELS[p] for p in prn]))
+    np.testing.assert_allclose(
+        combinations["phase1"],
+        rinex_arrays["observations"]["value"][:, 1] * 299_792_458.0 / f1,
+    )
+
+
+def test_combinations_from_arrays_without_channels(tmp_path):
+    rinex_arrays = parse_rinex_arrays(_glonass_file(tmp_path, with_slots=False))
+    assert combinations_from_arrays(rinex_arrays, "R") == {}
+
+    combinations = combinations_from_arrays(
+        rinex_arrays, "R", glonass_channels=GLONASS_CHANNELS
+    )
+    assert np.isfinite(combinations["phase_if"]).all()
+
+
+@pytest.mark.parametrize("glonass_channels", [GLONASS_CHANNELS, None])
+def test_combinations_from_table(tmp_path, glonass_channels):
+    obs_df = parse_rinex_file(_glonass_file(tmp_path))["observations"]
+    combinations = combinations_from_table(
+        obs_df, "R", glonass_channels=glonass_channels
+    )
+    assert len(combinations) == 4
+    if glonass_channels is None:
+        assert combinations.columns.empty
+    else:
+        assert np.isfinite(combinations["phase_if"]).all()
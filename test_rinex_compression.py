@@ -0,0 +1,199 @@
+import gzip
+import io
+import random
+
+import numpy as np
+import pytest
+
+from processed_rinex_observation_file import parse_rinex_arrays
+from rinex_compression import crinex_lines, open_rinex, unlzw_chunks
+
+# G02 drops out at 00:01:00 and comes back with new arcs; G01's L1C loss of lock
+# indicator is set at 00:00:30 and cleared ("&") next epoch; a flag 4 event sits
+# between the second and third epochs.
+RINEX3 = b"""\
+     3.04           OBSERVATION DATA    G                   RINEX VERSION / TYPE
+G    2 C1C L1C                                              SYS / # / OBS TYPES
+                                                            END OF HEADER
+> 2024 01 02 00 00  0.0000000  0  2       0.000000123456
+G01  20000000.125   105000000.250
+G02  21000000.500   110000000.75017
+> 2024 01 02 00 00 30.0000000  0  2       0.000000123556
+G01  20000100.250   105000525.50015
+G02  21000050.250   110000262.50017
+> 2024 01 02 00 00 45.0000000  4  1
+ANTENNA CHANGED                                             COMMENT
+> 2024 01 02 00 01  0.0000000  0  1       0.000000123656
+G01  20000200.500   105001050.875 5
+> 2024 01 02 00 01 30.0000000  0  2       0.000000123756
+G01  20000300.875   105001576.375 5
+G02  21000150.000   110000787.250
+"""
+
+CRINEX3 = b"""\
+3.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE
+RNX2CRX ver.4.1.0                       02-Jan-24 00:00     CRINEX PROG / DATE
+     3.04           OBSERVATION DATA    G                   RINEX VERSION / TYPE
+G    2 C1C L1C                                              SYS / # / OBS TYPES
+                                                            END OF HEADER
+> 2024 01 02 00 00  0.0000000  0  2      G01G02
+2&123456
+3&20000000125 3&105000000250
+3&21000000500 3&110000000750   17
+                   3
+100
+100125 525250   15
+49750 261750
+> 2024 01 02 00 00 45.0000000  4  1
+ANTENNA CHANGED                                             COMMENT
+                 1 &              1         &&&
+0
+125 125   &
+                   3              2         G02
+0
+0 0
+3&21000150000 3&110000787250
+"""
+
+# The same observations in RINEX 2, whose clock offsets have nine decimals
+RINEX2 = b"""\
+     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE
+     2    C1    L1                                          # / TYPES OF OBSERV
+                                                            END OF HEADER
+ 24  1  2  0  0  0.0000000  0  2G01G02                               0.000000123
+  20000000.125   105000000.250
+  21000000.500   110000000.75017
+ 24  1  2  0  0 30.0000000  0  2G01G02                               0.000000124
+  20000100.250   105000525.50015
+  21000050.250   110000262.50017
+ 24  1  2  0  0 45.0000000  4  1
+ANTENNA CHANGED                                             COMMENT
+ 24  1  2  0  1  0.0000000  0  1G01                                  0.000000124
+  20000200.500   105001050.875 5
+ 24  1  2  0  1 30.0000000  0  2G01G02                               0.000000124
+  20000300.875   105001576.375 5
+  21000150.000   110000787.250
+"""
+
+CRINEX1 = b"""\
+1.0                 COMPACT RINEX FORMAT                    CRINEX VERS   / TYPE
+RNX2CRX ver.4.1.0                       02-Jan-24 00:00     CRINEX PROG / DATE
+     2.11           OBSERVATION DATA    M (MIXED)           RINEX VERSION / TYPE
+     2    C1    L1                                          # / TYPES OF OBSERV
+                                                            END OF HEADER
+&24  1  2  0  0  0.0000000  0  2G01G02
+2&123
+3&20000000125 3&105000000250
+3&21000000500 3&110000000750   17
+                3
+1
+100125 525250   15
+49750 261750
+&24  1  2  0  0 45.0000000  4  1
+ANTENNA CHANGED                                             COMMENT
+              1 &              1   &&&
+-1
+125 125   &
+                3              2   G02
+0
+0 0
+3&21000150000 3&110000787250
+"""
+
+
+def _lzw_compress(data, max_width):
+    """Unix compress (block mode) of data, clearing the table whenever it fills."""
+    bits, num_bits, group_start = 0, 0, 0
+
+    def emit(code, width):
+        nonlocal bits, num_bits
+        bits |= code << num_bits
+        num_bits += width
+
+    def end_group(width):
+        # Codes are read in groups of `width` bytes: pad up to the next group
+        nonlocal num_bits, group_start
+        num_bits += -(num_bits - group_start) % (8 * width)
+        group_start = num_bits
+
+    table = {bytes([byte]): byte for byte in range(256)}
+    width, prefix = 9, b""
+    for byte in data:
+        entry = prefix + bytes([byte])
+        if entry in table:
+            prefix = entry
+            continue
+        emit(table[prefix], width)
+        prefix = bytes([byte])
+        if len(table) + 1 < 1 << max_width:
+            table[entry] = len(table) + 1  # Code 256 is CLEAR
+        else:
+            emit(256, width)
+            end_group(width)
+            table = {bytes([byte]): byte for byte in range(256)}
+            width = 9
+            continue
+        if len(table) >= 1 << width and width < max_width:
+            end_group(width)
+            width += 1
+    if prefix:
+        emit(table[prefix], width)
+    return bytes([0x1F, 0x9D, 0x80 | max_width]) + bits.to_bytes(
+        (num_bits + 7) // 8, "little"
+    )
+
+
+def _decode(crinex):
+    return b"".join(crinex_lines(io.BytesIO(crinex)))
+
+
+@pytest.mark.parametrize("crinex, rinex", [(CRINEX3, RINEX3), (CRINEX1, RINEX2)])
+def test_crinex_lines(crinex, rinex):
+    assert _decode(crinex) == rinex
+
+
+def test_crinex_lines_crlf():
+    assert _decode(CRINEX3.replace(b"\n", b"\r\n")) == RINEX3
+
+
+def test_crinex_lines_rejects_uninitialized_arc():
+    # The first epoch dropped: G01 starts with a difference
+    lines = CRINEX3.splitlines(keepends=True)
+    broken = b"".join(
+        lines[:5] + [b"> 2024 01 02 00 00 30.0000000  0  2      G01G02\n"]
+    )
+    broken += b"".join(lines[10:])
+    with pytest.raises(ValueError):
+        _decode(broken)
+
+
+@pytest.mark.parametrize("max_width", [10, 16])
+def test_unlzw_chunks(max_width):
+    # 10 bit codes fill the table several times, 16 bit ones grow from 9 to 13 bits
+    generator = random.Random(0)
+    data = bytes(generator.choice(b"GPS 0123456789.\n") for _ in range(60000))
+    compressed = _lzw_compress(data, max_width)
+    assert b"".join(unlzw_chunks(io.BytesIO(compressed))) == data
+
+
+@pytest.mark.parametrize("packaging", ["crx", "crx.gz", "crx.Z"])
+def test_parse_rinex_arrays_crinex(tmp_path, packaging):
+    plain = tmp_path / "ACCO0020.24O"
+    plain.write_bytes(RINEX3)
+    path = tmp_path / f"ACCO0020.24{packaging}"
+    if packaging == "crx.gz":
+        path.write_bytes(gzip.compress(CRINEX3))
+    elif packaging == "crx.Z":
+        path.write_bytes(_lzw_compress(CRINEX3, 16))
+    else:
+        path.write_bytes(CRINEX3)
+
+    with open_rinex(str(path)) as file:
+        assert file.read() == RINEX3
+
+    expected = parse_rinex_arrays(str(plain))
+    result = parse_rinex_arrays(str(path))
+    assert len(result["epochs"]["time"]) == 4
+    for table in ("epochs", "observations"):
+        for name, values in expected[table].items():
+            np.testing.assert_array_equal(result[table][name], values)
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+
+from processed_rinex_observation_file import parse_rinex_arrays
+from rinex_epoch_index import build_epoch_index, load_epoch_index, read_range
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "ACCO0020.24O")
+SAMPLE_EPOCHS = 40
+EVENT_AFTER = 10  # Epoch blocks before the inserted event block
+
+# Flag 4 (header records follow) with the date left blank, and its one record
+EVENT_BLOCK = b">" + b" " * 30 + b"4  1\n" + b"ANTENNA CHANGED".ljust(60) + b"COMMENT\n"
+
+
+def _sample_with_event(tmp_path):
+    with open(SAMPLE_FILE, "rb") as file:
+        data = file.read()
+    starts = []
+    position = data.index(b"END OF HEADER")
+    for _ in range(SAMPLE_EPOCHS + 1):
+        position = data.index(b"\n>", position) + 1
+        starts.append(position)
+    insert = starts[EVENT_AFTER]
+    path = tmp_path / "event.24O"
+    path.write_bytes(data[:insert] + EVENT_BLOCK + data[insert : starts[-1]])
+    return str(path)
+
+
+def test_build_epoch_index_leaves_out_blank_time_event(tmp_path):
+    file_path = _sample_with_event(tmp_path)
+    index = build_epoch_index(file_path, save=False)
+
+    expected = parse_rinex_arrays(file_path)["epochs"]
+    assert len(index["time"]) == SAMPLE_EPOCHS
+    np.testing.assert_array_equal(index["time"], expected["time"])
+    assert (np.diff(index["time"]) > np.timedelta64(0)).all()
+    assert (index["flag"] < 2).all()
+
+
+def test_read_range_across_event(tmp_path):
+    file_path = _sample_with_event(tmp_path)
+    index = load_epoch_index(file_path)
+    expected = parse_rinex_arrays(file_path)
+
+    start, end = index["time"][EVENT_AFTER - 2], index["time"][EVENT_AFTER + 2]
+    result = read_range(file_path, start, end)
+    np.testing.assert_array_equal(
+        result["epochs"]["time"],
+        expected["epochs"]["time"][EVENT_AFTER - 2 : EVENT_AFTER + 2],
+    )
+    in_range = np.isin(
+        expected["observations"]["epoch_index"],
+        np.arange(EVENT_AFTER - 2, EVENT_AFTER + 2),
+    )
+    np.testing.assert_array_equal(
+        result["observations"]["value"], expected["observations"]["value"][in_range]
+    )
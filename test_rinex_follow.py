@@ -0,0 +1,92 @@
+import os
+import random
+
+import numpy as np
+import pytest
+
+from processed_rinex_observation_file import parse_rinex_arrays
+from rinex_follow import LiveObservations, ObservationFollower
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "ACCO0020.24O")
+SAMPLE_EPOCHS = 40
+
+
+def _sample_text(num_epochs=SAMPLE_EPOCHS):
+    """Header and first num_epochs epoch blocks of the sample observation file."""
+    with open(SAMPLE_FILE, "rb") as file:
+        data = file.read()
+    end = 0
+    for _ in range(num_epochs + 1):
+        end = data.index(b"\n>", end) + 1
+    return data[:end]
+
+
+def _concatenate(chunks):
+    return {
+        "time": np.concatenate([chunk["epochs"]["time"] for chunk in chunks]),
+        "prn": np.concatenate([chunk["observations"]["prn"] for chunk in chunks]),
+        "value": np.concatenate([chunk["observations"]["value"] for chunk in chunks]),
+    }
+
+
+@pytest.mark.parametrize("newline", [b"\n", b"\r\n"])
+@pytest.mark.parametrize("seed", range(3))
+def test_follow_file_written_in_pieces(tmp_path, newline, seed):
+    data = _sample_text().replace(b"\n", newline)
+    expected = parse_rinex_arrays(SAMPLE_FILE, num_workers=1)
+
+    # Random cuts, mid-line ones included, plus one inside the header, one between
+    # '\r' and '\n' and one right after an epoch line
+    generator = random.Random(seed)
+    cuts = set(generator.sample(range(1, len(data)), 60))
+    cuts.add(data.index(b"END OF HEADER") - 5)
+    first_epoch_end = data.index(b"\n", data.index(b"\n>") + 1)
+    cuts.update([first_epoch_end, first_epoch_end + 1])
+
+    path = tmp_path / "LIVE0020.24O"
+    path.write_bytes(b"")
+    follower = ObservationFollower(str(path))
+    live = LiveObservations(capacity=16)
+    follower.subscribe(live)
+
+    chunks = []
+    start = 0
+    for end in sorted(cuts) + [len(data)]:
+        with open(path, "ab") as file:
+            file.write(data[start:end])
+        start = end
+        chunk = follower.poll()
+        if chunk is not None:
+            chunks.append(chunk)
+
+    assert follower.num_epochs == SAMPLE_EPOCHS
+    result = _concatenate(chunks)
+    num_lines = len(result["prn"])
+    np.testing.assert_array_equal(
+        result["time"], expected["epochs"]["time"][:SAMPLE_EPOCHS]
+    )
+    np.testing.assert_array_equal(
+        result["prn"], expected["observations"]["prn"][:num_lines]
+    )
+    np.testing.assert_array_equal(
+        result["value"], expected["observations"]["value"][:num_lines]
+    )
+    rows, cursor = live.since()
+    assert cursor == live.size > 0
+    assert np.isin(rows["time"], expected["epochs"]["time"][:SAMPLE_EPOCHS]).all()
+
+
+def test_follow_starts_over_when_file_shrinks(tmp_path):
+    path = tmp_path / "LIVE0020.24O"
+    path.write_bytes(_sample_text())
+    follower = ObservationFollower(str(path))
+    assert len(follower.poll()["epochs"]["time"]) == SAMPLE_EPOCHS
+    assert follower.poll() is None
+
+    # Replaced by a new file, shorter than what was consumed
+    path.write_bytes(_sample_text(5))
+    chunk = follower.poll()
+    assert follower.num_epochs == 5
+    np.testing.assert_array_equal(
+        chunk["epochs"]["time"], parse_rinex_arrays(str(path))["epochs"]["time"]
+    )
@@ -0,0 +1,195 @@
+import os
+
+import numpy as np
+import pytest
+
+from processed_rinex_navigation_file import parse_rinex_nav_file
+from rinex_nav_store import NavigationStore
+from rinex_orbits import (
+    SECONDS_PER_WEEK,
+    SYSTEM_GM,
+    SYSTEM_OMEGA_E_DOT,
+    ephemeris_arrays,
+    propagate,
+    satellite_states,
+)
+from rinex_time import GPS_EPOCH
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "ACCO0010.24N")
+BDT_WEEK_OFFSET = 1356  # GPS week of BeiDou week 0
+BDT_GPS_SECONDS = 14  # BeiDou time lags GPS time by 14 s
+
+GLONASS_RECORD = b"""\
+R01 2024 01 01 00 15 00 1.234567890123e-05 0.000000000000e+00 0.000000000000e+00
+     1.000000000000e+04 1.000000000000e+00 0.000000000000e+00 0.000000000000e+00
+     1.000000000000e+04 1.000000000000e+00 0.000000000000e+00 1.000000000000e+00
+     1.000000000000e+04 1.000000000000e+00 0.000000000000e+00 0.000000000000e+00
+"""
+
+
+@pytest.fixture
+def mixed_nav_file(tmp_path):
+    """
+    A mixed navigation file: the first IRNSS record of the sample file broadcast as
+    a GPS, a Galileo and a BeiDou satellite (week in BDT), plus a GLONASS record.
+    """
+    with open(SAMPLE_FILE, "rb") as file:
+        data = file.read()
+    header_end = data.index(b"\n", data.index(b"END OF HEADER")) + 1
+    lines = data[header_end:].splitlines(keepends=True)
+    irnss_record = b"".join(lines[:8])
+    week_field = b"2.295000000000e+03"
+    assert week_field in irnss_record
+
+    records = [
+        b"G05" + irnss_record[3:],
+        b"E11" + irnss_record[3:],
+        b"C20"
+        + irnss_record[3:].replace(
+            week_field, f"{2295 - BDT_WEEK_OFFSET:.12e}".encode()
+        ),
+        GLONASS_RECORD,
+    ]
+    path = tmp_path / "MIXD0010.24P"
+    path.write_bytes(data[:header_end] + b"".join(records))
+    return str(path)
+
+
+def test_ephemeris_arrays_gps_table(mixed_nav_file):
+    gps = parse_rinex_nav_file(mixed_nav_file)["navigation_G"]
+    eph = ephemeris_arrays(gps)
+
+    np.testing.assert_array_equal(eph["week"], gps["GPS Week"])
+    np.testing.assert_array_equal(eph["iode"], gps["IODE"])
+    np.testing.assert_array_equal(eph["health"], gps["SV Health"])
+    np.testing.assert_array_equal(
+        eph["toe_abs"], gps["GPS Week"] * SECONDS_PER_WEEK + gps["Toe"]
+    )
+
+
+def test_ephemeris_arrays_mixed_table(mixed_nav_file):
+    nav = parse_rinex_nav_file(mixed_nav_file)
+    eph = ephemeris_arrays(nav["navigation"])
+
+    # GLONASS broadcasts no Keplerian elements
+    assert eph["prn"].tolist() == ["G05", "E11", "C20"]
+    np.testing.assert_array_equal(
+        eph["iode"],
+        [
+            nav["navigation_G"]["IODE"][0],
+            nav["navigation_E"]["IODnav"][0],
+            nav["navigation_C"]["AODE"][0],
+        ],
+    )
+    np.testing.assert_array_equal(eph["week"], [2295, 2295, 2295 - BDT_WEEK_OFFSET])
+
+    # The BeiDou Toe and Toc are the same instants as the GPS ones, 14 s later in GPS time
+    gps, galileo, beidou = range(3)
+    assert eph["toe_abs"][galileo] == eph["toe_abs"][gps]
+    assert eph["toe_abs"][beidou] == eph["toe_abs"][gps] + BDT_GPS_SECONDS
+    assert eph["toc_abs"][beidou] == eph["toc_abs"][gps] + BDT_GPS_SECONDS
+
+    # Each system with its own constants: the same elements give nearly the same orbit
+    np.testing.assert_array_equal(eph["gm"], [SYSTEM_GM[s] for s in "GEC"])
+    np.testing.assert_array_equal(
+        eph["omega_e_dot"], [SYSTEM_OMEGA_E_DOT[s] for s in "GEC"]
+    )
+    np.testing.assert_array_equal(eph["geo"], [0, 0, 0])
+    states = satellite_states(eph, eph["toe_abs"])
+    np.testing.assert_allclose(
+        states["position"][galileo], states["position"][gps], rtol=0, atol=1e-6
+    )
+    # BeiDou's Earth rotation rate turns the node by a further 1.3e-7 rad at this Toe
+    node_turn = (SYSTEM_OMEGA_E_DOT["C"] - SYSTEM_OMEGA_E_DOT["G"]) * eph["toe"][gps]
+    x, y = states["position"][gps][:2]
+    rotated = [x * np.cos(node_turn) + y * np.sin(node_turn)]
+    rotated += [-x * np.sin(node_turn) + y * np.cos(node_turn)]
+    np.testing.assert_allclose(
+        states["position"][beidou][:2], rotated, rtol=0, atol=1e-6
+    )
+    later = satellite_states(eph, eph["toe_abs"] + 3600.0)
+    assert np.abs(later["position"][galileo] - later["position"][gps]).max() > 0.1
+
+
+def test_navigation_store_mixed_table(mixed_nav_file):
+    store = NavigationStore(parse_rinex_nav_file(mixed_nav_file)["navigation"])
+    assert store.prns == ["C20", "E11", "G05"]
+
+    toe = store.records("G05")["toe_abs"][0]
+    rows = store.select(["G05", "C20", "R01"], np.array([toe, toe + BDT_GPS_SECONDS]))
+    assert (rows[:2] >= 0).all()
+    assert (rows[2] == -1).all()
+
+    times = GPS_EPOCH + np.array([toe * 1e9], dtype="timedelta64[ns]")
+    states = store.evaluate(["G05", "C20"], times)
+    assert np.isfinite(states["position"]).all()
+
+
+def test_propagate_selects_like_navigation_store():
+    nav_df = parse_rinex_nav_file(SAMPLE_FILE)["navigation"]
+    times = np.arange(
+        np.datetime64("2024-01-01T00:00", "ns"),
+        np.datetime64("2024-01-02T00:00", "ns"),
+        np.timedelta64(17, "m"),
+    )
+    prns, states = propagate(nav_df, times)
+
+    store = NavigationStore(nav_df)
+    assert prns == store.prns
+    expected = store.evaluate(prns, times)
+    np.testing.assert_array_equal(states["position"], expected["position"])
+    np.testing.assert_array_equal(states["clock_bias"], expected["clock_bias"])
+
+
+def _bds_geo_ephemeris(mixed_nav_file, prn, **elements):
+    """The BeiDou record of the mixed file as a geostationary orbit, relabelled prn."""
+    eph = ephemeris_arrays(parse_rinex_nav_file(mixed_nav_file)["navigation_C"])
+    omega_e_dot = SYSTEM_OMEGA_E_DOT["C"]
+    eph.update(
+        prn=np.array([prn]),
+        geo=np.array([1.0 if prn in ("C01", "C59") else 0.0]),
+        sqrt_a=np.array([(SYSTEM_GM["C"] / omega_e_dot**2) ** (1 / 6)]),
+        e=np.zeros(1),
+        i0=np.radians([5.0]),
+        # Ascending node at 180 deg in the inclined frame, where Rx(-5 deg) levels it
+        omega0=np.array([np.pi + omega_e_dot * eph["toe"][0]]),
+        **{name: np.zeros(1) for name in ("delta_n", "omega_dot", "idot")},
+        **{name: np.zeros(1) for name in ("cuc", "cus", "crc", "crs", "cic", "cis")},
+    )
+    for name, value in elements.items():
+        eph[name] = np.array([value])
+    return eph
+
+
+def test_satellite_states_bds_geo_is_geostationary(mixed_nav_file):
+    eph = _bds_geo_ephemeris(mixed_nav_file, "C01")
+    t = eph["toe_abs"][0] + np.arange(0.0, 86400.0, 900.0)
+    states = satellite_states(eph, t)
+
+    position = states["position"]
+    assert np.abs(position[:, 2]).max() < 1e-3
+    assert np.abs(position - position[0]).max() < 1e-3
+    assert np.abs(states["velocity"]).max() < 1e-6
+
+    # Through the MEO rotation the same elements swing 5 deg out of the equator
+    meo = satellite_states(_bds_geo_ephemeris(mixed_nav_file, "C20"), t)
+    assert np.abs(meo["position"][:, 2]).max() > 3e6
+
+
+def test_satellite_states_bds_geo_velocity(mixed_nav_file):
+    eph = _bds_geo_ephemeris(
+        mixed_nav_file, "C59", e=0.001, m0=0.3, omega=1.0, crs=50.0, cuc=1e-6
+    )
+    eph["idot"][:] = 1e-10
+    eph["omega_dot"][:] = -5e-9
+    t = eph["toe_abs"][0] + np.arange(-7200.0, 7200.0, 600.0)
+
+    step = 0.5
+    ahead = satellite_states(eph, t + step)["position"]
+    behind = satellite_states(eph, t - step)["position"]
+    np.testing.assert_allclose(
+        satellite_states(eph, t)["velocity"],
+        (ahead - behind) / (2 * step),
+        rtol=0,
+        atol=1e-4,
+    )
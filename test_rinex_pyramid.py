@@ -0,0 +1,46 @@
+import os
+
+import numpy as np
+import pytest
+
+from rinex_pyramid import build_pyramid, pyramid_series
+
+SAMPLE_FILE = os.path.join(os.path.dirname(__file__), "ACCO0020.24O")
+WIDTH = 300
+
+
+@pytest.fixture(scope="module")
+def pyramid():
+    return build_pyramid(SAMPLE_FILE, levels=(WIDTH,))
+
+
+def _first_buckets(pyramid, x_range):
+    return {
+        (prn, obs_type): buckets["time"][0]
+        for prn, obs_type, buckets in pyramid_series(
+            pyramid, WIDTH, ["S5C"], None, x_range
+        )
+    }
+
+
+def test_pyramid_series_keeps_bucket_covering_window_start(pyramid):
+    level_times = pyramid[f"level_{WIDTH}"]["time"]
+    bucket_start = np.unique(level_times)[10]
+    end = bucket_start + np.timedelta64(3600, "s")
+
+    for x_start in (bucket_start, bucket_start + np.timedelta64(WIDTH // 2, "s")):
+        first = _first_buckets(pyramid, (x_start, end))
+        assert first
+        for time in first.values():
+            assert time == bucket_start
+
+
+def test_pyramid_series_skips_bucket_ending_at_window_start(pyramid):
+    level_times = pyramid[f"level_{WIDTH}"]["time"]
+    bucket_start = np.unique(level_times)[10]
+    x_start = bucket_start + np.timedelta64(WIDTH, "s")
+
+    first = _first_buckets(pyramid, (x_start, x_start + np.timedelta64(3600, "s")))
+    assert first
+    for time in first.values():
+        assert time >= x_start
@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from rinex_time import (
+    GPS_EPOCH,
+    LEAP_SECONDS,
+    calendar_to_datetime64,
+    convert_time_system,
+    epoch_lines_to_ns,
+    from_utc,
+    from_week_tow,
+    leap_seconds_at,
+    ns_to_calendar,
+    to_utc,
+    to_week_tow,
+)
+
+
+def _times(*texts):
+    return np.array(texts, dtype="datetime64[ns]")
+
+
+def test_leap_seconds_table():
+    assert LEAP_SECONDS[-1] == ("2017-01-01", 18)
+    utc = _times(
+        "1980-01-06",
+        "1981-06-30T23:59:59",
+        "1981-07-01",
+        "2016-12-31T23:59:59",
+        "2017-01-01",
+        "2024-01-02",
+    )
+    np.testing.assert_array_equal(leap_seconds_at(utc), [0, 0, 1, 17, 18, 18])
+
+    # In GPS time the 2017 leap second takes effect 18 s after midnight
+    gps = _times("2017-01-01T00:00:17", "2017-01-01T00:00:18")
+    np.testing.assert_array_equal(leap_seconds_at(gps, "GPS"), [17, 18])
+
+
+@pytest.mark.parametrize(
+    "gps, utc",
+    [
+        ("2016-12-31T23:59:59", "2016-12-31T23:59:42"),
+        ("2017-01-01T00:00:00", "2016-12-31T23:59:43"),
+        ("2017-01-01T00:00:18", "2017-01-01T00:00:00"),
+        ("2024-01-02T00:00:00", "2024-01-01T23:59:42"),
+    ],
+)
+def test_gps_utc_around_2017_leap_second(gps, utc):
+    assert to_utc(_times(gps), "GPS")[0] == np.datetime64(utc, "ns")
+    assert from_utc(_times(utc), "GPS")[0] == np.datetime64(gps, "ns")
+
+
+def test_header_leap_seconds_override_table():
+    gps = _times("2024-01-02T00:00:00")
+    assert to_utc(gps, "IRN", leap_seconds=18)[0] == np.datetime64(
+        "2024-01-01T23:59:42", "ns"
+    )
+    assert to_utc(gps, "GPS", leap_seconds=[17])[0] == np.datetime64(
+        "2024-01-01T23:59:43", "ns"
+    )
+
+
+def test_bdt_and_tai_offsets():
+    gps = _times("2024-01-02T00:00:00")
+    assert convert_time_system(gps, "GPS", "BDT")[0] == np.datetime64(
+        "2024-01-01T23:59:46", "ns"
+    )
+    assert convert_time_system(gps, "GPS", "TAI")[0] == np.datetime64(
+        "2024-01-02T00:00:19", "ns"
+    )
+    # TAI - UTC = 37 s since 2017, BDT - UTC = 4 s
+    assert to_utc(_times("2024-01-02T00:00:37"), "TAI")[0] == np.datetime64(
+        "2024-01-02", "ns"
+    )
+    assert to_utc(_times("2024-01-02T00:00:04"), "BDT")[0] == np.datetime64(
+        "2024-01-02", "ns"
+    )
+    with pytest.raises(ValueError):
+        convert_time_system(gps, "GPS", "XYZ")
+
+
+def test_bdt_week_zero_is_gps_week_1356():
+    # BDT 2006-01-01 00:00:00 is GPS 2006-01-01 00:00:14, in GPS week 1356
+    bdt_origin = from_week_tow(0, 0.0, "BDT")
+    gps = convert_time_system(bdt_origin, "BDT", "GPS")
+    weeks, tows = to_week_tow(gps, "GPS")
+    assert weeks == 1356
+    assert tows == 14.0
+
+    weeks, tows = to_week_tow(_times("2024-01-02T12:00:00"), "BDT")
+    assert (weeks[0], tows[0]) == (2295 - 1356, 2 * 86400 + 43200)
+
+
+def test_week_tow_round_trip():
+    times = _times("1980-01-06", "2024-01-02T00:00:30.1234567", "2024-01-06T23:59:59")
+    weeks, tows = to_week_tow(times)
+    np.testing.assert_array_equal(weeks, [0, 2295, 2295])
+    np.testing.assert_allclose(tows, [0.0, 172830.1234567, 604799.0])
+    np.testing.assert_array_equal(from_week_tow(weeks, tows), times)
+    assert from_week_tow(0, 0.0) == GPS_EPOCH
+
+
+def test_epoch_lines_and_calendar():
+    lines = [
+        b"> 2024 01 02 00 00 30.1234567  0 12",
+        b"> 2024 12 31 23 59 59.9999999  0  3       0.000000000123",
+    ]
+    times = epoch_lines_to_ns(lines).view("datetime64[ns]")
+    np.testing.assert_array_equal(
+        times, _times("2024-01-02T00:00:30.1234567", "2024-12-31T23:59:59.9999999")
+    )
+
+    fields = ns_to_calendar(times)
+    np.testing.assert_array_equal(fields[0], [2024, 2024])
+    np.testing.assert_array_equal(fields[2], [2, 31])
+    np.testing.assert_allclose(fields[5], [30.1234567, 59.9999999])
+    np.testing.assert_array_equal(calendar_to_datetime64(*fields), times)